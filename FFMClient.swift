@@ -17,6 +17,8 @@ struct FFMRequest: Codable {
     struct Policy: Codable {
         let reserveMinutes: Int
         let enforceMEF: Bool
+        var optimize: String? = nil  // "time" or "fuel": follow winds and avoid risk instead of the great circle
+        var altitudeSweep: Bool? = nil  // compare every cruise altitude; adds altitudeSweep to the response
     }
     let aircraft: Aircraft
     let route: [Waypoint]
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Airport Index
+Airport dataset export and a lat/lon grid index for nearest-airport queries
+"""
+
+import argparse
+import csv
+import json
+import math
+import random
+import re
+import sys
+import time
+
+import numpy as np
+
+EARTH_RADIUS_NM = 3440.065  # same radius as RoutePlan.haversineNM
+CELL_DEG = 0.5
+SWIFT_SOURCE = "AeroMapsApp.swift"
+DATASET_FILE = "airports.json"
+AIRPORT_TYPES = {"small_airport", "medium_airport", "large_airport"}  # OurAirports types we keep
+
+# Dataset
+
+def parse_swift_airports(path=SWIFT_SOURCE):
+    """Airport records from the MapState.airports literal"""
+    with open(path) as f:
+        source = f.read()
+    start = source.index("let airports: [String: Airport] = [")
+    end = source.index("\n    ]\n", start)
+    block = source[start:end]
+
+    def strings(text, field):
+        return re.findall(rf'{field}: "([^"]*)"', text)
+
+    airports = []
+    for chunk in re.split(r'\n\s*"[A-Z0-9]+": Airport\(', block)[1:]:
+        lat, lon = re.search(r"latitude: (-?[\d.]+), longitude: (-?[\d.]+)", chunk).groups()
+        runways = [{"designation": d, "length": int(length), "width": int(width), "surface": surface,
+                    "lighted": lit == "true"}
+                   for d, length, width, surface, lit in re.findall(
+                       r'Runway\(designation: "([^"]*)", length: (\d+), width: (\d+), surface: "([^"]*)", '
+                       r"lighted: (true|false)\)", chunk)]
+        frequencies = [{"type": t, "frequency": f, "description": d} for t, f, d in re.findall(
+            r'Frequency\(type: "([^"]*)", frequency: "([^"]*)", description: "([^"]*)"\)', chunk)]
+        services = re.search(r"services: \[([^\]]*)\]", chunk).group(1)
+        airports.append({
+            "icao": strings(chunk, "icao")[0], "iata": "",
+            "name": strings(chunk, "name")[0], "city": strings(chunk, "city")[0], "state": strings(chunk, "state")[0],
+            "lat": float(lat), "lon": float(lon), "elevation": int(re.search(r"elevation: (-?\d+)", chunk).group(1)),
+            "runways": runways, "frequencies": frequencies, "services": re.findall(r'"([^"]*)"', services),
+        })
+    return airports
+
+def parse_ourairports_csv(path):
+    """Airport records from an OurAirports-style airports.csv"""
+    airports = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("type") not in AIRPORT_TYPES:
+                continue
+            try:
+                lat, lon = float(row["latitude_deg"]), float(row["longitude_deg"])
+            except (KeyError, ValueError):
+                continue
+            airports.append({
+                "icao": row.get("gps_code") or row["ident"], "iata": row.get("iata_code", ""),
+                "name": row.get("name", ""), "city": row.get("municipality", ""),
+                "state": row.get("iso_region", "").split("-")[-1],
+                "lat": lat, "lon": lon, "elevation": int(float(row.get("elevation_ft") or 0)),
+            })
+    return airports
+
+def synthetic_airports(count, seed=0):
+    """Random US airports with unique codes and plausible names, for benchmarks"""
+    rng = random.Random(seed)
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    prefixes = ["San", "Santa", "Fort", "Port", "Lake", "Mount", "Grand", "Cedar", "Spring", "Green", "Red", "Pine",
+                "Oak", "River", "Rock", "Elk", "Bear", "Eagle", "Silver", "Gold", "Clear", "Fair", "Glen", "Maple"]
+    suffixes = ["ville", "ton", " City", " Falls", " Springs", "field", "wood", " Valley", " Harbor", "burg", " Creek",
+                " Ridge", " Park", " Junction", "dale", " Bend", " Hills", " Point", " Mesa", " Flats"]
+    kinds = ["Municipal", "Regional", "County", "International", "Executive", "Airpark", "Field", "Memorial"]
+    states = ["CA", "NV", "OR", "WA", "AZ", "UT", "ID", "MT", "WY", "CO", "NM", "TX", "OK", "KS", "NE", "SD", "ND",
+              "MN", "IA", "MO", "AR", "LA", "MS", "AL", "GA", "FL", "SC", "NC", "TN", "KY", "IL", "IN", "OH", "MI",
+              "WI", "PA", "NY", "VT", "NH", "ME", "MA", "CT", "NJ", "VA", "WV", "MD"]
+    codes = set()
+    airports = []
+    while len(airports) < count:
+        # K + 3 only has 46,656 codes; past that use four-character local identifiers
+        code = ("K" if len(codes) < 40000 else rng.choice(letters)) + "".join(
+            rng.choice(letters + "0123456789") for _ in range(3))
+        if code in codes:
+            continue
+        codes.add(code)
+        city = rng.choice(prefixes) + rng.choice(suffixes)
+        airports.append({
+            "icao": code, "iata": code[1:] if rng.random() < 0.1 else "",
+            "name": f"{city} {rng.choice(kinds)}", "city": city, "state": rng.choice(states),
+            "lat": round(rng.uniform(25.0, 49.0), 4), "lon": round(rng.uniform(-124.5, -67.0), 4),
+            "elevation": rng.randint(0, 9000),
+        })
+    return airports
+
+def load_airports(path=DATASET_FILE):
+    """Airport records from a dataset JSON file or an OurAirports CSV"""
+    if path.endswith(".csv"):
+        return parse_ourairports_csv(path)
+    with open(path) as f:
+        return json.load(f)
+
+# Spatial index
+
+def unit_vectors(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+class AirportIndex:
+    """Airports bucketed into CELL_DEG lat/lon cells, stored CSR-style
+
+    Airports are sorted by cell and ``starts[row, col]`` is the first airport
+    of each cell, so a query reads the few cells around it and compares
+    exact great-circle distances only for those candidates.
+    """
+
+    def __init__(self, airports):
+        self.airports = list(airports)
+        lat = np.array([a["lat"] for a in self.airports], dtype=np.float64)
+        lon = np.array([a["lon"] for a in self.airports], dtype=np.float64)
+        self.rows, self.cols = int(180 / CELL_DEG), int(360 / CELL_DEG)
+        cells = self.cell_of(lat, lon)
+        order = np.argsort(cells, kind="stable")
+        self.order = order
+        self.lat, self.lon = lat[order], lon[order]
+        self.vectors = unit_vectors(self.lat, self.lon)
+        self.codes = np.array([self.airports[i]["icao"] for i in order])
+        counts = np.bincount(cells, minlength=self.rows * self.cols)
+        self.starts = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self._cells = None  # Python lists for snap, built on first use
+
+    @classmethod
+    def from_file(cls, path=DATASET_FILE):
+        return cls(load_airports(path))
+
+    def __len__(self):
+        return len(self.airports)
+
+    def cell_of(self, lat, lon):
+        row = np.clip(((np.asarray(lat) + 90) / CELL_DEG).astype(np.int64), 0, self.rows - 1)
+        col = (((np.asarray(lon) + 180) / CELL_DEG).astype(np.int64)) % self.cols
+        return row * self.cols + col
+
+    def spans(self, lat, lon, radius_nm):
+        """(first, end) ranges of sorted airports in the cells within radius_nm of a point
+
+        Cells are sorted row-major, so the cells of one row form a single
+        range, or two where the box crosses the antimeridian.
+        """
+        dlat = radius_nm / 60
+        cos_lat = np.cos(np.radians(min(abs(lat) + dlat, 90.0)))
+        dlon = 180.0 if cos_lat < 1e-6 else min(radius_nm / (60 * cos_lat), 180.0)
+        rows = np.arange(max(int((lat - dlat + 90) / CELL_DEG), 0),
+                         min(int((lat + dlat + 90) / CELL_DEG), self.rows - 1) + 1) * self.cols
+        col0 = int(np.floor((lon - dlon + 180) / CELL_DEG))
+        col1 = int(np.floor((lon + dlon + 180) / CELL_DEG))
+        if col1 - col0 + 1 >= self.cols:
+            pieces = [(0, self.cols - 1)]
+        elif col0 < 0:
+            pieces = [(col0 + self.cols, self.cols - 1), (0, col1)]
+        elif col1 >= self.cols:
+            pieces = [(col0, self.cols - 1), (0, col1 - self.cols)]
+        else:
+            pieces = [(col0, col1)]
+        return [(self.starts[rows + first], self.starts[rows + last + 1]) for first, last in pieces]
+
+    def candidates(self, points, radius_nm):
+        """Sorted-order indices of airports in every cell within radius_nm of any point"""
+        spans = [span for lat, lon in points for span in self.spans(lat, lon, radius_nm)]
+        lo = np.concatenate([first for first, _ in spans])
+        hi = np.concatenate([end for _, end in spans])
+        lengths = hi - lo
+        if not lengths.sum():
+            return np.empty(0, dtype=np.int64)
+        # Concatenated aranges: each range's offset repeated over its length, plus a running count
+        offsets = np.repeat(lo - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        indices = offsets + np.arange(lengths.sum())
+        if len(points) == 1:
+            return indices
+        seen = np.zeros(len(self.airports), dtype=bool)  # cheaper than np.unique at these sizes
+        seen[indices] = True
+        return np.flatnonzero(seen)
+
+    def nearest(self, points, n=3, max_nm=100.0, exclude=()):
+        """Up to n (icao, distance_nm) pairs nearest to any of the points, within max_nm"""
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        candidates = self.candidates(points, max_nm)
+        if not len(candidates):
+            return []
+        dots = unit_vectors(points[:, 0], points[:, 1]) @ self.vectors[candidates].T
+        distance = EARTH_RADIUS_NM * np.arccos(np.clip(dots.max(axis=0), -1.0, 1.0))
+        keep = distance <= max_nm
+        if exclude:
+            keep &= ~np.isin(self.codes[candidates], list(exclude))
+        candidates, distance = candidates[keep], distance[keep]
+        if len(candidates) > n:
+            best = np.argpartition(distance, n)[:n]
+            candidates, distance = candidates[best], distance[best]
+        ranked = np.argsort(distance, kind="stable")
+        return [(str(self.codes[candidates[i]]), float(distance[i])) for i in ranked]
+
+    def snap(self, lat, lon, radius_nm):
+        """(icao, lat, lon) of the nearest airport within a few nm, or None
+
+        Reads only the cells the radius touches, in plain Python, which beats
+        the array path for the handful of airports involved.
+        """
+        if self._cells is None:
+            self._cells = (self.starts.tolist(), self.lat.tolist(), self.lon.tolist())
+        starts, lats, lons = self._cells
+        dlat = radius_nm / 60
+        dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        la1 = math.radians(lat)
+        best, best_nm = None, radius_nm
+        first_row = max(int((lat - dlat + 90) / CELL_DEG), 0)
+        last_row = min(int((lat + dlat + 90) / CELL_DEG), self.rows - 1)
+        for r in range(first_row, last_row + 1):
+            for c in range(int((lon - dlon + 180) // CELL_DEG), int((lon + dlon + 180) // CELL_DEG) + 1):
+                cell = r * self.cols + c % self.cols
+                for i in range(starts[cell], starts[cell + 1]):
+                    if abs(lats[i] - lat) > dlat or abs((lons[i] - lon + 180) % 360 - 180) > dlon:
+                        continue
+                    la2 = math.radians(lats[i])
+                    h = (math.sin((la2 - la1) / 2) ** 2
+                         + math.cos(la1) * math.cos(la2) * math.sin(math.radians(lons[i] - lon) / 2) ** 2)
+                    distance = EARTH_RADIUS_NM * 2 * math.asin(min(1.0, math.sqrt(h)))
+                    if distance <= best_nm:
+                        best, best_nm = i, distance
+        return None if best is None else (str(self.codes[best]), lats[best], lons[best])
+
+    def within(self, lat, lon, radius_nm):
+        """Codes of every airport within radius_nm of a point"""
+        return [code for code, _ in self.nearest([(lat, lon)], len(self.airports), radius_nm)]
+
+def brute_force(index, points, n, max_nm):
+    dots = unit_vectors(np.asarray(points)[:, 0], np.asarray(points)[:, 1]) @ index.vectors.T
+    distance = EARTH_RADIUS_NM * np.arccos(np.clip(dots.max(axis=0), -1.0, 1.0))
+    ranked = [i for i in np.argsort(distance, kind="stable") if distance[i] <= max_nm][:n]
+    return [str(index.codes[i]) for i in ranked]
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the airport dataset and query the nearest-airport index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help=f"write {DATASET_FILE} from {SWIFT_SOURCE} or an OurAirports CSV")
+    export.add_argument("-o", "--output", default=DATASET_FILE)
+    export.add_argument("--csv", help="OurAirports airports.csv to export instead")
+    export.add_argument("--synthetic", type=int, metavar="N", help="export N synthetic airports instead")
+    nearest = sub.add_parser("nearest", help="nearest airports to a point")
+    nearest.add_argument("lat", type=float)
+    nearest.add_argument("lon", type=float)
+    nearest.add_argument("-n", type=int, default=3)
+    nearest.add_argument("--radius", type=float, default=100.0, help="nm")
+    nearest.add_argument("--airports", default=DATASET_FILE, help="dataset file")
+    bench = sub.add_parser("bench", help="time queries on a synthetic nationwide dataset")
+    bench.add_argument("--count", type=int, default=30000)
+    bench.add_argument("--radius", type=float, default=100.0, help="nm")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        if args.csv:
+            airports = parse_ourairports_csv(args.csv)
+        elif args.synthetic:
+            airports = synthetic_airports(args.synthetic)
+        else:
+            airports = parse_swift_airports()
+        with open(args.output, "w") as f:
+            json.dump(airports, f, indent=2 if len(airports) < 100 else None)
+            f.write("\n")
+        print(f"✅ Wrote {len(airports)} airports to {args.output}")
+        return
+
+    if args.command == "nearest":
+        index = AirportIndex.from_file(args.airports)
+        for code, distance in index.nearest([(args.lat, args.lon)], args.n, args.radius):
+            print(f"  {code:<6} {distance:6.1f} nm")
+        return
+
+    started = time.perf_counter()
+    index = AirportIndex(synthetic_airports(args.count))
+    print(f"🗺️  Indexed {len(index):,} airports in {(time.perf_counter() - started) * 1000:.0f}ms")
+    rng = np.random.default_rng(1)
+    queries = [np.column_stack([rng.uniform(30, 45, k), rng.uniform(-120, -75, k)])
+               for k in rng.integers(1, 9, 500)]
+    started = time.perf_counter()
+    for points in queries:
+        index.nearest(points, 3, args.radius)
+    elapsed = (time.perf_counter() - started) / len(queries)
+    mismatches = sum([code for code, _ in index.nearest(points, 3, args.radius)]
+                     != brute_force(index, points, 3, args.radius) for points in queries[:100])
+    print(f"⏱️ Nearest 3 within {args.radius:g} nm of 1-8 route points: {elapsed * 1e6:.0f}µs/query "
+          f"({mismatches} mismatches against brute force)")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Airport Search
+Prefix trie plus trigram postings over airport codes, names and cities, stored as one binary asset
+"""
+
+import argparse
+import bisect
+import json
+import mmap
+import re
+import struct
+import time
+import unicodedata
+
+import numpy as np
+
+from airport_index import DATASET_FILE, load_airports, synthetic_airports
+
+INDEX_FILE = "airports.idx"
+MAGIC = b"AMSI"
+VERSION = 1
+TOP_K = 10  # best airports kept at every trie node
+SCAN_BLOCK = 256  # postings read by the first step of a substring search
+FIELDS = ("icao", "iata", "name", "city", "state")
+FIELD_INDEX = {field: i for i, field in enumerate(FIELDS)}
+
+# Match tiers, best first
+EXACT_CODE, CODE_PREFIX, WORD_PREFIX, SUBSTRING = 4, 3, 2, 1
+
+def normalize(text):
+    """Upper-case ASCII letters, digits and single spaces: "São Paulo/Guarulhos" -> "SAO PAULO GUARULHOS" """
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return " ".join(re.sub(r"[^A-Z0-9]+", " ", text.upper()).split())
+
+def static_rank(airport):
+    """Importance used to order equally good matches: runway length, else the kind of airport"""
+    runways = airport.get("runways") or []
+    if runways:
+        return min(max(r.get("length", 0) for r in runways) // 100, 200)
+    name = airport.get("name", "").upper()
+    for word, rank in (("INTERNATIONAL", 100), ("REGIONAL", 60), ("MUNICIPAL", 50), ("COUNTY", 40)):
+        if word in name:
+            return rank
+    return 20
+
+def search_terms(airport):
+    """(term, tier) pairs an airport can be found by through the prefix trie"""
+    terms = [(normalize(airport.get(code, "")), CODE_PREFIX) for code in ("icao", "iata")]
+    for field in ("name", "city"):
+        # Every word onwards, so "SAN FRAN" and "FRANCISCO INT" both find San Francisco International
+        words = normalize(airport.get(field, "")).split()
+        terms.extend((" ".join(words[i:]), WORD_PREFIX) for i in range(len(words)))
+    return [(term, tier) for term, tier in terms if term]
+
+def trigrams(text):
+    data = text.encode()
+    return {(data[i] << 16) | (data[i + 1] << 8) | data[i + 2] for i in range(len(data) - 2)}
+
+# Builder
+
+def build_index(airports, path=INDEX_FILE):
+    """Write the search asset for a list of airport records; returns its size in bytes
+
+    Airports are stored most important first, so an airport's id is its rank:
+    trie nodes keep the lowest ids per tier and postings lists come out in
+    rank order, which lets a substring search stop at the first few matches.
+    """
+    airports = sorted(airports, key=lambda a: (-static_rank(a), a.get("icao", "")))
+
+    # Prefix trie: node -> {byte: child}, plus the best airports anywhere below each node
+    children = [{}]
+    best = [{}]  # node -> {airport: best tier}
+    for airport_id, airport in enumerate(airports):
+        for term, tier in search_terms(airport):
+            node = 0
+            data = term.encode()
+            for depth, byte in enumerate(data, 1):
+                child = children[node].get(byte)
+                if child is None:
+                    child = len(children)
+                    children[node][byte] = child
+                    children.append({})
+                    best.append({})
+                node = child
+                # A code ending here is an exact hit for anyone who typed exactly this far
+                node_tier = EXACT_CODE if tier == CODE_PREFIX and depth == len(data) else tier
+                if best[node].get(airport_id, 0) < node_tier:
+                    best[node][airport_id] = node_tier
+    topk = [sorted(tiers, key=lambda a: (-tiers[a], a))[:TOP_K] for tiers in best]
+
+    child_start, labels, targets = [0], bytearray(), []
+    for node in children:
+        for byte in sorted(node):
+            labels.append(byte)
+            targets.append(node[byte])
+        child_start.append(len(targets))
+    topk_start = np.concatenate([[0], np.cumsum([len(t) for t in topk])])
+
+    # Trigram postings over the full searchable text of each airport
+    texts = [normalize(" ".join(a.get(f, "") for f in FIELDS)) for a in airports]
+    postings = {}
+    for airport_id, text in enumerate(texts):
+        for gram in trigrams(text):
+            postings.setdefault(gram, []).append(airport_id)
+    tri_keys = sorted(postings)
+    tri_start = np.concatenate([[0], np.cumsum([len(postings[k]) for k in tri_keys])])
+
+    strings, string_offsets = bytearray(), [0]
+    for airport in airports:
+        for field in FIELDS:
+            strings += str(airport.get(field, "")).encode()
+            string_offsets.append(len(strings))
+    text_blob = "\n".join(texts).encode()
+    text_offsets = np.concatenate([[0], np.cumsum([len(t.encode()) + 1 for t in texts])])
+
+    sections = {
+        "strings": np.frombuffer(bytes(strings), dtype=np.uint8),
+        "string_offsets": np.asarray(string_offsets, dtype="<u4"),
+        "coords": np.asarray([(a["lat"], a["lon"]) for a in airports], dtype="<f4").reshape(-1, 2),
+        "texts": np.frombuffer(text_blob, dtype=np.uint8),
+        "text_offsets": np.asarray(text_offsets, dtype="<u4"),
+        "child_start": np.asarray(child_start, dtype="<u4"),
+        "labels": np.frombuffer(bytes(labels), dtype=np.uint8),
+        "targets": np.asarray(targets, dtype="<u4"),
+        "topk_start": np.asarray(topk_start, dtype="<u4"),
+        "topk": np.asarray([a for t in topk for a in t], dtype="<u4"),
+        "topk_tiers": np.asarray([tiers[a] for t, tiers in zip(topk, best) for a in t], dtype=np.uint8),
+        "tri_keys": np.asarray(tri_keys, dtype="<u4"),
+        "tri_start": np.asarray(tri_start, dtype="<u4"),
+        "postings": np.asarray([a for k in tri_keys for a in postings[k]], dtype="<u4"),
+    }
+
+    # Layout: magic, version, directory length, JSON directory, then 8-byte aligned sections
+    directory, blobs, offset = {}, [], 0
+    for name, array in sections.items():
+        data = array.tobytes()
+        directory[name] = [offset, len(data), array.dtype.str, list(array.shape)]
+        padded = data + b"\0" * (-len(data) % 8)
+        blobs.append(padded)
+        offset += len(padded)
+    header = json.dumps({"airports": len(airports), "sections": directory}, separators=(",", ":")).encode()
+    header += b" " * (-(len(header) + 12) % 8)
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<II", VERSION, len(header)) + header)
+        for blob in blobs:
+            f.write(blob)
+    return 12 + len(header) + offset
+
+# Query API
+
+class AirportSearch:
+    """Read-only view of a search asset; every section is a zero-copy view of one memory map"""
+
+    def __init__(self, path=INDEX_FILE):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:4] != MAGIC:
+            raise ValueError(f"{path} is not an airport search index")
+        version, header_length = struct.unpack_from("<II", self.map, 4)
+        if version != VERSION:
+            raise ValueError(f"{path} is index version {version}, expected {VERSION}")
+        meta = json.loads(self.map[12:12 + header_length])
+        base = 12 + header_length
+        for name, (offset, length, dtype, shape) in meta["sections"].items():
+            array = np.frombuffer(self.map, dtype=dtype, count=length // np.dtype(dtype).itemsize,
+                                  offset=base + offset).reshape(shape)
+            setattr(self, name, array)
+        self.count = meta["airports"]
+        # Scalar lookups go through memoryviews: much cheaper per element than NumPy indexing
+        self.labels_bytes = self.labels.tobytes()
+        self.child_start_mv = memoryview(self.child_start).cast("B").cast("I")
+        self.targets_mv = memoryview(self.targets).cast("B").cast("I")
+        self.topk_start_mv = memoryview(self.topk_start).cast("B").cast("I")
+        self.topk_mv = memoryview(self.topk).cast("B").cast("I")
+        self.topk_tiers_bytes = self.topk_tiers.tobytes()
+        self.tri_keys_mv = memoryview(self.tri_keys).cast("B").cast("I")
+        self.tri_start_mv = memoryview(self.tri_start).cast("B").cast("I")
+        self.string_offsets_mv = memoryview(self.string_offsets).cast("B").cast("I")
+        self.strings_bytes = self.strings.tobytes()
+        self.texts_bytes = self.texts.tobytes()
+        self.text_offsets_mv = memoryview(self.text_offsets).cast("B").cast("I")
+        self.coords_mv = memoryview(self.coords).cast("B").cast("f")
+
+    def __len__(self):
+        return self.count
+
+    def field(self, airport_id, field):
+        i = airport_id * len(FIELDS) + FIELD_INDEX[field]
+        return self.strings_bytes[self.string_offsets_mv[i]:self.string_offsets_mv[i + 1]].decode()
+
+    def text(self, airport_id):
+        return self.texts_bytes[self.text_offsets_mv[airport_id]:self.text_offsets_mv[airport_id + 1] - 1].decode()
+
+    def walk(self, term):
+        """Trie node reached by a normalized term, or None"""
+        node = 0
+        for byte in term.encode():
+            first, last = self.child_start_mv[node], self.child_start_mv[node + 1]
+            i = self.labels_bytes.find(bytes((byte,)), first, last)
+            if i < 0:
+                return None
+            node = self.targets_mv[i]
+        return node
+
+    def substring_matches(self, term, limit):
+        """Best-ranked airports whose searchable text contains term, via trigram postings
+
+        Postings are in rank order, so the shortest list is read in doubling
+        blocks, filtered against the others by binary search and confirmed in
+        the text until ``limit`` airports match.
+        """
+        lists = []
+        for gram in trigrams(term):
+            i = bisect.bisect_left(self.tri_keys_mv, gram)
+            if i == len(self.tri_keys_mv) or self.tri_keys_mv[i] != gram:
+                return []
+            lists.append(self.postings[self.tri_start_mv[i]:self.tri_start_mv[i + 1]])
+        lists.sort(key=len)
+        shortest, others = lists[0], lists[1:]
+        matches = []
+        start, size = 0, SCAN_BLOCK
+        while start < len(shortest):
+            block = shortest[start:start + size]
+            start, size = start + size, size * 2
+            for postings in others:
+                found = postings[np.minimum(np.searchsorted(postings, block), len(postings) - 1)]
+                block = block[found == block]
+                if not len(block):
+                    break
+            # Trigrams can all be present without the contiguous term; confirm in the text
+            for airport_id in block.tolist():
+                if term in self.text(airport_id):
+                    matches.append(airport_id)
+                    if len(matches) == limit:
+                        return matches
+        return matches
+
+    def search(self, query, limit=5):
+        """Ranked matches: dicts with icao, iata, name, city, state, lat, lon and match tier"""
+        term = normalize(query)
+        if not term:
+            return []
+        scores = {}
+        node = self.walk(term)
+        if node is not None:
+            for i in range(self.topk_start_mv[node], self.topk_start_mv[node + 1]):
+                scores[self.topk_mv[i]] = self.topk_tiers_bytes[i]
+        if len(scores) < limit and len(term) >= 3:
+            for airport_id in self.substring_matches(term, limit):
+                scores.setdefault(airport_id, SUBSTRING)
+        results = []
+        for airport_id in sorted(scores, key=lambda a: (-scores[a], a))[:limit]:
+            result = {field: self.field(airport_id, field) for field in FIELDS}
+            result["lat"] = round(self.coords_mv[2 * airport_id], 5)
+            result["lon"] = round(self.coords_mv[2 * airport_id + 1], 5)
+            result["match"] = scores[airport_id]
+            results.append(result)
+        return results
+
+def linear_search(airports, query):
+    """The app's current MapState.parseSearch: exact ICAO, else the first name or city containing the text"""
+    term = query.upper().strip()
+    for airport in airports:
+        if airport["icao"] == term:
+            return airport
+    for airport in airports:
+        if term in airport["city"].upper() or term in airport["name"].upper():
+            return airport
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the airport search index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="write the binary index from an airport dataset")
+    build.add_argument("--airports", default=DATASET_FILE, help="dataset JSON or OurAirports CSV")
+    build.add_argument("--synthetic", type=int, metavar="N", help="index N synthetic airports instead")
+    build.add_argument("-o", "--output", default=INDEX_FILE)
+    query = sub.add_parser("query", help="ranked matches for a search")
+    query.add_argument("text")
+    query.add_argument("--index", default=INDEX_FILE)
+    query.add_argument("-n", type=int, default=5, help="matches to return")
+    bench = sub.add_parser("bench", help="index vs linear scan on a synthetic dataset")
+    bench.add_argument("--count", type=int, default=30000)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        airports = synthetic_airports(args.synthetic) if args.synthetic else load_airports(args.airports)
+        started = time.perf_counter()
+        size = build_index(airports, args.output)
+        print(f"✅ Indexed {len(airports):,} airports into {args.output} ({size / 1024:.0f} KB) "
+              f"in {time.perf_counter() - started:.1f}s")
+        return
+
+    if args.command == "query":
+        index = AirportSearch(args.index)
+        for result in index.search(args.text, args.n):
+            print(f"  {result['icao']:<5} {result['iata']:<4} {result['name']}, {result['city']} {result['state']} "
+                  f"(match {result['match']})")
+        return
+
+    airports = synthetic_airports(args.count)
+    path = f"/tmp/airports_{args.count}.idx"
+    started = time.perf_counter()
+    size = build_index(airports, path)
+    print(f"🗂️  Built {len(airports):,}-airport index ({size / 1024 / 1024:.1f} MB) "
+          f"in {time.perf_counter() - started:.1f}s")
+    started = time.perf_counter()
+    index = AirportSearch(path)
+    print(f"   opened in {(time.perf_counter() - started) * 1e6:.0f}µs")
+    queries = [airports[7]["icao"], airports[99]["icao"][:3], "SAN", "CEDAR SP", "FALLS MUNI", "LAKEWOOD",
+               "EAGLE R", "K", "GOLD MESA", "PINE", "ZZZZ"]
+    for name, run in (("index", lambda q: index.search(q)), ("linear scan", lambda q: linear_search(airports, q))):
+        rounds = 200 if name == "index" else 5
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for q in queries:
+                run(q)
+        print(f"⏱️ {name:<12} {(time.perf_counter() - started) / rounds / len(queries) * 1e6:9.1f}µs/query")
+    for q in queries[:5]:
+        print(f"   {q!r:<14} → {[r['icao'] + ' ' + r['name'] for r in index.search(q, 3)]}")
+
+if __name__ == "__main__":
+    main()
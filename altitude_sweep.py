@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Altitude Sweep
+Time, fuel and risk of a route at every candidate cruise altitude, with the Pareto-optimal bands marked
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+import ffm_planner
+from ffm_planner import (CRUISE_ALTITUDE_FT, MODERATE, densify, minimum_safe_altitudes, parse_request,
+                         terrain_elevation_ft)
+from risk_store import synthetic_slice
+from route_optimizer import MIN_GROUND_SPEED_KT, RISK_WEIGHT, cost_grid, distance_nm, ground_speed, wind_components
+
+SWEEP_ALTITUDES_FT = tuple(range(3000, 17001, 1000))
+CLIMB_FPM = 500
+CLIMB_SPEED_FACTOR = 0.75  # ground covered while climbing, as a share of cruise
+CLIMB_BURN_FACTOR = 1.3  # fuel flow while climbing, as a share of cruise
+ADVICE_MIN_MINUTES = 2  # advice has to save at least this much time...
+ADVICE_MIN_RISK = 0.1  # ...or cut the worst risk by at least this much
+
+def sweep(points, ktas, fuel_burn, msa_ft=0, altitudes=SWEEP_ALTITUDES_FT, store=None, when=None, baseline=None):
+    """Bands for a flown polyline: a list of dicts, one per altitude, lowest first
+
+    Every altitude is evaluated in the same array pass: the route
+    optimizer's grid winds, scaled to each altitude, give the ground speed at
+    each segment midpoint, the risk channels are sampled at every point, and
+    the climb from the departure elevation adds time and fuel. With
+    ``baseline`` (the plan's hours and fuel) every band is shifted so cruise
+    altitude reads exactly the plan's figures and the others differ only by
+    their wind and climb. Bands below ``msa_ft`` are marked ``belowMEF`` and
+    never Pareto.
+    """
+    # The flown polyline is already densified; its chord midpoints halve the sample spacing
+    flown = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    samples = np.empty((2 * len(flown) - 1, 2))
+    samples[::2], samples[1::2] = flown, (flown[:-1] + flown[1:]) / 2
+    lat, lon = samples.T
+    altitude = np.asarray(altitudes, dtype=np.float64)[:, None]  # (bands, 1) against (points,)
+
+    lat1, lon1, lat2, lon2 = lat[:-1], lon[:-1], lat[1:], lon[1:]
+    east, north = cost_grid().winds((lat1 + lat2) / 2, (lon1 + lon2) / 2, altitude)
+    tail, cross = wind_components(lat1, lon1, lat2, lon2, east, north)
+    speed = np.maximum(ground_speed(ktas, tail, cross), MIN_GROUND_SPEED_KT)
+    hours = np.sum(distance_nm(lat1, lon1, lat2, lon2) / speed, axis=1)
+
+    # Climbing from the departure field: slower over the ground and a richer mixture
+    field_ft = max(float(terrain_elevation_ft(lat[0], lon[0])), 0)
+    climb_hours = np.maximum(altitude[:, 0] - field_ft, 0) / CLIMB_FPM / 60
+    hours = hours + climb_hours * (1 / CLIMB_SPEED_FACTOR - 1)
+    fuel = hours * fuel_burn + climb_hours * fuel_burn * (CLIMB_BURN_FACTOR - 1)
+    if baseline is not None:
+        plan_hours, plan_fuel = baseline
+        hours = hours + plan_hours - np.interp(CRUISE_ALTITUDE_FT, altitude[:, 0], hours)
+        fuel = fuel + plan_fuel - np.interp(CRUISE_ALTITUDE_FT, altitude[:, 0], fuel)
+
+    if store is not None:
+        flat_altitude = np.broadcast_to(altitude, (len(altitude), len(lat))).ravel()
+        risks = store.sample(np.tile(lat, len(altitude)), np.tile(lon, len(altitude)), flat_altitude, when)
+        worst = risks.max(axis=1).reshape(len(altitude), len(lat))
+    else:
+        hour = datetime.fromtimestamp(time.time() if when is None else when, timezone.utc).hour
+        shape = (len(altitude), len(lat))
+        worst = synthetic_slice(np.broadcast_to(lat, shape), np.broadcast_to(lon, shape), altitude, hour).max(axis=0)
+    peak, exposure = worst.max(axis=1), worst.mean(axis=1)
+
+    feasible = altitude[:, 0] >= msa_ft
+    scores = np.stack([hours, fuel, peak], axis=1)
+    # A band is Pareto-optimal when no feasible band is at least as good on all three and better on one
+    no_worse = np.all(scores[None, :] <= scores[:, None], axis=2)  # [i, j]: band j is no worse than band i
+    better = np.any(scores[None, :] < scores[:, None], axis=2)
+    dominated = np.any(feasible[None, :] & no_worse & better, axis=1)
+    return [{"altitudeFt": int(a), "eteMinutes": round(float(h) * 60, 1), "fuelGallons": round(float(f), 2),
+             "worstRisk": round(float(p), 2), "meanRisk": round(float(e), 2), "belowMEF": not ok,
+             "pareto": bool(ok and not d)}
+            for a, h, f, p, e, ok, d in zip(altitude[:, 0], hours, fuel, peak, exposure, feasible, dominated)]
+
+def recommended(bands):
+    """The Pareto band with the least risk-weighted time, weighted as the route optimizer does"""
+    def cost(band):
+        penalty = 1 + RISK_WEIGHT * max(0.0, (band["worstRisk"] - MODERATE) / (1 - MODERATE))
+        return band["eteMinutes"] * penalty
+    candidates = [band for band in bands if band["pareto"]]
+    return min(candidates, key=cost) if candidates else None
+
+def altitude_advice(bands, cruise_ft=CRUISE_ALTITUDE_FT):
+    """Advisory sentence when another altitude clearly beats cruise on time or risk, else None"""
+    best = recommended(bands)
+    current = next((band for band in bands if band["altitudeFt"] == cruise_ft), None)
+    if best is None or current is None or best["altitudeFt"] == cruise_ft:
+        return None
+    minutes = int(round(best["eteMinutes"] - current["eteMinutes"]))
+    safer = round(current["worstRisk"] - best["worstRisk"], 2)
+    if -minutes < ADVICE_MIN_MINUTES and safer < ADVICE_MIN_RISK:
+        return None
+    change = f"{'+' if minutes > 0 else '−'}{abs(minutes)} min" if minutes else "no time change"
+    return (f"Consider {best['altitudeFt']:,} ft: {change}, plan {best['fuelGallons']:.1f} gal "
+            f"vs {current['fuelGallons']:.1f} gal, worst risk {best['worstRisk']:.2f} vs {current['worstRisk']:.2f} "
+            f"at {cruise_ft:,} ft.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep cruise altitudes for a request's route")
+    parser.add_argument("request", help="FFMRequest JSON file")
+    parser.add_argument("--risk-store", help="gridded risk store directory")
+    parser.add_argument("--rounds", type=int, default=200, help="timed repetitions")
+    args = parser.parse_args()
+
+    if args.risk_store:
+        ffm_planner.use_risk_store(args.risk_store)
+    with open(args.request) as f:
+        route, ktas, fuel_burn, reserve = parse_request(json.load(f))[:4]
+    polyline, _ = densify(route)
+    _, peaks = ffm_planner.leg_risks(route, ffm_planner.RISK_STORE)
+    msa = int(minimum_safe_altitudes(peaks).max())
+    # The same still-air great-circle ETE and reserve fuel the planner reports
+    hours = sum(ffm_planner.haversine_nm(*a, *b) for a, b in zip(route, route[1:])) / ktas
+    baseline = (hours, (hours + reserve / 60) * fuel_burn)
+
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        bands = sweep(polyline, ktas, fuel_burn, msa, store=ffm_planner.RISK_STORE, baseline=baseline)
+    elapsed = (time.perf_counter() - started) / args.rounds
+    print(f"⏱️ {len(bands)} altitudes swept in {elapsed * 1e6:.0f}µs (route MEF {msa:,} ft)")
+    print(f"   {'altitude':>9}{'ETE':>9}{'fuel':>9}{'worst':>7}{'mean':>6}")
+    for band in bands:
+        mark = "  below MEF" if band["belowMEF"] else "  ★ Pareto" if band["pareto"] else ""
+        print(f"   {band['altitudeFt']:>6,} ft{band['eteMinutes']:>6.1f} min{band['fuelGallons']:>6.2f} gal"
+              f"{band['worstRisk']:>7.2f}{band['meanRisk']:>6.2f}{mark}")
+    print(f"💡 {altitude_advice(bands) or 'Cruise altitude is already the best band.'}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,10 +4,13 @@ AeroMaps Auto Demo Script
 Automatically demonstrates app features by simulating user interactions
 """
 
+import argparse
 import time
 import subprocess
 import sys
 
+from demo_timeline import ActionTimeline
+
 def run_command(cmd):
     """Run a command and return the result"""
     try:
@@ -43,107 +46,130 @@ def print_step(step, description):
     print(f"STEP {step}: {description}")
     print(f"{'='*50}")
 
-def main():
-    print("🎬 AeroMaps Auto Demo Script")
-    print("This script will automatically demonstrate app features")
-    print("Make sure the app is running and visible on screen")
-    print("Press Enter to start the demo...")
-    input()
-    
-    # Demo steps with timing
-    demo_steps = [
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="AeroMaps auto demo")
+    parser.add_argument("--timeline", help="write the measured action timeline JSON to this path")
+    parser.add_argument("--video", help="video file the timeline belongs to")
+    parser.add_argument("--origin", type=float,
+                        help="monotonic time the recording started (defaults to demo start)")
+    return parser.parse_args()
+
+def build_demo_steps():
+    """Demo steps with timing: (step, title, [(description, action, planned seconds)])"""
+    return [
         # Step 1: Show tab navigation
         (1, "Showing Tab Navigation", [
-            ("Tap Map tab", lambda: simulate_tap(100, 800)),
-            ("Wait", lambda: wait(2)),
-            ("Tap Flights tab", lambda: simulate_tap(200, 800)),
-            ("Wait", lambda: wait(2)),
-            ("Tap Library tab", lambda: simulate_tap(300, 800)),
-            ("Wait", lambda: wait(2)),
-            ("Return to Map tab", lambda: simulate_tap(100, 800)),
-            ("Wait", lambda: wait(1)),
+            ("Tap Map tab", lambda: simulate_tap(100, 800), 0),
+            ("Wait", lambda: wait(2), 2),
+            ("Tap Flights tab", lambda: simulate_tap(200, 800), 0),
+            ("Wait", lambda: wait(2), 2),
+            ("Tap Library tab", lambda: simulate_tap(300, 800), 0),
+            ("Wait", lambda: wait(2), 2),
+            ("Return to Map tab", lambda: simulate_tap(100, 800), 0),
+            ("Wait", lambda: wait(1), 1),
         ]),
         
         # Step 2: Search functionality
         (2, "Demonstrating Search", [
-            ("Tap search bar", lambda: simulate_tap(200, 150)),
-            ("Wait", lambda: wait(1)),
-            ("Type KSFO", lambda: simulate_text("KSFO")),
-            ("Wait", lambda: wait(1)),
-            ("Press Enter", lambda: simulate_text("\n")),
-            ("Wait", lambda: wait(3)),
-            ("Clear search", lambda: simulate_tap(350, 150)),
-            ("Wait", lambda: wait(1)),
+            ("Tap search bar", lambda: simulate_tap(200, 150), 0),
+            ("Wait", lambda: wait(1), 1),
+            ("Type KSFO", lambda: simulate_text("KSFO"), 0),
+            ("Wait", lambda: wait(1), 1),
+            ("Press Enter", lambda: simulate_text("\n"), 0),
+            ("Wait", lambda: wait(3), 3),
+            ("Clear search", lambda: simulate_tap(350, 150), 0),
+            ("Wait", lambda: wait(1), 1),
         ]),
         
         # Step 3: Add waypoints
         (3, "Adding Waypoints", [
-            ("Tap map to add waypoint 1", lambda: simulate_tap(150, 300)),
-            ("Wait", lambda: wait(1)),
-            ("Tap map to add waypoint 2", lambda: simulate_tap(250, 400)),
-            ("Wait", lambda: wait(1)),
-            ("Tap map to add waypoint 3", lambda: simulate_tap(200, 500)),
-            ("Wait", lambda: wait(2)),
+            ("Tap map to add waypoint 1", lambda: simulate_tap(150, 300), 0),
+            ("Wait", lambda: wait(1), 1),
+            ("Tap map to add waypoint 2", lambda: simulate_tap(250, 400), 0),
+            ("Wait", lambda: wait(1), 1),
+            ("Tap map to add waypoint 3", lambda: simulate_tap(200, 500), 0),
+            ("Wait", lambda: wait(2), 2),
         ]),
         
         # Step 4: Bottom sheet interaction
         (4, "Bottom Sheet Features", [
-            ("Drag bottom sheet up", lambda: simulate_swipe(200, 700, 200, 500)),
-            ("Wait", lambda: wait(2)),
-            ("Tap Route Advisor", lambda: simulate_tap(100, 650)),
-            ("Wait", lambda: wait(1)),
-            ("Tap W&B button", lambda: simulate_tap(200, 650)),
-            ("Wait", lambda: wait(3)),
-            ("Close Flight Planner", lambda: simulate_tap(350, 100)),
-            ("Wait", lambda: wait(1)),
+            ("Drag bottom sheet up", lambda: simulate_swipe(200, 700, 200, 500), 0),
+            ("Wait", lambda: wait(2), 2),
+            ("Tap Route Advisor", lambda: simulate_tap(100, 650), 0),
+            ("Wait", lambda: wait(1), 1),
+            ("Tap W&B button", lambda: simulate_tap(200, 650), 0),
+            ("Wait", lambda: wait(3), 3),
+            ("Close Flight Planner", lambda: simulate_tap(350, 100), 0),
+            ("Wait", lambda: wait(1), 1),
         ]),
         
         # Step 5: Layer controls
         (5, "Layer Controls", [
-            ("Tap Airspace layer", lambda: simulate_tap(100, 600)),
-            ("Wait", lambda: wait(1)),
-            ("Tap Weather layer", lambda: simulate_tap(200, 600)),
-            ("Wait", lambda: wait(1)),
-            ("Tap Terrain layer", lambda: simulate_tap(300, 600)),
-            ("Wait", lambda: wait(2)),
+            ("Tap Airspace layer", lambda: simulate_tap(100, 600), 0),
+            ("Wait", lambda: wait(1), 1),
+            ("Tap Weather layer", lambda: simulate_tap(200, 600), 0),
+            ("Wait", lambda: wait(1), 1),
+            ("Tap Terrain layer", lambda: simulate_tap(300, 600), 0),
+            ("Wait", lambda: wait(2), 2),
         ]),
         
         # Step 6: Clear route
         (6, "Clearing Route", [
-            ("Tap Clear Route", lambda: simulate_tap(300, 650)),
-            ("Wait", lambda: wait(2)),
+            ("Tap Clear Route", lambda: simulate_tap(300, 650), 0),
+            ("Wait", lambda: wait(2), 2),
         ]),
         
         # Step 7: Search different airports
         (7, "Multiple Airport Search", [
-            ("Tap search bar", lambda: simulate_tap(200, 150)),
-            ("Wait", lambda: wait(1)),
-            ("Type San Jose", lambda: simulate_text("San Jose")),
-            ("Wait", lambda: wait(1)),
-            ("Press Enter", lambda: simulate_text("\n")),
-            ("Wait", lambda: wait(3)),
-            ("Clear search", lambda: simulate_tap(350, 150)),
-            ("Wait", lambda: wait(1)),
+            ("Tap search bar", lambda: simulate_tap(200, 150), 0),
+            ("Wait", lambda: wait(1), 1),
+            ("Type San Jose", lambda: simulate_text("San Jose"), 0),
+            ("Wait", lambda: wait(1), 1),
+            ("Press Enter", lambda: simulate_text("\n"), 0),
+            ("Wait", lambda: wait(3), 3),
+            ("Clear search", lambda: simulate_tap(350, 150), 0),
+            ("Wait", lambda: wait(1), 1),
         ]),
         
         # Step 8: Floating action buttons
         (8, "Floating Action Buttons", [
-            ("Tap location button", lambda: simulate_tap(350, 400)),
-            ("Wait", lambda: wait(2)),
-            ("Tap mode button", lambda: simulate_tap(350, 500)),
-            ("Wait", lambda: wait(2)),
+            ("Tap location button", lambda: simulate_tap(350, 400), 0),
+            ("Wait", lambda: wait(2), 2),
+            ("Tap mode button", lambda: simulate_tap(350, 500), 0),
+            ("Wait", lambda: wait(2), 2),
         ]),
     ]
-    
-    # Execute demo steps
+
+def run_demo(demo_steps, timeline):
+    """Execute demo steps in order, logging every action on the timeline"""
     for step_num, step_desc, actions in demo_steps:
         print_step(step_num, step_desc)
+        timeline.begin_section(step_desc)
         
-        for action_desc, action_func in actions:
+        for action_desc, action_func, planned in actions:
             print(f"  → {action_desc}")
-            success = action_func()
-            if not success:
+            success = timeline.run(action_desc, action_func, planned)
+            if success is False:
                 print(f"    ⚠️  Action failed: {action_desc}")
+    timeline.end_section()
+    return timeline
+
+def main():
+    args = parse_args()
+    timeline = ActionTimeline(origin=args.origin)
+    
+    print("🎬 AeroMaps Auto Demo Script")
+    print("This script will automatically demonstrate app features")
+    print("Make sure the app is running and visible on screen")
+    print("Press Enter to start the demo...")
+    input()
+    
+    run_demo(build_demo_steps(), timeline)
+    timeline.print_report()
+    if args.timeline:
+        timeline.save(args.timeline, video=args.video)
+        print(f"🧭 Action timeline saved to {args.timeline}")
     
     print("\n🎉 Demo completed!")
     print("The app has demonstrated all major features automatically.")
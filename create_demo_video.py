@@ -4,61 +4,43 @@ AeroMaps Demo Video Creator
 Records the simulator while running the auto demo to create a .mov file
 """
 
+import argparse
 import subprocess
 import time
 import signal
 import sys
 import os
 
+from demo_capture import ScreenCapture, add_capture_args, backend_from_args
+from demo_preflight import run_preflight
+from demo_timeline import timeline_path_for
+
 class VideoRecorder:
-    def __init__(self):
-        self.ffmpeg_process = None
+    def __init__(self, capture=None):
+        self.capture = capture or ScreenCapture(fps=30)
         self.recording = False
+        self.output_file = None
+        self.origin = None
         
     def start_recording(self, output_file="AeroMaps_Demo.mov"):
         """Start recording the simulator screen"""
-        print(f"🎬 Starting video recording to {output_file}...")
+        self.output_file = output_file
+        print(f"🎬 Starting video recording to {output_file} ({self.capture.describe()})...")
         
-        try:
-            # Use ffmpeg to record the screen (device 1 is "Capture screen 0")
-            cmd = [
-                "ffmpeg",
-                "-f", "avfoundation",
-                "-i", "1:none",  # Screen capture device 1, no audio
-                "-framerate", "30",
-                "-video_size", "1920x1080",  # Standard HD resolution
-                "-c:v", "libx264",
-                "-preset", "fast",
-                "-crf", "23",
-                "-y",  # Overwrite output file
-                output_file
-            ]
-            
-            print(f"Running command: {' '.join(cmd)}")
-            
-            self.ffmpeg_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            self.recording = True
-            print("✅ Recording started!")
-            
-        except Exception as e:
-            print(f"❌ Failed to start recording: {e}")
+        # Time zero of the video for the auto demo's action timeline
+        self.origin = time.monotonic()
+        if not self.capture.start(output_file):
+            print("❌ Failed to start recording")
             return False
-            
+        self.recording = True
+        print("✅ Recording started!")
         return True
     
     def stop_recording(self):
         """Stop the recording"""
-        if self.ffmpeg_process and self.recording:
+        if self.recording:
             print("🛑 Stopping recording...")
-            self.ffmpeg_process.terminate()
-            try:
-                self.ffmpeg_process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                self.ffmpeg_process.kill()
+            self.capture.stop(timeout=5)
             self.recording = False
             print("✅ Recording stopped!")
     
@@ -67,7 +49,12 @@ class VideoRecorder:
         print("🚀 Running auto demo...")
         try:
             result = subprocess.run(
-                ["python3", "auto_demo.py"],
+                [
+                    "python3", "auto_demo.py",
+                    "--timeline", timeline_path_for(self.output_file),
+                    "--video", self.output_file,
+                    "--origin", repr(self.origin),
+                ],
                 capture_output=True,
                 text=True,
                 timeout=180  # 3 minutes timeout
@@ -90,7 +77,11 @@ def signal_handler(signum, frame):
 
 def main():
     global recorder
-    recorder = VideoRecorder()
+    parser = argparse.ArgumentParser(description="Record the simulator while the auto demo runs")
+    add_capture_args(parser)
+    args = parser.parse_args()
+    capture = backend_from_args(args)
+    recorder = VideoRecorder(capture)
     
     # Set up signal handler for Ctrl+C
     signal.signal(signal.SIGINT, signal_handler)
@@ -98,34 +89,8 @@ def main():
     print("🎬 AeroMaps Demo Video Creator")
     print("=" * 50)
     
-    # Check if app is running
-    print("📱 Checking if AeroMaps is running...")
-    try:
-        result = subprocess.run(
-            ["xcrun", "simctl", "list", "devices", "booted"],
-            capture_output=True,
-            text=True
-        )
-        if "iPhone 16 Pro" not in result.stdout:
-            print("❌ iPhone 16 Pro simulator not running")
-            print("Starting simulator...")
-            subprocess.run(["xcrun", "simctl", "boot", "BA1B26D3-9DAF-4B80-BF5C-8D27294723C4"])
-            time.sleep(5)
-    except Exception as e:
-        print(f"❌ Error checking simulator: {e}")
-        return
-    
-    # Launch the app
-    print("🚀 Launching AeroMaps...")
-    try:
-        subprocess.run([
-            "xcrun", "simctl", "launch", 
-            "BA1B26D3-9DAF-4B80-BF5C-8D27294723C4", 
-            "com.example.AeroMaps"
-        ])
-        time.sleep(3)  # Wait for app to load
-    except Exception as e:
-        print(f"❌ Failed to launch app: {e}")
+    # Check tools, boot the simulator and launch the app
+    if not run_preflight(tuple(dict.fromkeys(capture.tools + ("xcrun",)))):
         return
     
     # Start recording
@@ -144,6 +109,7 @@ def main():
     if demo_success:
         print("\n🎉 Demo video created successfully!")
         print("📁 File: AeroMaps_Demo.mov")
+        print(f"🧭 Timeline: {timeline_path_for(recorder.output_file)}")
         print("📏 Duration: ~3 minutes")
         print("🎬 Ready for editing in iMovie!")
     else:
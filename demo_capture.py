@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Demo Capture Backends
+Screen, simulator-surface and synthetic video sources behind one start/stop interface
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from demo_preflight import DEVICE_SCREEN, DEVICE_UDID
+
+SIMULATOR_WINDOW_SCRIPT = '''
+tell application "System Events" to tell process "Simulator"
+    set {x, y} to position of front window
+    set {w, h} to size of front window
+end tell
+return (x as text) & "," & (y as text) & "," & (w as text) & "," & (h as text)
+'''
+TITLE_BAR_POINTS = 28  # Simulator window chrome above the device surface
+
+# libx264 settings per quality; "high" is the enhanced recorder's long-standing slow / crf 18 / high profile
+QUALITY = {
+    "standard": ["-preset", "fast", "-crf", "20"],
+    "high": ["-preset", "slow", "-crf", "18", "-profile:v", "high", "-level", "4.1"],
+}
+
+def even(value):
+    """Round down to an even pixel count, as libx264 requires"""
+    return int(value) // 2 * 2
+
+def simulator_window_rect():
+    """(x, y, width, height) of the Simulator's device surface in screen points, or None"""
+    result = subprocess.run(["osascript", "-e", SIMULATOR_WINDOW_SCRIPT], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    x, y, w, h = (int(float(v)) for v in result.stdout.strip().split(","))
+    return x, y + TITLE_BAR_POINTS, w, h - TITLE_BAR_POINTS
+
+def parse_crop(spec):
+    """Parse a WxH+X+Y crop geometry into (x, y, width, height)"""
+    size, _, offset = spec.partition("+")
+    width, height = size.split("x")
+    x, _, y = offset.partition("+")
+    return int(x or 0), int(y or 0), int(width), int(height)
+
+class CaptureBackend:
+    """A video source that records to a file between start() and stop()
+
+    Subclasses build the capture command; ``tools`` lists what preflight
+    should check for, and ``needs_simulator`` is False for sources that
+    can run without macOS.
+    """
+
+    name = "base"
+    tools = ("ffmpeg",)
+    needs_simulator = True
+    stop_signal = signal.SIGTERM
+
+    def __init__(self, fps=30, quality="standard"):
+        self.fps = fps
+        self.quality = quality
+        self.process = None
+        self.output_file = None
+
+    def command(self, output_file):
+        raise NotImplementedError
+
+    def describe(self):
+        """One line for the recorder's startup output"""
+        return self.name
+
+    def start(self, output_file):
+        """Start capturing to output_file; returns False if the source failed to start"""
+        self.output_file = output_file
+        cmd = self.command(output_file)
+        print(f"Running command: {' '.join(cmd)}")
+        try:
+            # Commands log errors only, so the stderr pipe cannot fill during a long take
+            self.process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL,
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        except OSError as e:
+            print(f"❌ Could not start {self.name} capture: {e}")
+            return False
+        time.sleep(0.2)
+        if self.process.poll() is not None:
+            print(f"❌ {self.name} capture exited: {self.process.stderr.read().decode(errors='replace')[-400:]}")
+            self.process = None
+            return False
+        return True
+
+    def stop(self, timeout=10):
+        """Stop capturing and let the file finalize"""
+        if not self.process:
+            return
+        self.process.send_signal(self.stop_signal)
+        try:
+            self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+    def encoder_args(self, gop):
+        """Shared H.264 output settings at the backend's quality; a short GOP keeps trims stream-copyable"""
+        return (["-c:v", "libx264"] + QUALITY[self.quality]
+                + ["-pix_fmt", "yuv420p", "-g", str(gop), "-movflags", "+faststart"])
+
+class ScreenCapture(CaptureBackend):
+    """ffmpeg avfoundation capture of the display, cropped to the simulator surface
+
+    ``crop`` is (x, y, width, height) in screen points; when None the
+    Simulator window is located with System Events at start time.
+    ``scale`` converts points to captured pixels (2 on Retina displays).
+    """
+
+    name = "screen"
+    tools = ("ffmpeg", "xcrun", "osascript")
+
+    def __init__(self, fps=30, device="1", crop=None, scale=2, quality="standard"):
+        super().__init__(fps, quality)
+        self.device = device
+        self.crop = crop
+        self.scale = scale
+
+    def crop_filter(self):
+        rect = self.crop or simulator_window_rect()
+        if rect is None:
+            print("⚠️  Could not locate the Simulator window, capturing the full display")
+            return None
+        x, y, w, h = (v * self.scale for v in rect)
+        return f"crop={even(w)}:{even(h)}:{int(x)}:{int(y)}"
+
+    def command(self, output_file):
+        cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error",
+               "-f", "avfoundation", "-framerate", str(self.fps), "-capture_cursor", "0",
+               "-i", f"{self.device}:none"]
+        crop = self.crop_filter()
+        if crop:
+            cmd += ["-vf", crop]
+        return cmd + self.encoder_args(self.fps * 2) + ["-y", output_file]
+
+class SimulatorCapture(CaptureBackend):
+    """simctl recordVideo straight from the simulator's framebuffer
+
+    Only the device surface is encoded, so no crop is needed. simctl
+    finalizes the file on SIGINT.
+    """
+
+    name = "simulator"
+    tools = ("xcrun",)
+    stop_signal = signal.SIGINT
+
+    def __init__(self, fps=30, udid=DEVICE_UDID, codec="h264", quality="standard"):
+        super().__init__(fps, quality)
+        self.udid = udid
+        self.codec = codec
+
+    def command(self, output_file):
+        return ["xcrun", "simctl", "io", self.udid, "recordVideo",
+                f"--codec={self.codec}", "--force", output_file]
+
+class SyntheticCapture(CaptureBackend):
+    """Test pattern or looped image sequence at device size, paced in real time
+
+    Needs only ffmpeg, so recorders, timelines, trimming and extraction can
+    be exercised on a headless Linux box. ``source`` is a directory or glob
+    of PNG frames; without one ffmpeg's testsrc2 pattern is used.
+    """
+
+    name = "synthetic"
+    needs_simulator = False
+
+    def __init__(self, fps=30, source=None, size=DEVICE_SCREEN, quality="standard"):
+        super().__init__(fps, quality)
+        self.source = source
+        self.size = (even(size[0]), even(size[1]))
+
+    def describe(self):
+        return f"{self.name} ({self.source or 'testsrc2'} at {self.size[0]}x{self.size[1]})"
+
+    def input_args(self):
+        if self.source is None:
+            return ["-re", "-f", "lavfi", "-i",
+                    f"testsrc2=size={self.size[0]}x{self.size[1]}:rate={self.fps}"]
+        pattern = os.path.join(self.source, "*.png") if os.path.isdir(self.source) else self.source
+        return ["-re", "-stream_loop", "-1", "-framerate", str(self.fps),
+                "-pattern_type", "glob", "-i", pattern]
+
+    def command(self, output_file):
+        scale = (f"scale={self.size[0]}:{self.size[1]}:force_original_aspect_ratio=decrease,"
+                 f"pad={self.size[0]}:{self.size[1]}:(ow-iw)/2:(oh-ih)/2")
+        return (["ffmpeg", "-hide_banner", "-loglevel", "error"] + self.input_args()
+                + ["-vf", scale] + self.encoder_args(self.fps * 2) + ["-y", output_file])
+
+class RealClock:
+    """Wall clock with the VirtualClock interface, for headless real-time runs"""
+
+    def now(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+class FakeInputDriver:
+    """Stands in for simctl input, checking bounds and gesture overlap
+
+    Each input costs ``dispatch_latency`` seconds of virtual time. A swipe
+    keeps the screen busy for its full gesture duration, so an input issued
+    before it finishes is reported as an overlap.
+    """
+
+    def __init__(self, clock, screen=DEVICE_SCREEN, dispatch_latency=0.15):
+        self.clock = clock
+        self.width, self.height = screen
+        self.dispatch_latency = dispatch_latency
+        self.busy_until = 0.0
+        self.busy_with = None
+        self.events = []
+        self.issues = []
+
+    def in_bounds(self, x, y):
+        """True if a point lies on the device screen"""
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def dispatch(self, kind, points, duration=0.0, detail=None):
+        """Record one input event at the current virtual time"""
+        start = self.clock.now()
+        label = f"{kind} {detail}" if detail is not None else f"{kind} {points}"
+        if start < self.busy_until - 1e-9:
+            self.issues.append({
+                "type": "overlap",
+                "at_s": start,
+                "message": f"{label} starts {self.busy_until - start:.2f}s before {self.busy_with} finishes",
+            })
+        for x, y in points:
+            if not self.in_bounds(x, y):
+                self.issues.append({
+                    "type": "out_of_bounds",
+                    "at_s": start,
+                    "message": f"{label} at ({x}, {y}) is outside the {self.width}x{self.height} screen",
+                })
+        self.clock.sleep(self.dispatch_latency)
+        self.busy_until = start + self.dispatch_latency + duration
+        self.busy_with = label
+        self.events.append({"kind": kind, "points": points, "start_s": start,
+                            "end_s": self.busy_until, "detail": detail})
+        return True
+
+    def tap(self, x, y):
+        return self.dispatch("tap", [(x, y)])
+
+    def swipe(self, start_x, start_y, end_x, end_y, duration=0.5):
+        return self.dispatch("swipe", [(start_x, start_y), (end_x, end_y)], duration)
+
+    def text(self, text):
+        if not text:
+            self.issues.append({"type": "empty_text", "at_s": self.clock.now(),
+                                "message": "text input with an empty string"})
+        return self.dispatch("text", [], detail=repr(text))
+
+    def attach(self, target):
+        """Point a recorder instance or the auto_demo module at this driver"""
+        target.simulate_tap = self.tap
+        target.simulate_swipe = self.swipe
+        target.simulate_text = self.text
+
+BACKENDS = {
+    "screen": ScreenCapture,
+    "simulator": SimulatorCapture,
+    "synthetic": SyntheticCapture,
+}
+
+def add_capture_args(parser, default="screen", fps=30, quality="standard"):
+    """Add the shared --capture options to a recorder's argument parser"""
+    parser.add_argument("--capture", choices=sorted(BACKENDS), default=default,
+                        help="video source: screen, simulator or synthetic")
+    parser.add_argument("--fps", type=int, default=fps, help=f"capture frame rate (default: {fps})")
+    parser.add_argument("--crop", metavar="WxH+X+Y",
+                        help="screen capture region in points (default: the Simulator window)")
+    parser.add_argument("--source", help="synthetic capture: directory or glob of PNG frames")
+    parser.add_argument("--quality", choices=sorted(QUALITY), default=quality,
+                        help=f"H.264 encode settings for ffmpeg sources (default: {quality})")
+
+def backend_from_args(args, name=None):
+    """Build the capture backend selected on the command line (or ``name``)"""
+    name = name or args.capture
+    if name == "screen":
+        return ScreenCapture(fps=args.fps, crop=parse_crop(args.crop) if args.crop else None,
+                             quality=args.quality)
+    if name == "simulator":
+        return SimulatorCapture(fps=args.fps, quality=args.quality)
+    return SyntheticCapture(fps=args.fps, source=args.source, quality=args.quality)
+
+def main():
+    parser = argparse.ArgumentParser(description="Record a clip with one of the demo capture backends")
+    parser.add_argument("output", help="output video file")
+    parser.add_argument("--seconds", type=float, default=5, help="clip length")
+    add_capture_args(parser, default="synthetic")
+    args = parser.parse_args()
+
+    backend = backend_from_args(args)
+    print(f"🎬 Capturing {args.seconds:.0f}s with {backend.describe()}...")
+    if not backend.start(args.output):
+        sys.exit(1)
+    time.sleep(args.seconds)
+    backend.stop()
+    print(f"✅ Saved {args.output}")
+
+if __name__ == "__main__":
+    main()
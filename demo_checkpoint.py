@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Demo Checkpoints
+Per-section completion records so a failed demo run can resume from the failed section
+"""
+
+import json
+import os
+import subprocess
+import time
+from datetime import datetime
+
+from demo_preflight import BUNDLE_ID, DEVICE_UDID, launch_app
+
+# App state right after a fresh launch
+FRESH_STATE = {"tab": "map", "waypoints": 0, "sheet": "collapsed", "panel": None, "layers": "default"}
+
+# Inputs used to rebuild a state after a reset, taken from the demo sequences
+WAYPOINT_TAPS = [(150, 300), (250, 400), (200, 500)]
+SHEET_SWIPE = (200, 700, 200, 500)
+LAYER_TAPS = [(100, 600), (200, 600), (300, 600)]
+FLIGHT_PLANNER_TAP = (200, 650)
+RESTORE_GAP = 0.4  # seconds between restore inputs
+RESTORE_SECTION = "State Restore"
+
+def checkpoint_path_for(demo_name):
+    """Checkpoint file for a demo, kept in the working directory"""
+    return f"{demo_name}.checkpoints.json"
+
+def assumed_state(order, effects, name):
+    """App state a section expects, folded from the effects of earlier sections"""
+    state = dict(FRESH_STATE)
+    for section in order:
+        if section == name:
+            break
+        state.update(effects.get(section, {}))
+    return state
+
+def section_failures(timeline, name):
+    """Descriptions of failed actions recorded for a section"""
+    return [a["action"] for a in timeline.actions if a["section"] == name and not a["success"]]
+
+class CheckpointStore:
+    """JSON record of which demo sections completed and the state they assumed"""
+
+    def __init__(self, demo_name, path=None):
+        self.demo_name = demo_name
+        self.path = path or checkpoint_path_for(demo_name)
+        self.sections = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.sections = json.load(f).get("sections", {})
+
+    def save(self):
+        """Write the checkpoint file"""
+        with open(self.path, "w") as f:
+            json.dump({
+                "demo": self.demo_name,
+                "updated": datetime.now().isoformat(timespec="seconds"),
+                "sections": self.sections,
+            }, f, indent=2)
+
+    def reset(self):
+        """Forget all sections, for a fresh full run"""
+        self.sections = {}
+        self.save()
+
+    def status(self, name):
+        """"done", "failed" or None for a section"""
+        return self.sections.get(name, {}).get("status")
+
+    def mark(self, name, status, assumes, video=None, failures=None):
+        """Record a section outcome and save immediately"""
+        self.sections[name] = {
+            "status": status,
+            "assumes": assumes,
+            "finished": datetime.now().isoformat(timespec="seconds"),
+            "video": video,
+            "failures": failures or [],
+        }
+        self.save()
+
+    def resume_point(self, order):
+        """First section in order that has not completed, or None"""
+        for name in order:
+            if self.status(name) != "done":
+                return name
+        return None
+
+    def plan(self, order, resume=False, start_from=None):
+        """Sections to run for a fresh, resumed or --from run"""
+        if start_from:
+            if start_from not in order:
+                raise ValueError(f"Unknown section '{start_from}'. Sections: {', '.join(order)}")
+            return order[order.index(start_from):]
+        if resume:
+            first = self.resume_point(order)
+            return order[order.index(first):] if first else []
+        self.reset()
+        return list(order)
+
+def mark_restore_failed(checkpoints, name, assumes, video=None):
+    """Record a section as failed because its starting state could not be rebuilt"""
+    print(f"\n❌ Could not restore the state '{name}' starts from; rerun with --resume to retry it")
+    if checkpoints is not None:
+        checkpoints.mark(name, "failed", assumes, video=video, failures=[RESTORE_SECTION])
+
+def reset_app(udid=DEVICE_UDID, bundle_id=BUNDLE_ID):
+    """Terminate and relaunch the app to get back to FRESH_STATE; False when that fails"""
+    try:
+        # terminate exits non-zero when the app is not running, which is fine here
+        subprocess.run(["xcrun", "simctl", "terminate", udid, bundle_id], capture_output=True)
+    except OSError as e:
+        print(f"❌ Could not terminate the app: {e}")
+        return False
+    return launch_app(udid, bundle_id)
+
+def restore_state(recorder, state, timeline, udid=DEVICE_UDID):
+    """Reset the app and replay the shortest input sequence that reaches state
+
+    AeroMaps has no URL scheme for deep links, so the state is rebuilt with a
+    relaunch plus a few fast taps. The inputs are logged on the timeline under
+    a "State Restore" section so the trimmer can cut them.
+    """
+    print(f"\n♻️  Restoring app state: {state}")
+    if not reset_app(udid):
+        print("❌ App reset failed; the state was not restored")
+        return False
+
+    def tap(x, y):
+        return lambda: recorder.simulate_tap(x, y)
+
+    def gap():
+        time.sleep(RESTORE_GAP)
+
+    steps = []
+    for i, (x, y) in enumerate(WAYPOINT_TAPS[:state["waypoints"]]):
+        steps.append((f"Restore waypoint {i + 1}", tap(x, y)))
+    if state["sheet"] == "expanded":
+        steps.append(("Restore bottom sheet", lambda: recorder.simulate_swipe(*SHEET_SWIPE)))
+    if state["layers"] == "toggled":
+        for i, (x, y) in enumerate(LAYER_TAPS):
+            steps.append((f"Restore layer {i + 1}", tap(x, y)))
+    if state["panel"] == "flight_planner":
+        steps.append(("Restore Flight Planner", tap(*FLIGHT_PLANNER_TAP)))
+
+    timeline.begin_section(RESTORE_SECTION)
+    ok = True
+    for description, action in steps:
+        ok = timeline.run(description, action) is not False and ok
+        timeline.run("Wait", gap, RESTORE_GAP)
+    timeline.end_section()
+    return ok
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Demo Dry Run
+Replays the demo choreography against a fake input driver and a virtual clock
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+
+from demo_capture import FakeInputDriver
+from demo_preflight import DEVICE_SCREEN
+from demo_timeline import ActionTimeline
+
+class VirtualClock:
+    """Clock that only moves when something sleeps on it"""
+
+    def __init__(self):
+        self.now_s = 0.0
+
+    def now(self):
+        """Current virtual time in seconds"""
+        return self.now_s
+
+    def sleep(self, seconds):
+        """Advance virtual time instantly"""
+        if seconds < 0:
+            raise ValueError("sleep length must be non-negative")
+        self.now_s += seconds
+
+@contextlib.contextmanager
+def virtual_time(clock):
+    """Route time.sleep to the virtual clock for the duration of a replay"""
+    real_sleep = time.sleep
+    time.sleep = clock.sleep
+    try:
+        yield clock
+    finally:
+        time.sleep = real_sleep
+
+def check_order(timeline, expected_sections=None):
+    """Out-of-order actions and sections on a replayed timeline"""
+    issues = []
+    previous = None
+    for action in timeline.actions:
+        if previous is not None and action["start_s"] < previous["end_s"] - 1e-9:
+            issues.append({
+                "type": "out_of_order",
+                "at_s": action["start_s"],
+                "message": f"'{action['action']}' starts before '{previous['action']}' ends",
+            })
+        previous = action
+
+    seen = [s["name"] for s in timeline.sections]
+    repeated = {name for name in seen if seen.count(name) > 1}
+    for name in sorted(repeated):
+        issues.append({"type": "out_of_order", "at_s": None,
+                       "message": f"section '{name}' runs more than once"})
+    if expected_sections is not None:
+        ran = [name for name in seen if name in expected_sections]
+        if ran != [name for name in expected_sections if name in ran]:
+            issues.append({"type": "out_of_order", "at_s": None,
+                           "message": f"sections ran as {ran}, expected {expected_sections}"})
+    return issues
+
+def replay(name, build, run, attach_to=None, dispatch_latency=0.15, verbose=False):
+    """Replay one demo under the virtual clock and return its report"""
+    clock = VirtualClock()
+    driver = FakeInputDriver(clock, dispatch_latency=dispatch_latency)
+    timeline = ActionTimeline(clock=clock.now)
+    timeline.start()
+    target = build(timeline)
+    driver.attach(attach_to or target)
+
+    output = io.StringIO()
+    started = time.perf_counter()
+    with virtual_time(clock):
+        with contextlib.redirect_stdout(sys.stdout if verbose else output):
+            expected = run(target, timeline)
+    elapsed = time.perf_counter() - started
+
+    report = timeline.report()
+    issues = driver.issues + check_order(timeline, expected)
+    issues += [{"type": "failed", "at_s": a["start_s"], "message": f"'{a['action']}' raised {a['error']}"}
+               for a in timeline.actions if a["error"]]
+    return {
+        "demo": name,
+        "planned_s": report["planned_s"],
+        "simulated_s": clock.now(),
+        "actions": report["actions"],
+        "inputs": len(driver.events),
+        "sections": [s["name"] for s in report["sections"]],
+        "issues": issues,
+        "replay_ms": elapsed * 1000,
+    }
+
+def build_recorder(cls):
+    """Factory that builds a recorder whose timeline runs on the virtual clock"""
+    def build(timeline):
+        recorder = cls()
+        recorder.timeline = timeline
+        return recorder
+    return build
+
+def demo_targets():
+    """All demos that can be replayed: name -> (build, run, attach_to)"""
+    import auto_demo
+    import enhanced_demo_video
+    import final_demo_creator
+    import simple_demo_video
+
+    def run_auto(_, timeline):
+        steps = auto_demo.build_demo_steps()
+        auto_demo.run_demo(steps, timeline)
+        return [title for _, title, _ in steps]
+
+    return {
+        "auto": (lambda timeline: auto_demo, run_auto, auto_demo),
+        "enhanced": (build_recorder(enhanced_demo_video.EnhancedVideoRecorder),
+                     lambda r, _: r.run_enhanced_demo() and r.section_names(), None),
+        "simple": (build_recorder(simple_demo_video.SimpleVideoRecorder),
+                   lambda r, _: r.run_simple_demo() and None, None),
+        "final": (build_recorder(final_demo_creator.FinalVideoRecorder),
+                  lambda r, _: r.run_comprehensive_demo() and r.section_names(), None),
+    }
+
+def print_result(result):
+    """Human-readable summary of one replay"""
+    mark = "✅" if not result["issues"] else "❌"
+    print(f"\n{mark} {result['demo']}: {len(result['sections'])} sections, "
+          f"{result['actions']} actions ({result['inputs']} inputs)")
+    print(f"   ⏱️ Planned {result['planned_s']:.1f}s, simulated {result['simulated_s']:.1f}s "
+          f"({result['simulated_s'] / 60:.1f} min), replayed in {result['replay_ms']:.0f}ms")
+    for issue in result["issues"]:
+        at = f"@{issue['at_s']:.2f}s " if issue["at_s"] is not None else ""
+        print(f"   ⚠️  {issue['type']}: {at}{issue['message']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate AeroMaps demo choreography instantly")
+    parser.add_argument("demos", nargs="*", help="demos to replay: auto, enhanced, simple, final (default: all)")
+    parser.add_argument("--dispatch-latency", type=float, default=0.15,
+                        help="virtual seconds each simulated input takes")
+    parser.add_argument("--json", help="write the results JSON to this path")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show the demo scripts' own output")
+    args = parser.parse_args()
+
+    targets = demo_targets()
+    names = args.demos or list(targets)
+    unknown = [n for n in names if n not in targets]
+    if unknown:
+        print(f"❌ Unknown demo(s): {', '.join(unknown)}. Choose from {', '.join(targets)}")
+        sys.exit(2)
+
+    print(f"🧪 Dry-running {len(names)} demo(s) on a virtual clock "
+          f"(screen {DEVICE_SCREEN[0]}x{DEVICE_SCREEN[1]} pt)")
+    results = []
+    for name in names:
+        build, run, attach_to = targets[name]
+        result = replay(name, build, run, attach_to,
+                        dispatch_latency=args.dispatch_latency, verbose=args.verbose)
+        print_result(result)
+        results.append(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    issues = sum(len(r["issues"]) for r in results)
+    if issues:
+        print(f"\n❌ {issues} choreography issue(s) found")
+        sys.exit(1)
+    print("\n✅ Choreography is valid")
+
+if __name__ == "__main__":
+    main()
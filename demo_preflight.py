@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Demo Preflight
+Shared dependency checks, simulator boot and app launch with readiness polling
+"""
+
+import hashlib
+import json
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEVICE_UDID = "BA1B26D3-9DAF-4B80-BF5C-8D27294723C4"
+DEVICE_NAME = "iPhone 16 Pro"
+BUNDLE_ID = "com.example.AeroMaps"
+DEVICE_SCREEN = (402, 874)  # iPhone 16 Pro screen size in points
+
+# Tool name -> (version probe command, install hint)
+DEPENDENCIES = {
+    "ffmpeg": (["ffmpeg", "-version"], "Install with: brew install ffmpeg"),
+    "ffprobe": (["ffprobe", "-version"], "Install with: brew install ffmpeg"),
+    "xcrun": (["xcrun", "--version"], "Install Xcode Command Line Tools"),
+    "osascript": (["osascript", "-e", "return 1"], "osascript ships with macOS"),
+}
+
+def poll(check, timeout=60.0, initial=0.05, factor=1.6, max_interval=1.0):
+    """Call check() with exponential backoff until it returns a truthy value
+
+    Returns (value, elapsed_seconds); value is None if the timeout expired.
+    """
+    started = time.monotonic()
+    interval = initial
+    while True:
+        value = check()
+        elapsed = time.monotonic() - started
+        if value:
+            return value, elapsed
+        if elapsed + interval > timeout:
+            return None, elapsed
+        time.sleep(interval)
+        interval = min(interval * factor, max_interval)
+
+def probe_tool(name):
+    """Return (name, ok, message) for a single dependency"""
+    cmd, hint = DEPENDENCIES[name]
+    if shutil.which(cmd[0]) is None:
+        return name, False, f"{name} not found. {hint}"
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return name, False, f"{name} failed to run: {e}"
+    if result.returncode != 0:
+        return name, False, f"{name} not working. {hint}"
+    return name, True, f"{name} found"
+
+def check_dependencies(tools=("ffmpeg", "xcrun")):
+    """Probe all required tools concurrently"""
+    print("🔍 Checking dependencies...")
+    with ThreadPoolExecutor(max_workers=len(tools)) as pool:
+        results = list(pool.map(probe_tool, tools))
+    for name, ok, message in results:
+        print(f"{'✅' if ok else '❌'} {message}")
+    return all(ok for _, ok, _ in results)
+
+def device_state(udid=DEVICE_UDID):
+    """Return the simctl state of a device ("Booted", "Shutdown", ...) or None"""
+    result = subprocess.run(
+        ["xcrun", "simctl", "list", "devices", "-j"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    for devices in json.loads(result.stdout).get("devices", {}).values():
+        for device in devices:
+            if device.get("udid") == udid:
+                return device.get("state")
+    return None
+
+def setup_simulator(udid=DEVICE_UDID, timeout=120.0, name=DEVICE_NAME):
+    """Boot the simulator if needed and poll until it reports Booted; ``name`` is for messages"""
+    print(f"📱 Setting up {name} simulator...")
+    try:
+        state = device_state(udid)
+        if state == "Booted":
+            print(f"✅ {name} simulator already running")
+            return True
+
+        print(f"Starting {name} simulator...")
+        subprocess.run(["xcrun", "simctl", "boot", udid], capture_output=True)
+        # bootstatus blocks until SpringBoard is up; polling covers older Xcodes
+        subprocess.run(["xcrun", "simctl", "bootstatus", udid], capture_output=True, timeout=timeout)
+        booted, elapsed = poll(lambda: device_state(udid) == "Booted", timeout=timeout)
+        if not booted:
+            print(f"❌ Simulator did not boot within {timeout:.0f}s")
+            return False
+        print(f"✅ {name} simulator booted ({elapsed:.2f}s)")
+        return True
+    except Exception as e:
+        print(f"❌ Error setting up simulator: {e}")
+        return False
+
+def screen_digest(udid=DEVICE_UDID):
+    """Hash of the current simulator screenshot, or None if it can't be taken"""
+    result = subprocess.run(
+        ["xcrun", "simctl", "io", udid, "screenshot", "--type=png", "-"],
+        capture_output=True
+    )
+    if result.returncode != 0 or not result.stdout:
+        return None
+    return hashlib.sha1(result.stdout).hexdigest()
+
+def app_running(udid=DEVICE_UDID, bundle_id=BUNDLE_ID):
+    """Return True if the app's UIKit process is registered with launchd"""
+    result = subprocess.run(
+        ["xcrun", "simctl", "spawn", udid, "launchctl", "list"],
+        capture_output=True, text=True
+    )
+    return result.returncode == 0 and f"UIKitApplication:{bundle_id}" in result.stdout
+
+def wait_for_app_ready(udid=DEVICE_UDID, bundle_id=BUNDLE_ID, before=None, timeout=20.0):
+    """Poll until the app is running and its first screen has settled
+
+    Settled means two consecutive screenshots are identical and differ from
+    the screen captured before launch.
+    """
+    running, _ = poll(lambda: app_running(udid, bundle_id), timeout=timeout)
+    if not running:
+        return False
+
+    last = {"digest": None}
+
+    def settled():
+        digest = screen_digest(udid)
+        stable = digest is not None and digest == last["digest"] and digest != before
+        last["digest"] = digest
+        return stable
+
+    ready, _ = poll(settled, timeout=timeout, initial=0.15, max_interval=0.5)
+    return bool(ready)
+
+def launch_app(udid=DEVICE_UDID, bundle_id=BUNDLE_ID, timeout=20.0):
+    """Launch AeroMaps and poll until it is ready for input"""
+    print("🚀 Launching AeroMaps...")
+    try:
+        # A relaunch just foregrounds a running app, so the screen may not change
+        before = None if app_running(udid, bundle_id) else screen_digest(udid)
+        started = time.monotonic()
+        result = subprocess.run(
+            ["xcrun", "simctl", "launch", udid, bundle_id],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            print(f"❌ Failed to launch app: {result.stderr}")
+            return False
+
+        if wait_for_app_ready(udid, bundle_id, before=before, timeout=timeout):
+            print(f"✅ AeroMaps launched and ready ({time.monotonic() - started:.2f}s)")
+        else:
+            print(f"⚠️  AeroMaps launched but did not settle within {timeout:.0f}s, continuing")
+        return True
+    except Exception as e:
+        print(f"❌ Error launching app: {e}")
+        return False
+
+def run_preflight(tools=("ffmpeg", "xcrun"), udid=DEVICE_UDID, bundle_id=BUNDLE_ID):
+    """Check tools and boot the simulator in parallel, then launch the app
+
+    Prints the time-to-ready breakdown and returns True when the app is
+    ready for the first demo action.
+    """
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        deps = pool.submit(check_dependencies, tools)
+        boot = pool.submit(setup_simulator, udid)
+        deps_ok, boot_ok = deps.result(), boot.result()
+    boot_done = time.monotonic()
+
+    if not deps_ok:
+        print("❌ Missing required dependencies. Please install them first.")
+        return False
+    if not boot_ok:
+        print("❌ Failed to set up simulator")
+        return False
+    if not launch_app(udid, bundle_id):
+        print("❌ Failed to launch app")
+        return False
+
+    ready = time.monotonic()
+    print(f"🏁 Ready in {ready - started:.2f}s "
+          f"(checks + boot {boot_done - started:.2f}s, launch {ready - boot_done:.2f}s)")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if run_preflight() else 1)
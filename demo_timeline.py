@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Demo Action Timeline
+Records when demo actions really fired and writes a timeline next to the video
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+TIMELINE_SUFFIX = ".timeline.json"
+
+def timeline_path_for(video_file):
+    """Return the timeline JSON path that sits next to a video file"""
+    base, _ = os.path.splitext(video_file)
+    return base + TIMELINE_SUFFIX
+
+def slugify(name):
+    """Turn a section name into a file-name friendly slug"""
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a list of numbers (pct in 0-100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+class ActionTimeline:
+    """Monotonic log of every action executed during a demo run
+
+    Timestamps are stored relative to ``origin`` (the monotonic time the
+    recording started), so ``start_s``/``end_s`` line up with video time.
+    Actions that return a bool are treated as input dispatches (tap, swipe,
+    text) and their wall time is the subprocess dispatch latency; actions
+    that return None are treated as waits.
+    """
+
+    def __init__(self, clock=time.monotonic, origin=None):
+        self.clock = clock
+        self.origin = origin
+        self.current_section = None
+        self.actions = []
+        self.sections = []
+
+    def start(self, origin=None):
+        """Mark the start of the recording (time zero of the video)"""
+        self.origin = self.clock() if origin is None else origin
+        return self.origin
+
+    def relative(self, timestamp):
+        """Convert a monotonic timestamp into seconds since the origin"""
+        if self.origin is None:
+            self.start(timestamp)
+        return timestamp - self.origin
+
+    def begin_section(self, name, planned=None):
+        """Start a named section; later actions are grouped under it"""
+        self.end_section()
+        self.current_section = name
+        self.sections.append({
+            "name": name,
+            "start_s": self.relative(self.clock()),
+            "end_s": None,
+            "planned_s": planned,
+        })
+
+    def end_section(self):
+        """Close the currently open section, if any"""
+        if self.sections and self.sections[-1]["end_s"] is None:
+            self.sections[-1]["end_s"] = self.relative(self.clock())
+        self.current_section = None
+
+    def run(self, description, action_func, planned=None):
+        """Execute an action, timing it, and return its result"""
+        start = self.clock()
+        error = None
+        try:
+            result = action_func()
+        except Exception as e:
+            result = False
+            error = str(e)
+        end = self.clock()
+
+        dispatched = isinstance(result, bool)
+        self.actions.append({
+            "index": len(self.actions),
+            "section": self.current_section,
+            "action": description,
+            "kind": "input" if dispatched else "wait",
+            "planned_s": planned,
+            "start_s": self.relative(start),
+            "end_s": self.relative(end),
+            "actual_s": end - start,
+            "dispatch_latency_s": (end - start) if dispatched else None,
+            "success": result if dispatched else True,
+            "error": error,
+        })
+        return result
+
+    def section_summaries(self):
+        """Planned versus actual duration for every section"""
+        summaries = []
+        for section in self.sections:
+            actions = [a for a in self.actions if a["section"] == section["name"]]
+            planned = section["planned_s"]
+            if planned is None:
+                planned = sum(a["planned_s"] or 0 for a in actions)
+            end = section["end_s"]
+            if end is None:
+                end = actions[-1]["end_s"] if actions else section["start_s"]
+            actual = end - section["start_s"]
+            summaries.append({
+                "name": section["name"],
+                "start_s": section["start_s"],
+                "end_s": end,
+                "planned_s": planned,
+                "actual_s": actual,
+                "drift_s": actual - planned,
+                "actions": len(actions),
+                "failures": sum(1 for a in actions if not a["success"]),
+            })
+        return summaries
+
+    def report(self):
+        """Summarize planned vs actual time and dispatch latency percentiles"""
+        latencies = [a["dispatch_latency_s"] for a in self.actions
+                     if a["dispatch_latency_s"] is not None]
+        planned = sum(a["planned_s"] or 0 for a in self.actions)
+        actual = (self.actions[-1]["end_s"] - self.actions[0]["start_s"]) if self.actions else 0.0
+        return {
+            "actions": len(self.actions),
+            "inputs": len(latencies),
+            "failures": sum(1 for a in self.actions if not a["success"]),
+            "planned_s": planned,
+            "actual_s": actual,
+            "drift_s": actual - planned,
+            "lead_in_s": self.actions[0]["start_s"] if self.actions else 0.0,
+            "dispatch_latency_s": {
+                "p50": percentile(latencies, 50),
+                "p90": percentile(latencies, 90),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "max": max(latencies) if latencies else None,
+                "mean": (sum(latencies) / len(latencies)) if latencies else None,
+            },
+            "sections": self.section_summaries(),
+        }
+
+    def to_dict(self, video=None):
+        """Serializable representation of the whole timeline"""
+        return {
+            "video": video,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "clock": "monotonic",
+            "origin": self.origin,
+            "actions": self.actions,
+            "report": self.report(),
+        }
+
+    def save(self, path, video=None):
+        """Write the timeline JSON to disk"""
+        self.end_section()
+        with open(path, "w") as f:
+            json.dump(self.to_dict(video), f, indent=2)
+        return path
+
+    def print_report(self):
+        """Print a human-readable planned vs actual report"""
+        report = self.report()
+        print("\n📊 Demo timeline report")
+        print(f"{'Section':<26}{'Planned':>9}{'Actual':>9}{'Drift':>9}  Fails")
+        for s in report["sections"]:
+            print(f"{s['name']:<26}{s['planned_s']:>8.1f}s{s['actual_s']:>8.1f}s"
+                  f"{s['drift_s']:>+8.1f}s  {s['failures']}")
+        print(f"{'Total':<26}{report['planned_s']:>8.1f}s{report['actual_s']:>8.1f}s"
+              f"{report['drift_s']:>+8.1f}s  {report['failures']}")
+        print(f"⏳ Lead-in before first action: {report['lead_in_s']:.2f}s")
+        lat = report["dispatch_latency_s"]
+        if lat["p50"] is not None:
+            print(f"⚡ Dispatch latency over {report['inputs']} inputs: "
+                  f"p50 {lat['p50'] * 1000:.0f}ms  p95 {lat['p95'] * 1000:.0f}ms  "
+                  f"p99 {lat['p99'] * 1000:.0f}ms  max {lat['max'] * 1000:.0f}ms")
+
+def load_timeline(path):
+    """Load a timeline JSON written by ActionTimeline.save"""
+    with open(path) as f:
+        return json.load(f)
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage: python3 demo_timeline.py <video.mov | video.timeline.json>")
+        sys.exit(1)
+
+    path = sys.argv[1]
+    if not path.endswith(TIMELINE_SUFFIX):
+        path = timeline_path_for(path)
+    if not os.path.exists(path):
+        print(f"❌ Timeline not found: {path}")
+        sys.exit(1)
+
+    data = load_timeline(path)
+    timeline = ActionTimeline(origin=data["origin"])
+    timeline.actions = data["actions"]
+    timeline.sections = [
+        {"name": s["name"], "start_s": s["start_s"], "end_s": s["end_s"], "planned_s": s["planned_s"]}
+        for s in data["report"]["sections"]
+    ]
+    print(f"🎬 {data.get('video') or path}")
+    timeline.print_report()
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Enhanced AeroMaps Demo Video Creator
 Creates a professional .mov video showcasing all app features
 """
 
+import argparse
 import subprocess
 import time
 import signal
@@ -12,69 +13,51 @@ import os
 import json
 from datetime import datetime
 
+from demo_capture import FakeInputDriver, RealClock, ScreenCapture, add_capture_args, backend_from_args
+from demo_checkpoint import CheckpointStore, assumed_state, mark_restore_failed, restore_state, section_failures
+from demo_preflight import check_dependencies, run_preflight
+from demo_timeline import ActionTimeline, slugify, timeline_path_for
+
+# App state each section leaves behind, used to resume from any section
+SECTION_EFFECTS = {
+    "Waypoint Creation": {"waypoints": 3},
+    "Bottom Sheet Features": {"sheet": "expanded"},
+    "Layer Controls": {"layers": "toggled"},
+    "Route Management": {"waypoints": 0},
+}
+
 class EnhancedVideoRecorder:
-    def __init__(self):
-        self.ffmpeg_process = None
+    def __init__(self, capture=None):
+        self.capture = capture or ScreenCapture(fps=60, quality="high")
         self.recording = False
         self.output_file = None
+        self.timeline = ActionTimeline()
         
     def start_recording(self, output_file="AeroMaps_Enhanced_Demo.mov"):
         """Start high-quality recording of the simulator screen"""
         self.output_file = output_file
-        print(f"🎬 Starting enhanced video recording to {output_file}...")
+        self.timeline = ActionTimeline()
+        print(f"🎬 Starting enhanced video recording to {output_file} ({self.capture.describe()})...")
         
-        try:
-            # Enhanced ffmpeg command for better quality
-            cmd = [
-                "ffmpeg",
-                "-f", "avfoundation",
-                "-i", "1:none",  # Screen capture device 1, no audio
-                "-framerate", "60",  # 60fps for smooth motion
-                "-video_size", "1920x1080",  # Full HD
-                "-c:v", "libx264",
-                "-preset", "slow",  # Better compression
-                "-crf", "18",  # High quality
-                "-profile:v", "high",
-                "-level", "4.1",
-                "-movflags", "+faststart",  # Optimize for streaming
-                "-y",  # Overwrite output file
-                output_file
-            ]
-            
-            print(f"Running command: {' '.join(cmd)}")
-            
-            self.ffmpeg_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            self.recording = True
-            print("✅ Enhanced recording started!")
-            
-        except Exception as e:
-            print(f"❌ Failed to start recording: {e}")
+        # Time zero of the video for the action timeline
+        self.timeline.start()
+        if not self.capture.start(output_file):
             return False
-            
+        self.recording = True
+        print("✅ Enhanced recording started!")
         return True
     
     def stop_recording(self):
         """Stop the recording gracefully"""
-        if self.ffmpeg_process and self.recording:
+        if self.recording:
             print("🛑 Stopping enhanced recording...")
-            self.ffmpeg_process.terminate()
-            try:
-                self.ffmpeg_process.wait(timeout=10)
-            except subprocess.TimeoutExpired:
-                self.ffmpeg_process.kill()
+            self.capture.stop()
             self.recording = False
             print("✅ Enhanced recording stopped!")
     
-    def run_enhanced_demo(self):
-        """Run the enhanced demo with better timing and interactions"""
-        print("🚀 Running enhanced demo...")
-        
-        # Enhanced demo sequence with better timing
-        demo_sequence = [
+    def demo_sequence(self):
+        """Enhanced demo sequence with better timing"""
+        return [
             # Opening sequence
             ("Opening", [
                 ("Wait for app to load", lambda: time.sleep(3), 3),
@@ -180,18 +163,65 @@ class EnhancedVideoRecorder:
             ]),
         ]
         
+    def section_names(self):
+        """Names of the demo sections, in order"""
+        return [name for name, _ in self.demo_sequence()]
+    
+    def run_enhanced_demo(self, sections=None, checkpoints=None, restore=True):
+        """Run the enhanced demo with better timing and interactions
+        
+        ``sections`` limits the run to those section names; when the first
+        one is not the opening section and ``restore`` is set, the app state
+        it assumes is rebuilt first. Outcomes are written to ``checkpoints``.
+        """
+        print("🚀 Running enhanced demo...")
+        
+        demo_sequence = self.demo_sequence()
+        order = [name for name, _ in demo_sequence]
+        if sections is not None:
+            demo_sequence = [(name, actions) for name, actions in demo_sequence if name in sections]
+        if restore and demo_sequence and demo_sequence[0][0] != order[0]:
+            first = demo_sequence[0][0]
+            assumes = assumed_state(order, SECTION_EFFECTS, first)
+            if not restore_state(self, assumes, self.timeline):
+                mark_restore_failed(checkpoints, first, assumes, video=self.output_file)
+                return False
+        
         total_duration = 0
         for section_name, actions in demo_sequence:
             print(f"\n📱 {section_name}")
+            self.timeline.begin_section(section_name)
             for action_desc, action_func, duration in actions:
                 print(f"  → {action_desc} ({duration}s)")
                 if callable(action_func):
-                    action_func()
+                    success = self.timeline.run(action_desc, action_func, duration)
+                    if success is False:
+                        print(f"    ⚠️  Action failed: {action_desc}")
                 total_duration += duration
+            self.timeline.end_section()
+            
+            failures = section_failures(self.timeline, section_name)
+            if checkpoints is not None:
+                status = "failed" if failures else "done"
+                checkpoints.mark(section_name, status, assumed_state(order, SECTION_EFFECTS, section_name),
+                                 video=self.output_file, failures=failures)
+            if failures:
+                print(f"\n❌ Section '{section_name}' failed; rerun with --resume to continue from it")
+                self.timeline.print_report()
+                return False
         
-        print(f"\n⏱️ Total demo duration: {total_duration} seconds")
+        print(f"\n⏱️ Planned demo duration: {total_duration} seconds")
+        self.timeline.print_report()
         return True
     
+    def save_timeline(self):
+        """Write the measured action timeline next to the video"""
+        if not self.output_file:
+            return None
+        path = self.timeline.save(timeline_path_for(self.output_file), video=self.output_file)
+        print(f"🧭 Action timeline saved to {path}")
+        return path
+    
     def simulate_tap(self, x, y):
         """Simulate a tap at coordinates x, y"""
         cmd = f"xcrun simctl send_input BA1B26D3-9DAF-4B80-BF5C-8D27294723C4 tap {x} {y}"
@@ -207,94 +237,60 @@ class EnhancedVideoRecorder:
         cmd = f"xcrun simctl send_input BA1B26D3-9DAF-4B80-BF5C-8D27294723C4 text '{text}'"
         return subprocess.run(cmd, shell=True, capture_output=True).returncode == 0
 
-def check_dependencies():
-    """Check if required tools are available"""
-    print("🔍 Checking dependencies...")
-    
-    # Check ffmpeg
-    try:
-        result = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True)
-        if result.returncode == 0:
-            print("✅ ffmpeg found")
-        else:
-            print("❌ ffmpeg not found")
-            return False
-    except FileNotFoundError:
-        print("❌ ffmpeg not found. Install with: brew install ffmpeg")
-        return False
-    
-    # Check xcrun
-    try:
-        result = subprocess.run(["xcrun", "--version"], capture_output=True, text=True)
-        if result.returncode == 0:
-            print("✅ xcrun found")
-        else:
-            print("❌ xcrun not found")
-            return False
-    except FileNotFoundError:
-        print("❌ xcrun not found. Install Xcode Command Line Tools")
-        return False
-    
-    return True
-
-def setup_simulator():
-    """Set up the iPhone simulator"""
-    print("📱 Setting up iPhone simulator...")
-    
-    try:
-        # Check if simulator is running
-        result = subprocess.run(
-            ["xcrun", "simctl", "list", "devices", "booted"],
-            capture_output=True,
-            text=True
-        )
-        
-        if "iPhone 16 Pro" not in result.stdout:
-            print("Starting iPhone 16 Pro simulator...")
-            subprocess.run(["xcrun", "simctl", "boot", "BA1B26D3-9DAF-4B80-BF5C-8D27294723C4"])
-            time.sleep(5)
-        else:
-            print("✅ iPhone 16 Pro simulator already running")
-        
-        return True
-    except Exception as e:
-        print(f"❌ Error setting up simulator: {e}")
-        return False
-
-def launch_app():
-    """Launch the AeroMaps app"""
-    print("🚀 Launching AeroMaps...")
-    
-    try:
-        # Launch the app
-        result = subprocess.run([
-            "xcrun", "simctl", "launch", 
-            "BA1B26D3-9DAF-4B80-BF5C-8D27294723C4", 
-            "com.example.AeroMaps"
-        ], capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            print("✅ AeroMaps launched successfully")
-            time.sleep(3)  # Wait for app to load
-            return True
-        else:
-            print(f"❌ Failed to launch app: {result.stderr}")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Error launching app: {e}")
-        return False
-
 def signal_handler(signum, frame):
     """Handle Ctrl+C gracefully"""
     print("\n🛑 Interrupted by user")
     if recorder:
         recorder.stop_recording()
+        recorder.save_timeline()
     sys.exit(0)
 
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Enhanced AeroMaps demo video creator")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from the first section that has not completed")
+    parser.add_argument("--from", dest="start_from", metavar="SECTION",
+                        help="start from a named section")
+    parser.add_argument("--segment", action="store_true",
+                        help="record each section that runs as its own video segment")
+    parser.add_argument("--headless", action="store_true",
+                        help="no simulator: fake inputs and a synthetic capture unless --capture is given")
+    add_capture_args(parser, default=None, fps=60, quality="high")
+    return parser.parse_args()
+
+def record_segments(sections, checkpoints, timestamp, restore=True):
+    """Record each section to its own file, restoring state before each take when ``restore`` is set"""
+    order = recorder.section_names()
+    videos = []
+    for i, name in enumerate(sections):
+        if restore and (i > 0 or name != order[0]):
+            assumes = assumed_state(order, SECTION_EFFECTS, name)
+            if not restore_state(recorder, assumes, recorder.timeline):
+                mark_restore_failed(checkpoints, name, assumes)
+                return False, videos
+        output_file = f"AeroMaps_Enhanced_Demo_{timestamp}_{slugify(name)}.mov"
+        if not recorder.start_recording(output_file):
+            print("❌ Failed to start recording")
+            return False, videos
+        demo_success = recorder.run_enhanced_demo(sections=[name], checkpoints=checkpoints, restore=False)
+        recorder.stop_recording()
+        recorder.save_timeline()
+        videos.append(output_file)
+        if not demo_success:
+            return False, videos
+    return True, videos
+
 def main():
     global recorder
-    recorder = EnhancedVideoRecorder()
+    args = parse_args()
+    capture = backend_from_args(args, args.capture or ("synthetic" if args.headless else "screen"))
+    recorder = EnhancedVideoRecorder(capture)
+    driver = None
+    if args.headless:
+        driver = FakeInputDriver(RealClock())
+        driver.attach(recorder)
+    checkpoints = CheckpointStore("AeroMaps_Enhanced_Demo")
     
     # Set up signal handler for Ctrl+C
     signal.signal(signal.SIGINT, signal_handler)
@@ -304,23 +300,37 @@ def main():
     print("This will create a professional .mov video showcasing all features")
     print("=" * 60)
     
-    # Check dependencies
-    if not check_dependencies():
-        print("❌ Missing required dependencies. Please install them first.")
+    try:
+        sections = checkpoints.plan(recorder.section_names(), resume=args.resume, start_from=args.start_from)
+    except ValueError as e:
+        print(f"❌ {e}")
         return
-    
-    # Set up simulator
-    if not setup_simulator():
-        print("❌ Failed to set up simulator")
+    if not sections:
+        print("✅ All sections already completed. Run without --resume for a fresh take.")
         return
+    if len(sections) < len(recorder.section_names()):
+        print(f"⏩ Resuming from '{sections[0]}' ({len(sections)} sections)")
     
-    # Launch app
-    if not launch_app():
-        print("❌ Failed to launch app")
+    # Check tools, boot the simulator and launch the app
+    if args.headless:
+        if capture.needs_simulator:
+            print(f"❌ --headless needs a capture source that runs without a simulator, not '{capture.name}'")
+            return
+        if not check_dependencies(capture.tools):
+            return
+    elif not run_preflight(tuple(dict.fromkeys(capture.tools + ("xcrun",)))):
         return
     
     # Generate output filename with timestamp
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    
+    if args.segment:
+        demo_success, videos = record_segments(sections, checkpoints, timestamp, restore=not args.headless)
+        print(f"\n📁 Segments: {', '.join(videos) if videos else 'none'}")
+        if not demo_success:
+            print("⚠️ Segment recording stopped at a failed section")
+        return
+    
     output_file = f"AeroMaps_Enhanced_Demo_{timestamp}.mov"
     
     # Start recording
@@ -334,16 +344,22 @@ def main():
     
     # Run the enhanced demo
     print("🎬 Starting enhanced demo sequence...")
-    demo_success = recorder.run_enhanced_demo()
+    demo_success = recorder.run_enhanced_demo(sections=sections, checkpoints=checkpoints,
+                                              restore=not args.headless)
     
     # Stop recording
     recorder.stop_recording()
+    recorder.save_timeline()
+    if driver:
+        print(f"🧪 Headless run: {len(driver.events)} fake inputs, {len(driver.issues)} choreography issue(s)")
+        for issue in driver.issues:
+            print(f"   ⚠️  {issue['type']}: {issue['message']}")
     
     if demo_success:
         print("\n🎉 Enhanced demo video created successfully!")
         print(f"📁 File: {output_file}")
         print("📏 Duration: ~4-5 minutes")
-        print("🎬 Quality: 1920x1080 @ 60fps")
+        print(f"🎬 Source: {capture.describe()} @ {capture.fps}fps")
         print("🎵 Ready for editing in iMovie or Final Cut Pro!")
         
         # Show file info
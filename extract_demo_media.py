@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Demo Media Extractor
+Pulls stills, GIFs and WebP loops for each named demo section straight from the recording
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from demo_timeline import load_timeline, slugify, timeline_path_for
+
+def section_windows(timeline, max_clip=6.0, settle=1.0):
+    """Return (name, clip_start, clip_end, still_time) for every timeline section"""
+    windows = []
+    for section in timeline["report"]["sections"]:
+        start, end = section["start_s"], section["end_s"]
+        if end is None or end <= start:
+            continue
+        inputs = [a for a in timeline["actions"]
+                  if a["section"] == section["name"] and a["kind"] == "input"]
+        # Still: once the last input of the section has had time to settle
+        still = inputs[-1]["end_s"] + settle if inputs else (start + end) / 2
+        still = min(max(still, start), end - 0.05)
+        # Clip: from the first input, capped at max_clip seconds
+        clip_start = max(start, inputs[0]["start_s"] - 0.25) if inputs else start
+        clip_end = min(end, clip_start + max_clip)
+        windows.append((section["name"], clip_start, clip_end, still))
+    return windows
+
+def extract_still(video_file, at, output_file, width):
+    """Grab a single frame, seeking on the input side"""
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-ss", f"{at:.3f}", "-i", video_file,
+        "-frames:v", "1", "-vf", f"scale={width}:-2:flags=lanczos",
+        "-y", output_file
+    ]
+    return subprocess.run(cmd).returncode == 0
+
+def extract_gif(video_file, start, end, output_file, width, fps):
+    """Palette-optimized GIF of a window, generated in a single decode"""
+    graph = (
+        f"fps={fps},scale={width}:-2:flags=lanczos,split[s0][s1];"
+        "[s0]palettegen=stats_mode=diff[p];"
+        "[s1][p]paletteuse=dither=bayer:bayer_scale=5:diff_mode=rectangle"
+    )
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", video_file,
+        "-filter_complex", graph, "-loop", "0",
+        "-y", output_file
+    ]
+    return subprocess.run(cmd).returncode == 0
+
+def extract_webp(video_file, start, end, output_file, width, fps):
+    """Animated WebP preview of a window"""
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", video_file,
+        "-vf", f"fps={fps},scale={width}:-2:flags=lanczos",
+        "-c:v", "libwebp", "-lossless", "0", "-q:v", "70",
+        "-compression_level", "4", "-loop", "0", "-an",
+        "-y", output_file
+    ]
+    return subprocess.run(cmd).returncode == 0
+
+def build_jobs(video_file, windows, output_dir, formats, width, fps):
+    """Expand section windows into independent extraction jobs"""
+    jobs = []
+    for name, clip_start, clip_end, still in windows:
+        slug = slugify(name)
+        if "png" in formats:
+            path = os.path.join(output_dir, f"{slug}.png")
+            jobs.append((name, path, extract_still, (video_file, still, path, width * 2)))
+        if "gif" in formats:
+            path = os.path.join(output_dir, f"{slug}.gif")
+            jobs.append((name, path, extract_gif, (video_file, clip_start, clip_end, path, width, fps)))
+        if "webp" in formats:
+            path = os.path.join(output_dir, f"{slug}.webp")
+            jobs.append((name, path, extract_webp, (video_file, clip_start, clip_end, path, width, fps)))
+    return jobs
+
+def run_jobs(jobs, workers):
+    """Run extraction jobs in parallel and report each as it finishes"""
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(func, *func_args): (name, path) for name, path, func, func_args in jobs}
+        for future in as_completed(futures):
+            name, path = futures[future]
+            ok = future.result()
+            results.append((name, path, ok))
+            print(f"  {'✅' if ok else '❌'} {name}: {path}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract stills and loops for each demo section")
+    parser.add_argument("video", help="recorded demo video")
+    parser.add_argument("--timeline", help="timeline JSON (default: <video>.timeline.json)")
+    parser.add_argument("-o", "--output-dir", help="output directory (default: <video>_media)")
+    parser.add_argument("--sections", help="comma-separated section names to extract (default: all)")
+    parser.add_argument("--formats", default="png,gif,webp", help="any of png,gif,webp")
+    parser.add_argument("--width", type=int, default=480, help="GIF/WebP width in pixels (stills are 2x)")
+    parser.add_argument("--fps", type=int, default=15, help="GIF/WebP frame rate")
+    parser.add_argument("--max-clip", type=float, default=6.0, help="longest loop in seconds")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="parallel ffmpeg jobs")
+    args = parser.parse_args()
+
+    timeline_file = args.timeline or timeline_path_for(args.video)
+    if not os.path.exists(timeline_file):
+        print(f"❌ Timeline not found: {timeline_file}")
+        sys.exit(1)
+
+    timeline = load_timeline(timeline_file)
+    windows = section_windows(timeline, max_clip=args.max_clip)
+    if args.sections:
+        wanted = {s.strip().lower() for s in args.sections.split(",")}
+        windows = [w for w in windows if w[0].lower() in wanted]
+    if not windows:
+        print("❌ No matching sections in the timeline")
+        sys.exit(1)
+
+    output_dir = args.output_dir or os.path.splitext(args.video)[0] + "_media"
+    os.makedirs(output_dir, exist_ok=True)
+    formats = {f.strip() for f in args.formats.split(",")}
+
+    print(f"🎞️ Extracting {len(windows)} sections from {args.video} into {output_dir}/")
+    for name, clip_start, clip_end, still in windows:
+        print(f"  • {name}: still @ {still:.2f}s, loop {clip_start:.2f}s → {clip_end:.2f}s")
+
+    jobs = build_jobs(args.video, windows, output_dir, formats, args.width, args.fps)
+    results = run_jobs(jobs, args.workers)
+    failed = [r for r in results if not r[2]]
+    if failed:
+        print(f"\n⚠️ {len(failed)} of {len(results)} extractions failed")
+        sys.exit(1)
+    print(f"\n✅ {len(results)} files written to {output_dir}/")
+
+if __name__ == "__main__":
+    main()
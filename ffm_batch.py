@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+AeroMaps FFM Batch Planner
+Plans NDJSON streams of FFMRequests across a process pool, for POST /v1/plan/batch
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import ffm_planner
+from ffm_planner import PlanError, build_plan
+from plan_cache import PlanCache
+
+MAX_LINE_BYTES = 1024 * 1024  # one FFMRequest, same limit as POST /v1/plan
+CHUNK_LINES = 64  # requests per pool task
+INFLIGHT_PER_PROCESS = 4  # pool tasks queued per process before input reading pauses
+
+CACHE = None  # per-process PlanCache, set by init_process
+
+def init_process(risk_store=None, terrain_index=None, cache_entries=0, airports=None):
+    """Pool initializer: load the same data as the server worker"""
+    global CACHE
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C reaches the whole group; the owner shuts us down
+    if risk_store:
+        ffm_planner.use_risk_store(risk_store)
+    if terrain_index:
+        ffm_planner.use_terrain_index(terrain_index)
+    if airports:
+        ffm_planner.use_airports(airports)
+    CACHE = PlanCache(cache_entries) if cache_entries > 0 else None
+
+def plan_line(line, number, tile_templates=None):
+    """(result line, planned ok) for one NDJSON request line
+
+    The result carries the request's ``id`` field, or its 0-based line
+    number when it has none, and either the FFMResponse or an error.
+    """
+    request_id = number
+    try:
+        request = json.loads(line)
+        if isinstance(request, dict):
+            request_id = request.get("id", number)
+        if CACHE is not None:
+            response = CACHE.plan(request, tile_templates)
+        else:
+            response = json.dumps(build_plan(request, tile_templates), separators=(",", ":")).encode()
+        return b'{"id":' + json.dumps(request_id).encode() + b',"response":' + response + b"}\n", True
+    except json.JSONDecodeError as e:
+        error = f"invalid JSON: {e.msg}"
+    except PlanError as e:
+        error = str(e)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return json.dumps({"id": request_id, "error": error}, separators=(",", ":")).encode() + b"\n", False
+
+def plan_chunk(lines, first, tile_templates=None):
+    """Pool task: (result bytes, error count) for consecutive request lines starting at ``first``"""
+    results = [plan_line(line, first + i, tile_templates) for i, line in enumerate(lines)]
+    return b"".join(line for line, _ in results), sum(not ok for _, ok in results)
+
+async def body_chunks(reader, headers):
+    """Request body pieces as they arrive, for Content-Length or chunked bodies"""
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while True:
+            size_line = await reader.readuntil(b"\r\n")
+            try:
+                size = int(size_line.split(b";", 1)[0], 16)
+            except ValueError:
+                raise ValueError("malformed chunk size") from None
+            if size == 0:
+                while await reader.readuntil(b"\r\n") != b"\r\n":
+                    pass  # trailers
+                return
+            yield await reader.readexactly(size)
+            await reader.readexactly(2)
+    remaining = int(headers.get("content-length", "0") or 0)
+    while remaining:
+        data = await reader.read(min(remaining, 64 * 1024))
+        if not data:
+            raise asyncio.IncompleteReadError(b"", remaining)
+        remaining -= len(data)
+        yield data
+
+async def body_lines(reader, headers):
+    """Non-blank NDJSON lines of a streamed request body"""
+    pending = b""
+    async for data in body_chunks(reader, headers):
+        pending += data
+        *lines, pending = pending.split(b"\n")
+        if len(pending) > MAX_LINE_BYTES:
+            raise ValueError(f"request line over {MAX_LINE_BYTES} bytes")
+        for line in lines:
+            if line.strip():
+                yield line
+    if pending.strip():
+        yield pending
+
+def chunk_frame(data):
+    """One HTTP/1.1 chunked transfer-encoding frame"""
+    return f"{len(data):x}\r\n".encode() + data + b"\r\n"
+
+class BatchPlanner:
+    """Process pool shared by every batch request on one server worker
+
+    The pool is created on the first batch with the spawn start method, so
+    no event loop or executor threads are forked into it. At most
+    ``processes * INFLIGHT_PER_PROCESS`` chunks are queued at a time; input
+    is not read further until one completes, which keeps memory bounded by
+    the window rather than the batch.
+    """
+
+    def __init__(self, processes=None, risk_store=None, terrain_index=None, cache_entries=0, airports=None):
+        self.processes = processes or os.cpu_count() or 1
+        self.initargs = (risk_store, terrain_index, cache_entries, airports)
+        self.pool = None
+        self.batches = 0
+        self.planned = 0
+        self.failed = 0
+
+    def executor(self):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=init_process, initargs=self.initargs)
+        return self.pool
+
+    async def stream(self, lines, write, tile_templates=None):
+        """Plan every line from an async iterator, calling ``await write(bytes)`` in completion order"""
+        loop = asyncio.get_running_loop()
+        pool = self.executor()
+        window = self.processes * INFLIGHT_PER_PROCESS
+        inflight = set()
+        chunk, first, count = [], 0, 0
+        self.batches += 1
+
+        async def flush(block_until):
+            nonlocal inflight
+            while len(inflight) > block_until:
+                done, inflight = await asyncio.wait(inflight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    data, errors = task.result()
+                    self.failed += errors
+                    await write(data)
+
+        try:
+            async for line in lines:
+                chunk.append(line)
+                count += 1
+                if len(chunk) == CHUNK_LINES:
+                    inflight.add(loop.run_in_executor(pool, plan_chunk, chunk, first, tile_templates))
+                    first, chunk = count, []
+                    await flush(window - 1)
+        except (ValueError, asyncio.LimitOverrunError):
+            # Bad input part way through: still deliver everything read before it
+            if chunk:
+                inflight.add(loop.run_in_executor(pool, plan_chunk, chunk, first, tile_templates))
+            await flush(0)
+            self.planned += count
+            raise
+        if chunk:
+            inflight.add(loop.run_in_executor(pool, plan_chunk, chunk, first, tile_templates))
+        await flush(0)
+        self.planned += count
+        return count
+
+    def stats(self):
+        return {"processes": self.processes, "started": self.pool is not None, "batches": self.batches,
+                "planned": self.planned, "failed": self.failed}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan an NDJSON file of FFMRequests locally, or write one")
+    parser.add_argument("requests", help="NDJSON file, one FFMRequest per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON results ('-' for stdout)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="pool size")
+    parser.add_argument("--risk-store", help="gridded risk store directory")
+    parser.add_argument("--terrain-index", help="terrain pyramid directory")
+    parser.add_argument("--airports", help="airport dataset for alternates (see airport_index.py)")
+    parser.add_argument("--generate", type=int, metavar="N",
+                        help="write N random FFMRequests to REQUESTS instead of planning it")
+    args = parser.parse_args()
+
+    if args.generate:
+        from route_engine import random_routes
+        with open(args.requests, "w") as f:
+            batch = random_routes(args.generate)
+            for i in range(len(batch)):
+                route = batch.route(i)
+                request = {"id": f"r{i}", "aircraft": {"type": "C172", "trueAirspeedKTAS": 120, "fuelBurnGPH": 8.5},
+                           "route": [{"lat": round(lat, 5), "lon": round(lon, 5)} for lat, lon in route],
+                           "policy": {"reserveMinutes": 45, "enforceMEF": True}}
+                f.write(json.dumps(request) + "\n")
+        print(f"✅ Wrote {args.generate} requests to {args.requests}")
+        return
+
+    source = sys.stdin.buffer if args.requests == "-" else open(args.requests, "rb")
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    planner = BatchPlanner(args.processes, args.risk_store, args.terrain_index, airports=args.airports)
+
+    async def lines():
+        for line in source:
+            if line.strip():
+                yield line
+
+    async def write(data):
+        output.write(data)
+
+    started = time.perf_counter()
+    count = asyncio.run(planner.stream(lines(), write))
+    output.flush()
+    planner.close()
+    elapsed = time.perf_counter() - started
+    print(f"✅ Planned {count} requests ({planner.failed} failed) in {elapsed:.1f}s "
+          f"({count / elapsed:.0f}/s on {planner.processes} processes)", file=sys.stderr)
+
+if __name__ == "__main__":
+    sys.exit(main())
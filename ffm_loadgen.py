@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+AeroMaps FFM Load Generator
+Drives POST /v1/plan at a fixed arrival rate or concurrency and reports latency percentiles
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import random
+import socket
+import sys
+import time
+from urllib.parse import urlsplit
+
+from ffm_planner import AIRPORTS, DEFAULT_BOUNDS
+
+MOCK_RESPONSE_FILE = "ffm_mock_response.json"
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+class LatencyHistogram:
+    """Log-linear histogram of latencies in microseconds
+
+    Same layout as HdrHistogram with two significant digits: values below
+    128 µs are exact and every power of two above is split into 64 buckets,
+    so any reported value is within 1.6% of the true one.
+    """
+
+    SUB_BUCKETS = 64
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.max = 0
+        self.sum = 0
+
+    @classmethod
+    def index_of(cls, value):
+        value = max(int(value), 0)
+        if value < 2 * cls.SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - 7
+        return 2 * cls.SUB_BUCKETS + (shift - 1) * cls.SUB_BUCKETS + (value >> shift) - cls.SUB_BUCKETS
+
+    @classmethod
+    def value_of(cls, index):
+        """Highest value that lands in a bucket"""
+        if index < 2 * cls.SUB_BUCKETS:
+            return index
+        shift, sub = divmod(index - 2 * cls.SUB_BUCKETS, cls.SUB_BUCKETS)
+        shift += 1
+        return ((sub + cls.SUB_BUCKETS + 1) << shift) - 1
+
+    def record(self, value_us, count=1):
+        index = self.index_of(value_us)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        self.sum += value_us * count
+        self.max = max(self.max, value_us)
+
+    def record_corrected(self, value_us, expected_interval_us, count=1):
+        """Record a value plus the samples a stalled closed-loop client never sent
+
+        A request that took N expected intervals hid N - 1 requests that
+        would have queued behind it; they are recorded with the latencies
+        they would have seen (as HdrHistogram's recordValueWithExpectedInterval).
+        """
+        self.record(value_us, count)
+        if expected_interval_us <= 0:
+            return
+        missing = value_us - expected_interval_us
+        while missing >= expected_interval_us:
+            self.record(missing, count)
+            missing -= expected_interval_us
+
+    def corrected(self, expected_interval_us):
+        copy = LatencyHistogram()
+        for index, count in self.counts.items():
+            copy.record_corrected(min(self.value_of(index), self.max), expected_interval_us, count)
+        return copy
+
+    def percentile(self, p):
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(p / 100 * self.total))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self.value_of(index), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.sum / self.total if self.total else 0
+
+    def distribution(self):
+        """(value µs, percentile, cumulative count) rows, as in an .hgrm percentile distribution"""
+        rows, seen = [], 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            rows.append((min(self.value_of(index), self.max), seen / self.total, seen))
+        return rows
+
+    def write_hgrm(self, path):
+        with open(path, "w") as f:
+            f.write(f"{'Value(ms)':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}\n\n")
+            for value, fraction, seen in self.distribution():
+                inverse = 1 / (1 - fraction) if fraction < 1 else float("inf")
+                f.write(f"{value / 1000:12.3f} {fraction:14.12f} {seen:10d} {inverse:14.2f}\n")
+            f.write(f"#[Mean    = {self.mean / 1000:12.3f}, Max = {self.max / 1000:12.3f}]\n")
+            f.write(f"#[Total count    = {self.total:12d}]\n")
+
+def random_request(rng):
+    """An FFMRequest like the app sends: airport to airport, maybe via a few map taps"""
+    south, north, west, east = DEFAULT_BOUNDS
+    origin, destination = rng.sample(sorted(AIRPORTS), 2)
+    route = [AIRPORTS[origin][:2]]
+    for _ in range(rng.choice((0, 0, 1, 2, 3))):
+        route.append((rng.uniform(south + 1, north - 1), rng.uniform(west + 1, east - 1)))
+    route.append(AIRPORTS[destination][:2])
+    return {
+        "aircraft": {"type": "C172", "trueAirspeedKTAS": rng.choice((110, 120, 125, 140)),
+                     "fuelBurnGPH": rng.choice((7.5, 8.5, 9.0, 10.5))},
+        "route": [{"lat": round(lat, 5), "lon": round(lon, 5)} for lat, lon in route],
+        "policy": {"reserveMinutes": rng.choice((30, 45, 60)), "enforceMEF": rng.random() < 0.5},
+    }
+
+def load_corpus(path):
+    """Encoded request bodies from an NDJSON file or a JSON array"""
+    with open(path) as f:
+        text = f.read()
+    requests = json.loads(text) if text.lstrip().startswith("[") else [json.loads(line)
+                                                                        for line in text.splitlines() if line.strip()]
+    return [json.dumps(request, separators=(",", ":")).encode() for request in requests]
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection that posts JSON bodies"""
+
+    def __init__(self, host, port, path):
+        self.host, self.port, self.path = host, port, path
+        self.reader = self.writer = None
+
+    async def post(self, body):
+        """Status code of one POST; reconnects when the previous request closed the socket"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(f"POST {self.path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        head = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1").lower()
+        status = int(head.split(" ", 2)[1])
+        length, close = 0, False
+        for line in head.split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            if name == "content-length":
+                length = int(value)
+            elif name == "connection" and "close" in value:
+                close = True
+        await self.reader.readexactly(length)
+        if close:
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+class LoadRun:
+    """Counters and histograms for one run
+
+    ``latency`` is measured from when a request should have been sent (the
+    arrival schedule in rate mode), ``service`` from when it actually went
+    out. In concurrency mode there is no schedule, so ``latency`` is derived
+    from ``service`` after the run by coordinated-omission correction.
+    """
+
+    def __init__(self, url, corpus, timeout):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.path = parts.path or "/v1/plan"
+        self.corpus = corpus
+        self.timeout = timeout
+        self.latency = LatencyHistogram()
+        self.service = LatencyHistogram()
+        self.sent = self.ok = 0
+        self.errors = {}
+        self.elapsed = 0.0
+
+    async def one(self, connection, body, intended, record):
+        """Send one request; only requests after the warmup (``record``) are counted"""
+        sent = time.perf_counter()
+        try:
+            status = await asyncio.wait_for(connection.post(body), self.timeout)
+            error = None if 200 <= status < 300 else f"HTTP {status}"
+        except asyncio.TimeoutError:
+            connection.close()
+            error = "timeout"
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+            connection.close()
+            error = type(e).__name__
+        done = time.perf_counter()
+        if not record:
+            return
+        self.sent += 1
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+            return
+        self.ok += 1
+        self.service.record((done - sent) * 1e6)
+        self.latency.record((done - intended) * 1e6)
+
+    async def fixed_rate(self, rate, duration, connections, warmup=0.0):
+        """Open loop: requests are due every 1/rate s whether or not earlier ones have finished"""
+        idle = asyncio.Queue()
+        for _ in range(connections):
+            idle.put_nowait(Connection(self.host, self.port, self.path))
+
+        async def send(i, intended):
+            connection = await idle.get()  # time spent waiting here counts in latency
+            try:
+                await self.one(connection, self.corpus[i % len(self.corpus)], intended, intended >= measured_from)
+            finally:
+                idle.put_nowait(connection)
+
+        start = time.perf_counter() + 0.05
+        measured_from = start + warmup
+        tasks = set()
+        for i in range(int((warmup + duration) * rate)):
+            intended = start + i / rate
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(send(i, intended))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+        self.elapsed = time.perf_counter() - measured_from
+        await self.close(idle)
+
+    async def fixed_concurrency(self, concurrency, duration, warmup=0.0):
+        """Closed loop: each of ``concurrency`` connections sends its next request when the last returns"""
+        start = time.perf_counter()
+        measured_from, deadline = start + warmup, start + warmup + duration
+        connections = [Connection(self.host, self.port, self.path) for _ in range(concurrency)]
+
+        async def worker(w, connection):
+            i = w
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    return
+                await self.one(connection, self.corpus[i % len(self.corpus)], now, now >= measured_from)
+                i += concurrency
+
+        await asyncio.gather(*(worker(w, c) for w, c in enumerate(connections)))
+        self.elapsed = time.perf_counter() - measured_from
+        # Each connection should have sent every mean service time; fill in what stalls held back
+        self.latency = self.service.corrected(self.service.mean)
+        for connection in connections:
+            connection.close()
+
+    @staticmethod
+    async def close(idle):
+        while not idle.empty():
+            idle.get_nowait().close()
+
+    def report(self):
+        total_errors = sum(self.errors.values())
+        measured = self.service.total
+        return {
+            "requests": self.sent, "ok": self.ok, "errors": self.errors,
+            "error_rate": round(total_errors / self.sent, 6) if self.sent else 0,
+            "throughput_rps": round(measured / self.elapsed, 1) if self.elapsed > 0 else 0,
+            "latency_ms": {f"p{p:g}": round(self.latency.percentile(p) / 1000, 3) for p in PERCENTILES}
+            | {"mean": round(self.latency.mean / 1000, 3), "max": round(self.latency.max / 1000, 3)},
+            "service_ms": {f"p{p:g}": round(self.service.percentile(p) / 1000, 3) for p in PERCENTILES}
+            | {"mean": round(self.service.mean / 1000, 3), "max": round(self.service.max / 1000, 3)},
+        }
+
+def print_report(report, description):
+    print(f"🎯 {description}")
+    errors = ", ".join(f"{kind} {count}" for kind, count in report["errors"].items()) or "none"
+    print(f"   {report['requests']:,} requests, {report['ok']:,} ok, "
+          f"errors {report['error_rate'] * 100:.2f}% ({errors}), {report['throughput_rps']:,.1f} req/s")
+    print(f"   {'ms':<22}" + "".join(f"{name:>9}" for name in report["latency_ms"]))
+    for label, key in (("latency (corrected)", "latency_ms"), ("service time", "service_ms")):
+        print(f"   {label:<22}" + "".join(f"{value:9.3f}" for value in report[key].values()))
+
+# Stand-in server: FFMClient's mock response over the real wire protocol
+
+async def serve_mock(host, port, body, delay_ms, stall_every, stall_ms):
+    from ffm_server import json_response, read_request
+    served = 0
+
+    async def connection(reader, writer):
+        nonlocal served
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                if delay_ms:
+                    await asyncio.sleep(delay_ms / 1000)
+                served += 1
+                if stall_every and served % stall_every == 0:
+                    time.sleep(stall_ms / 1000)  # blocks every connection, like a GC pause
+                keep_alive = request[2].get("connection", "").lower() != "close"
+                writer.write(json_response(200, body, keep_alive))
+                if not keep_alive:
+                    break
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(connection, host, port)
+    async with server:
+        await server.serve_forever()
+
+def run_mock(host, port, delay_ms=0.0, stall_every=0, stall_ms=0.0):
+    with open(MOCK_RESPONSE_FILE) as f:
+        body = json.dumps(json.load(f), separators=(",", ":")).encode()
+    try:
+        asyncio.run(serve_mock(host, port, body, delay_ms, stall_every, stall_ms))
+    except KeyboardInterrupt:
+        pass
+
+def start_mock(delay_ms, stall_every, stall_ms):
+    """Run the stand-in server in a child process on a free port; returns (process, url)"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    process = multiprocessing.Process(target=run_mock, args=("127.0.0.1", port, delay_ms, stall_every, stall_ms),
+                                      daemon=True)
+    process.start()
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return process, f"http://127.0.0.1:{port}/v1/plan"
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test an FFM /v1/plan backend")
+    parser.add_argument("url", nargs="?", default="http://127.0.0.1:8080/v1/plan", help="target endpoint")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--rate", type=float, help="fixed arrival rate in requests/s (open loop)")
+    mode.add_argument("--concurrency", type=int, help="fixed number of in-flight requests (closed loop)")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=1.0, help="unmeasured seconds before the run")
+    parser.add_argument("--connections", type=int, default=64, help="connection pool size in rate mode")
+    parser.add_argument("--timeout", type=float, default=5.0, help="per-request timeout in seconds")
+    parser.add_argument("--corpus", help="replay FFMRequests from an NDJSON file or JSON array")
+    parser.add_argument("--requests", type=int, default=1000, help="random requests to generate without --corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-corpus", help="write the generated requests as NDJSON and exit")
+    parser.add_argument("--mock", action="store_true", help=f"start a stand-in server from {MOCK_RESPONSE_FILE}")
+    parser.add_argument("--mock-delay", type=float, default=0.0, help="stand-in service time in ms")
+    parser.add_argument("--mock-stall-every", type=int, default=0, help="stall the stand-in every N responses")
+    parser.add_argument("--mock-stall", type=float, default=200.0, help="stand-in stall length in ms")
+    parser.add_argument("--serve-mock", type=int, metavar="PORT", help="only run the stand-in server on PORT")
+    parser.add_argument("--json", help="write the report as JSON")
+    parser.add_argument("--hgrm", help="write the corrected latency distribution")
+    args = parser.parse_args()
+
+    if args.serve_mock:
+        print(f"🧪 Stand-in FFM server on http://127.0.0.1:{args.serve_mock}/v1/plan")
+        run_mock("127.0.0.1", args.serve_mock, args.mock_delay, args.mock_stall_every, args.mock_stall)
+        return
+
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+    else:
+        rng = random.Random(args.seed)
+        requests = [random_request(rng) for _ in range(args.requests)]
+        if args.save_corpus:
+            with open(args.save_corpus, "w") as f:
+                f.writelines(json.dumps(request) + "\n" for request in requests)
+            print(f"✅ Wrote {len(requests)} requests to {args.save_corpus}")
+            return
+        corpus = [json.dumps(request, separators=(",", ":")).encode() for request in requests]
+
+    mock = None
+    url = args.url
+    if args.mock:
+        mock, url = start_mock(args.mock_delay, args.mock_stall_every, args.mock_stall)
+
+    run = LoadRun(url, corpus, args.timeout)
+    if args.concurrency:
+        description = f"{url}, {args.concurrency} concurrent for {args.duration:g}s"
+        asyncio.run(run.fixed_concurrency(args.concurrency, args.duration, args.warmup))
+    else:
+        rate = args.rate or 100.0
+        description = f"{url}, {rate:g} req/s for {args.duration:g}s over {args.connections} connections"
+        asyncio.run(run.fixed_rate(rate, args.duration, args.connections, args.warmup))
+    if mock is not None:
+        mock.terminate()
+
+    report = run.report()
+    print_report(report, description)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.hgrm:
+        run.latency.write_hgrm(args.hgrm)
+    if run.sent and not run.ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
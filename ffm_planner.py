@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+AeroMaps FFM Planner
+Computes FFMResponse plans (polyline, leg risks, alternates, advisory) from FFMRequest bodies
+"""
+
+import json
+import math
+import sys
+
+import numpy as np
+
+from route_engine import RouteBatch, leg_samples
+
+EARTH_RADIUS_NM = 3440.065  # same radius as RoutePlan.haversineNM
+
+# Safety envelope, mirrored from MapState.computeFFMPlan and the README
+KTAS_RANGE = (80.0, 220.0)
+FUEL_BURN_RANGE = (6.0, 18.0)
+MIN_RESERVE_MINUTES = 45
+MAX_WAYPOINTS = 100
+MAX_RESERVE_MINUTES = 24 * 60
+MAX_POLYLINE_POINTS = 2000
+
+DENSIFY_SPACING_NM = 10.0
+RISK_SAMPLE_NM = 5.0
+CRUISE_ALTITUDE_FT = 8000  # RoutePlan default; FFMRequest does not carry an altitude
+MEF_CORRIDOR_NM = 4.0  # terrain within 4 nm of the course, as in 14 CFR 91.177
+MOUNTAINOUS_FT = 5000  # legs with terrain this high need the larger clearance
+TERRAIN_CLEARANCE_FT = (1000, 2000)  # normal, mountainous
+ALTERNATE_RADIUS_NM = 100.0  # upper bound on the reserve-fuel range searched for alternates
+ON_ROUTE_NM = 2.0  # airports this close to a waypoint are part of the route, not alternates
+MAX_ALTERNATES = 3
+MODERATE, SEVERE = 0.3, 0.6
+
+# ICAO -> (lat, lon, elevation ft), the airports in MapState.airports (airports.json);
+# replaced by a larger dataset with use_airports
+AIRPORTS = {
+    "KSFO": (37.6213, -122.3790, 13),
+    "KSJC": (37.3639, -121.9289, 62),
+    "KRNO": (39.4986, -119.7681, 4415),
+    "KSQL": (37.5119, -122.2495, 5),
+    "KOAK": (37.7214, -122.2208, 9),
+}
+
+RISK_TILE_TEMPLATES = [
+    "https://tile.openweathermap.org/map/precipitation_new/{z}/{x}/{y}.png?appid=demo",
+]
+
+RISK_STORE = None  # gridded RiskStore used for leg risks when set, see use_risk_store
+TERRAIN_INDEX = None  # TerrainIndex used for MEF when set, see use_terrain_index
+AIRPORT_INDEX = None  # AirportIndex over AIRPORTS, built on first use
+
+class PlanError(ValueError):
+    """An FFMRequest that cannot be planned; the message is safe to return to clients"""
+
+def clamp(value, bounds):
+    return max(bounds[0], min(bounds[1], value))
+
+def haversine_nm(lat1, lon1, lat2, lon2):
+    """Great-circle distance in nautical miles, as in RoutePlan.haversineNM"""
+    la1, la2 = math.radians(lat1), math.radians(lat2)
+    dlat = la2 - la1
+    dlon = math.radians(lon2 - lon1)
+    h = math.sin(dlat / 2) ** 2 + math.cos(la1) * math.cos(la2) * math.sin(dlon / 2) ** 2
+    return EARTH_RADIUS_NM * 2 * math.atan2(math.sqrt(h), math.sqrt(1 - h))
+
+def to_vector(lat, lon):
+    la, lo = math.radians(lat), math.radians(lon)
+    return math.cos(la) * math.cos(lo), math.cos(la) * math.sin(lo), math.sin(la)
+
+def from_vector(x, y, z):
+    return math.degrees(math.atan2(z, math.hypot(x, y))), math.degrees(math.atan2(y, x))
+
+def great_circle_points(a, b, spacing_nm):
+    """Points from a towards b (b excluded) no more than spacing_nm apart"""
+    distance = haversine_nm(a[0], a[1], b[0], b[1])
+    steps = max(1, math.ceil(distance / spacing_nm))
+    if distance == 0:
+        return [a]
+    va, vb = to_vector(*a), to_vector(*b)
+    omega = distance / EARTH_RADIUS_NM
+    sin_omega = math.sin(omega)
+    points = []
+    for i in range(steps):
+        t = i / steps
+        wa, wb = math.sin((1 - t) * omega) / sin_omega, math.sin(t * omega) / sin_omega
+        points.append(from_vector(*(wa * p + wb * q for p, q in zip(va, vb))))
+    return points
+
+# Synthetic terrain and hazard fields for Northern California. They are smooth,
+# deterministic stand-ins for real gridded products, so the same request always
+# gets the same answer. All of them take scalars or NumPy arrays.
+
+DEFAULT_BOUNDS = (35.0, 42.0, -125.0, -117.0)  # south, north, west, east of the synthetic fields
+
+def sierra_crest_lon(lat):
+    return -120.3 + 0.6 * (39.5 - lat)
+
+def terrain_elevation_ft(lat, lon):
+    """Approximate terrain height: Coast Ranges, Diablo Range and the Sierra Nevada"""
+    coast = 2500 * np.exp(-((lon - (-122.1 + 0.35 * (lat - 37.4))) / 0.12) ** 2)
+    diablo = 3000 * np.exp(-((lon - (-121.7 + 0.3 * (lat - 37.5))) / 0.15) ** 2)
+    crest_height = 7000 + 3000 * np.clip((39.5 - lat) / 2.5, 0.0, 1.0)
+    sierra = crest_height * np.exp(-((lon - sierra_crest_lon(lat)) / 0.45) ** 2)
+    return np.maximum(np.maximum(coast, diablo), sierra)
+
+def hazard_risks(lat, lon):
+    """(icing, turbulence, terrain) surface risk in 0..1 and the terrain elevation"""
+    elevation = terrain_elevation_ft(lat, lon)
+    relief = elevation / 10000
+    icing = 0.1 + 0.45 * relief + 0.08 * np.clip(lat - 37.0, 0.0, 3.0)
+    lee = np.exp(-((lon - (sierra_crest_lon(lat) + 0.5)) / 0.5) ** 2)
+    turbulence = 0.1 + 0.55 * lee + 0.25 * relief
+    terrain = elevation / 12000
+    return np.clip(icing, 0.0, 1.0), np.clip(turbulence, 0.0, 1.0), np.clip(terrain, 0.0, 1.0), elevation
+
+def use_risk_store(path):
+    """Take leg risks from a gridded store on disk (see risk_store.py) instead of the synthetic fields"""
+    global RISK_STORE
+    from risk_store import RiskStore
+    RISK_STORE = RiskStore(path)
+    return RISK_STORE
+
+def parse_request(body):
+    """Validate an FFMRequest dict and apply the safety envelope
+
+    Returns (route, ktas, fuel_burn, reserve_minutes, enforce_mef, optimize,
+    altitude_sweep), where optimize is the optional route objective ("time" or
+    "fuel") or None and altitude_sweep asks for the cruise-altitude bands.
+    """
+    if not isinstance(body, dict):
+        raise PlanError("request body must be a JSON object")
+    try:
+        aircraft, policy = body["aircraft"], body["policy"]
+        route = [(float(w["lat"]), float(w["lon"])) for w in body["route"]]
+        ktas = float(aircraft["trueAirspeedKTAS"])
+        fuel_burn = float(aircraft["fuelBurnGPH"])
+        reserve = int(policy["reserveMinutes"])
+        enforce_mef = policy["enforceMEF"]
+        optimize = policy.get("optimize")
+        altitude_sweep = policy.get("altitudeSweep", False)
+    except KeyError as e:
+        raise PlanError(f"missing field {e.args[0]!r}") from None
+    except (TypeError, ValueError, OverflowError):
+        raise PlanError("aircraft, route and policy fields must be numbers") from None
+
+    if not 2 <= len(route) <= MAX_WAYPOINTS:
+        raise PlanError(f"route needs between 2 and {MAX_WAYPOINTS} waypoints")
+    for lat, lon in route:
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise PlanError(f"waypoint ({lat}, {lon}) is out of range")
+    if not (math.isfinite(ktas) and math.isfinite(fuel_burn)):
+        raise PlanError("airspeed and fuel burn must be finite")
+    if reserve > MAX_RESERVE_MINUTES:
+        raise PlanError(f"reserveMinutes must be at most {MAX_RESERVE_MINUTES}")
+    # bool("false") is True, so only real JSON booleans are accepted
+    if not isinstance(enforce_mef, bool) or not isinstance(altitude_sweep, bool):
+        raise PlanError("enforceMEF and altitudeSweep must be true or false")
+    if optimize not in (None, "time", "fuel"):
+        raise PlanError("optimize must be \"time\" or \"fuel\"")
+    return (route, clamp(ktas, KTAS_RANGE), clamp(fuel_burn, FUEL_BURN_RANGE),
+            max(MIN_RESERVE_MINUTES, reserve), enforce_mef, optimize, altitude_sweep)
+
+def densify(route, spacing_nm=DENSIFY_SPACING_NM):
+    """Great-circle polyline through the route plus the polyline index of each waypoint"""
+    total = sum(haversine_nm(*a, *b) for a, b in zip(route, route[1:]))
+    spacing = max(spacing_nm, total / MAX_POLYLINE_POINTS)
+    polyline, waypoint_index = [], []
+    for a, b in zip(route, route[1:]):
+        waypoint_index.append(len(polyline))
+        polyline.extend(great_circle_points(a, b, spacing))
+    waypoint_index.append(len(polyline))
+    polyline.append(route[-1])
+    return polyline, waypoint_index
+
+def use_terrain_index(path):
+    """Enforce MEF from a terrain pyramid on disk (see terrain_index.py)"""
+    global TERRAIN_INDEX
+    from terrain_index import TerrainIndex
+    TERRAIN_INDEX = TerrainIndex(path)
+    return TERRAIN_INDEX
+
+def minimum_safe_altitudes(peaks_ft):
+    """Per-leg minimum safe altitude: highest terrain plus clearance, rounded up to 100 ft"""
+    peaks_ft = np.asarray(peaks_ft, dtype=np.float64)
+    clearance = np.where(peaks_ft >= MOUNTAINOUS_FT, *TERRAIN_CLEARANCE_FT[::-1])
+    return (np.ceil((peaks_ft + clearance) / 100) * 100).astype(int)
+
+def leg_risks(route, store=None, paths=None):
+    """Worst icing, turbulence and terrain risk sampled along each leg
+
+    Returns (legs, peaks_ft): the LegRisk dicts and the highest sampled
+    terrain on each leg. With a store the risks are sampled at cruise altitude for
+    the current time; otherwise the synthetic surface fields are used.
+    ``paths`` gives the points flown on each leg when they are not the great circle.
+    """
+    if paths is None:
+        lat, lon, starts = leg_samples(RouteBatch.from_routes([route]), RISK_SAMPLE_NM)
+    else:
+        # Samples of each path are contiguous, so a leg starts where its path's first segment does
+        batch = RouteBatch.from_routes(paths)
+        lat, lon, segment_starts = leg_samples(batch, RISK_SAMPLE_NM)
+        starts = segment_starts[np.concatenate([[0], np.cumsum(batch.lengths - 1)])]
+    icing, turbulence, terrain, elevation = hazard_risks(lat, lon)
+    if store is not None:
+        icing, turbulence, terrain = store.sample(lat, lon, CRUISE_ALTITUDE_FT).T
+    scores = np.maximum.reduceat(np.stack([icing, turbulence, terrain], axis=1), starts[:-1], axis=0)
+    legs = [{"fromIndex": i, "toIndex": i + 1, "icing": round(float(row[0]), 2),
+             "turbulence": round(float(row[1]), 2), "terrain": round(float(row[2]), 2)}
+            for i, row in enumerate(scores)]
+    return legs, np.maximum.reduceat(elevation, starts[:-1])
+
+def airport_index():
+    global AIRPORT_INDEX
+    if AIRPORT_INDEX is None:
+        from airport_index import AirportIndex
+        AIRPORT_INDEX = AirportIndex({"icao": icao, "lat": lat, "lon": lon, "elevation": elevation}
+                                     for icao, (lat, lon, elevation) in AIRPORTS.items())
+    return AIRPORT_INDEX
+
+def use_airports(path):
+    """Pick alternates from an airport dataset (see airport_index.py) instead of the demo airports"""
+    global AIRPORTS, AIRPORT_INDEX
+    from airport_index import AirportIndex
+    AIRPORT_INDEX = AirportIndex.from_file(path)
+    AIRPORTS = {a["icao"]: (a["lat"], a["lon"], a.get("elevation", 0)) for a in AIRPORT_INDEX.airports}
+    return AIRPORT_INDEX
+
+def alternates_for(route, range_nm=ALTERNATE_RADIUS_NM):
+    """Nearest airports to any waypoint within range_nm, excluding those on the route"""
+    index = airport_index()
+    on_route = {icao for icao, _ in index.nearest(route, len(index), ON_ROUTE_NM)}
+    return [icao for icao, _ in index.nearest(route, MAX_ALTERNATES, range_nm, on_route)]
+
+def advisory_for(legs, distance_nm, ete_hours, fuel_gal, reserve, msas=None, uncovered=()):
+    """Short advisory text: the worst hazards, the MEF and the fuel plan"""
+    notes = []
+    for hazard in ("icing", "turbulence", "terrain"):
+        worst = max(legs, key=lambda leg: leg[hazard])
+        level = "Severe" if worst[hazard] >= SEVERE else "Moderate" if worst[hazard] >= MODERATE else None
+        if level:
+            notes.append(f"{level} {hazard} risk on leg {worst['fromIndex'] + 1}→{worst['toIndex'] + 1}.")
+    if not notes:
+        notes.append("No significant hazards forecast along the route.")
+    if msas is not None:
+        high = [f"{leg['fromIndex'] + 1}→{leg['toIndex'] + 1} ({msa:,} ft)"
+                for leg, msa in zip(legs, msas) if msa > CRUISE_ALTITUDE_FT]
+        notes.append(f"Route MEF {max(msas):,} ft.")
+        if len(uncovered):
+            off = ", ".join(f"{legs[i]['fromIndex'] + 1}→{legs[i]['toIndex'] + 1}" for i in uncovered)
+            notes.append(f"No terrain index coverage for leg {off}; its MEF uses the coarse terrain model.")
+        if high:
+            notes.append(f"Climb above {CRUISE_ALTITUDE_FT:,} ft for leg {', '.join(high)}.")
+    hours, minutes = divmod(int(round(ete_hours * 60)), 60)
+    notes.append(f"{distance_nm:.0f} nm, ETE {hours}h{minutes:02d}m, "
+                 f"plan {fuel_gal:.1f} gal including a {reserve}-minute reserve.")
+    return " ".join(notes)
+
+def build_plan(body, tile_templates=None, max_error_nm=None):
+    """FFMResponse dict for an FFMRequest dict; raises PlanError on bad input
+
+    With ``policy.optimize`` each leg follows the wind- and risk-optimal path
+    from route_optimizer.py and the ETE includes the winds. With
+    ``policy.altitudeSweep`` the response compares every cruise altitude (see
+    altitude_sweep.py). With
+    ``max_error_nm`` the polyline is cut to the coarsest LOD tier within that
+    error (see polyline_lod.py), and the response lists every tier.
+    """
+    route, ktas, fuel_burn, reserve, enforce_mef, optimize, altitude_sweep = parse_request(body)
+    paths = optimized = None
+    if optimize:
+        from route_optimizer import optimize_route
+        optimized = optimize_route(route, ktas, fuel_burn, optimize)
+        paths = optimized["paths"]
+        polyline = [point for path in paths for point in path[:-1]] + [route[-1]]
+        waypoint_index = np.concatenate([[0], np.cumsum([len(path) - 1 for path in paths])]).tolist()
+    else:
+        polyline, waypoint_index = densify(route)
+    legs, peaks = leg_risks(route, RISK_STORE, paths)
+    msas, uncovered = None, ()
+    if enforce_mef:
+        if TERRAIN_INDEX is not None:
+            from terrain_index import NO_DATA
+            if paths is None:
+                indexed = TERRAIN_INDEX.corridor_max(RouteBatch.from_routes([route]), MEF_CORRIDOR_NM)
+            else:
+                batch = RouteBatch.from_routes(paths)
+                segments = TERRAIN_INDEX.corridor_max(batch, MEF_CORRIDOR_NM)
+                first = np.concatenate([[0], np.cumsum(batch.lengths - 1)[:-1]])
+                indexed = np.where(np.minimum.reduceat(segments, first) == NO_DATA, NO_DATA,
+                                   np.maximum.reduceat(segments, first))
+            # Legs the index does not cover keep the peaks sampled from the planner's own terrain field
+            uncovered = np.flatnonzero(indexed == NO_DATA)
+            peaks = np.where(indexed == NO_DATA, peaks, indexed)
+        msas = minimum_safe_altitudes(peaks)
+        # A leg that cannot be flown at cruise altitude is a severe terrain risk
+        for leg, msa in zip(legs, msas):
+            if msa > CRUISE_ALTITUDE_FT:
+                leg["terrain"] = max(leg["terrain"], SEVERE)
+    flown = polyline if optimized else route
+    distance = sum(haversine_nm(*a, *b) for a, b in zip(flown, flown[1:]))
+    ete_hours = optimized["hours"] if optimized else distance / ktas
+    fuel = (ete_hours + reserve / 60) * fuel_burn
+    bands = advice = None
+    if altitude_sweep:
+        # Altitude trade-offs measured from the plan's own ETE and fuel; bands below the MSA are ruled out
+        from altitude_sweep import altitude_advice, recommended, sweep
+        msa = int(max(msas if msas is not None else minimum_safe_altitudes(peaks)))
+        bands = sweep(polyline, ktas, fuel_burn, msa, store=RISK_STORE, baseline=(ete_hours, fuel))
+        advice = altitude_advice(bands)
+    plan = {
+        "polyline": [{"lat": round(lat, 5), "lon": round(lon, 5)} for lat, lon in polyline],
+        "legRisks": legs,
+        # An alternate has to be reachable on the reserve
+        "alternates": alternates_for(route, min(ALTERNATE_RADIUS_NM, reserve / 60 * ktas)),
+        "advisory": " ".join(filter(None, [advisory_for(legs, distance, ete_hours, fuel, reserve, msas, uncovered),
+                                            advice])),
+        "riskTileTemplates": list(tile_templates or RISK_TILE_TEMPLATES),
+    }
+    if bands is not None:
+        plan["altitudeSweep"] = {"recommendedFt": (recommended(bands) or {}).get("altitudeFt"), "bands": bands}
+    if optimized:
+        plan["optimization"] = {
+            "objective": optimize, "legsOptimized": optimized["optimized_legs"],
+            "eteMinutes": round(optimized["hours"] * 60, 1), "fuelGallons": round(optimized["fuel"], 2),
+            "greatCircleEteMinutes": round(optimized["direct_hours"] * 60, 1),
+            "greatCircleFuelGallons": round(optimized["direct_fuel"], 2),
+            "riskWeightedMinutes": round(optimized["risk_hours"] * 60, 1),
+            "greatCircleRiskWeightedMinutes": round(optimized["direct_risk_hours"] * 60, 1),
+        }
+    if max_error_nm is not None:
+        from polyline_lod import lod_tiers, significance, simplify, tier_for
+        weights = significance(polyline, waypoint_index)
+        tier = tier_for(max_error_nm)
+        if tier is not None:
+            plan["polyline"] = simplify(plan["polyline"], weights, tier)
+        plan["polylineMaxErrorNM"] = tier or 0.0
+        plan["lodTiers"] = lod_tiers(weights)
+    return plan
+
+if __name__ == "__main__":
+    # Plan a request file (or stdin) and print the response
+    source = open(sys.argv[1]) if len(sys.argv) > 1 else sys.stdin
+    try:
+        print(json.dumps(build_plan(json.load(source)), indent=2))
+    except PlanError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+AeroMaps FFM Planning Server
+Asyncio HTTP/1.1 service for POST /v1/plan, the endpoint FFMClient calls
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from urllib.parse import parse_qs
+
+import ffm_planner
+from ffm_batch import BatchPlanner, body_lines, chunk_frame
+from ffm_planner import PlanError, build_plan
+from plan_cache import DEFAULT_ENTRIES, PlanCache
+from plan_encoding import accepts_gzip, encode_plan, negotiate
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+IDLE_TIMEOUT = 30.0  # seconds a keep-alive connection may sit idle
+
+PLAN_PATH = "/v1/plan"
+BATCH_PATH = "/v1/plan/batch"
+TILE_PREFIX = "/v1/tiles/"
+TILE_MAX_AGE = 300  # seconds clients may reuse a tile before revalidating
+SEARCH_PATH = "/v1/airports/search"
+MAX_SEARCH_RESULTS = 20
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           408: "Request Timeout", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def response_bytes(status, body, headers=None, keep_alive=True):
+    """Serialize a complete HTTP/1.1 response"""
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}",
+             f"Content-Length: {len(body)}",
+             f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+def stream_head(status, headers=None, keep_alive=True):
+    """Head of a chunked response whose body is written afterwards with chunk_frame"""
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}", "Transfer-Encoding: chunked",
+             f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+def json_response(status, payload, keep_alive=True):
+    """JSON response for a payload, or for already encoded JSON bytes"""
+    body = payload if isinstance(payload, bytes) else json.dumps(payload, separators=(",", ":")).encode()
+    return response_bytes(status, body, {"Content-Type": "application/json"}, keep_alive)
+
+async def read_request(reader, streamed=()):
+    """Read one request: (method, target, headers, body), or None at end of stream
+
+    The target keeps its query string. POSTs to a path in ``streamed`` come back with body None, and the
+    caller reads the body from ``reader`` itself.
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise HTTPError(400, "incomplete request head")
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(400, "request head too large")
+
+    request_line, *header_lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, path, version = request_line.split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+    headers = {}
+    for line in header_lines:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    if version == "HTTP/1.0" and headers.get("connection", "").lower() != "keep-alive":
+        headers.setdefault("connection", "close")
+
+    if method == "POST" and path.split("?", 1)[0] in streamed:
+        return method, path, headers, None
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HTTPError(400, "chunked request bodies are not supported")
+    try:
+        length = int(headers.get("content-length", "0") or 0)
+    except ValueError:
+        raise HTTPError(400, "invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f"request body over {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+class PlanServer:
+    """Routes requests and keeps simple counters for /healthz"""
+
+    def __init__(self, tiles=None, cache=None, batch=None, search=None):
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.tiles = tiles
+        self.cache = cache
+        self.batch = batch
+        self.search = search
+
+    def tile_templates(self, headers):
+        """Templates pointing back at this server, or None for the planner default"""
+        if self.tiles is None:
+            return None
+        host = headers.get("host", "127.0.0.1:8080")
+        return [f"http://{host}{TILE_PREFIX}risk/{{z}}/{{x}}/{{y}}.png?v={self.tiles.version()}"]
+
+    def handle(self, method, path, body, headers=None, query=""):
+        """Return (status, payload) for one request"""
+        if path == SEARCH_PATH and self.search is not None:
+            if method != "GET":
+                return 405, {"error": "use GET"}
+            params = parse_qs(query)
+            text = params.get("q", [""])[0]
+            try:
+                limit = min(max(int(params.get("limit", ["5"])[0]), 1), MAX_SEARCH_RESULTS)
+            except ValueError:
+                return 400, {"error": "limit must be an integer"}
+            return 200, {"query": text, "results": self.search.search(text, limit)}
+        if path == "/healthz" and method == "GET":
+            return 200, {"status": "ok", "pid": os.getpid(), "uptime_s": round(time.time() - self.started, 1),
+                         "requests": self.requests, "errors": self.errors,
+                         "risk_epoch": ffm_planner.RISK_STORE.epoch if ffm_planner.RISK_STORE else None,
+                         "tiles": self.tiles.stats() if self.tiles else None,
+                         "plan_cache": self.cache.stats() if self.cache else None,
+                         "batch": self.batch.stats() if self.batch else None}
+        return 404, {"error": f"no route for {method} {path}"}
+
+    def serve_plan(self, method, body, headers, query=""):
+        """Return (status, body, headers) for POST /v1/plan in the format the client accepts
+
+        JSON stays the default; Accept can ask for an encoded polyline or
+        packed floats (see plan_encoding.py), and Accept-Encoding for gzip.
+        ``?maxErrorNM=`` asks for a simplified polyline (see polyline_lod.py).
+        """
+        max_error = parse_qs(query).get("maxErrorNM", [None])[0]
+        try:
+            max_error_nm = None if max_error is None else float(max_error)
+        except ValueError:
+            max_error_nm = -1.0
+        if method != "POST":
+            status, payload = 405, {"error": "use POST"}
+        elif max_error_nm is not None and not 0 <= max_error_nm < float("inf"):
+            status, payload = 400, {"error": "maxErrorNM must be a non-negative number"}
+        else:
+            media_type = negotiate(headers.get("accept", ""))
+            compress = accepts_gzip(headers.get("accept-encoding", ""))
+            try:
+                request, templates = json.loads(body), self.tile_templates(headers)
+                if self.cache is not None:
+                    encoded = self.cache.plan(request, templates, media_type, compress, max_error_nm)
+                else:
+                    encoded = encode_plan(build_plan(request, templates, max_error_nm), media_type, compress)
+                plan_headers = {"Content-Type": media_type, "Vary": "Accept, Accept-Encoding"}
+                if compress:
+                    plan_headers["Content-Encoding"] = "gzip"
+                return 200, encoded, plan_headers
+            except json.JSONDecodeError as e:
+                status, payload = 400, {"error": f"invalid JSON: {e.msg}"}
+            except UnicodeDecodeError:
+                status, payload = 400, {"error": "request body must be UTF-8"}
+            except PlanError as e:
+                status, payload = 400, {"error": str(e)}
+        return status, json.dumps(payload, separators=(",", ":")).encode(), {"Content-Type": "application/json"}
+
+    async def serve_tile(self, method, path, headers):
+        """Return (status, body, headers) for GET /v1/tiles/{layer}/{z}/{x}/{y}.png"""
+        from risk_tiles import LAYERS, MAX_ZOOM
+        if method not in ("GET", "HEAD"):
+            return 405, b"", {}
+        parts = path[len(TILE_PREFIX):].split("/")
+        try:
+            layer, z, x, y = parts[0], int(parts[1]), int(parts[2]), int(parts[3].removesuffix(".png"))
+        except (IndexError, ValueError):
+            return 404, b"", {}
+        if (len(parts) != 4 or not parts[3].endswith(".png") or layer not in LAYERS
+                or not 0 <= z <= MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z)):
+            return 404, b"", {}
+
+        body, etag = await self.tiles.tile(layer, z, x, y, asyncio.get_running_loop())
+        cache_headers = {"ETag": etag, "Cache-Control": f"public, max-age={TILE_MAX_AGE}"}
+        if etag in headers.get("if-none-match", ""):
+            return 304, b"", cache_headers
+        return 200, b"" if method == "HEAD" else body, {"Content-Type": "image/png", **cache_headers}
+
+    async def serve_batch(self, reader, writer, headers, keep_alive):
+        """Stream NDJSON results for POST /v1/plan/batch; False when the connection must close"""
+        writer.write(stream_head(200, {"Content-Type": "application/x-ndjson"}, keep_alive))
+
+        async def write(data):
+            writer.write(chunk_frame(data))
+            await writer.drain()
+
+        try:
+            await self.batch.stream(body_lines(reader, headers), write, self.tile_templates(headers))
+        except (ValueError, asyncio.LimitOverrunError) as e:
+            # Too late for a status code: the error is the last line and the connection closes
+            self.errors += 1
+            await write(json.dumps({"error": f"bad batch body: {e}"}).encode() + b"\n")
+            keep_alive = False
+        writer.write(b"0\r\n\r\n")
+        return keep_alive
+
+    async def serve_connection(self, reader, writer):
+        """Serve requests on one keep-alive connection until it closes"""
+        try:
+            while True:
+                try:
+                    streamed = (BATCH_PATH,) if self.batch is not None else ()
+                    request = await asyncio.wait_for(read_request(reader, streamed), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                except HTTPError as e:
+                    self.errors += 1
+                    writer.write(json_response(e.status, {"error": str(e)}, keep_alive=False))
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                path, _, query = path.partition("?")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self.requests += 1
+                if body is None:
+                    if not await self.serve_batch(reader, writer, headers, keep_alive):
+                        break
+                    continue
+                try:
+                    if path == PLAN_PATH:
+                        status, plan, plan_headers = self.serve_plan(method, body, headers, query)
+                        response = response_bytes(status, plan, plan_headers, keep_alive)
+                    elif self.tiles is not None and path.startswith(TILE_PREFIX):
+                        status, tile, tile_headers = await self.serve_tile(method, path, headers)
+                        response = response_bytes(status, tile, tile_headers, keep_alive)
+                    else:
+                        status, payload = self.handle(method, path, body, headers, query)
+                        response = json_response(status, payload, keep_alive)
+                except Exception as e:
+                    status = 500
+                    response = json_response(status, {"error": f"{type(e).__name__}: {e}"}, keep_alive)
+                if status >= 400:
+                    self.errors += 1
+                writer.write(response)
+                # Only wait on the socket when the client is not draining it
+                if writer.transport.get_write_buffer_size() > 64 * 1024:
+                    await writer.drain()
+                if not keep_alive:
+                    break
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+def listening_socket(host, port, reuse_port):
+    """Bound socket shared by worker processes through SO_REUSEPORT"""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.setblocking(False)
+    return sock
+
+async def serve(host, port, reuse_port=False, tiles=None, cache=None, batch=None, search=None):
+    server = PlanServer(tiles, cache, batch, search)
+    listener = await asyncio.start_server(
+        server.serve_connection, sock=listening_socket(host, port, reuse_port),
+        limit=MAX_HEADER_BYTES,
+    )
+    async with listener:
+        await listener.serve_forever()
+
+def run_worker(host, port, reuse_port, risk_store=None, terrain_index=None, tile_dir=None, cache_entries=0,
+               batch_processes=1, airports=None, airport_search=None):
+    # Every worker maps the same files, so the grids are shared through the page cache
+    tiles = None
+    if risk_store:
+        from risk_tiles import TileService
+        ffm_planner.use_risk_store(risk_store)
+        tiles = TileService(ffm_planner.RISK_STORE, tile_dir)
+    if terrain_index:
+        ffm_planner.use_terrain_index(terrain_index)
+    if airports:
+        ffm_planner.use_airports(airports)
+    search = None
+    if airport_search:
+        from airport_search import AirportSearch
+        search = AirportSearch(airport_search)
+    cache = PlanCache(cache_entries) if cache_entries > 0 else None
+    batch = BatchPlanner(batch_processes, risk_store, terrain_index, cache_entries, airports)
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        asyncio.run(serve(host, port, reuse_port, tiles, cache, batch, search))
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        batch.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the AeroMaps FFM planning API")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to bind")
+    parser.add_argument("--port", type=int, default=8080, help="port (FFMClient default: 8080)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes sharing the port via SO_REUSEPORT")
+    parser.add_argument("--risk-store", help="gridded risk store directory (see risk_store.py)")
+    parser.add_argument("--tiles", help="pre-rendered low-zoom risk tiles (see risk_tiles.py); "
+                        "rendered at startup when missing")
+    parser.add_argument("--plan-cache", type=int, default=DEFAULT_ENTRIES,
+                        help="cached plans per worker (0 disables the cache)")
+    parser.add_argument("--batch-processes", type=int,
+                        help="planning processes per worker for /v1/plan/batch (default: CPUs / workers)")
+    parser.add_argument("--terrain-index", help="terrain pyramid directory for MEF (see terrain_index.py)")
+    parser.add_argument("--airports", help="airport dataset for alternates (see airport_index.py)")
+    parser.add_argument("--airport-search", help=f"search index served at {SEARCH_PATH} (see airport_search.py)")
+    args = parser.parse_args()
+
+    workers = max(1, args.workers)
+    if workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        print("⚠️  SO_REUSEPORT is not available, running a single worker")
+        workers = 1
+
+    batch_processes = args.batch_processes or max(1, (os.cpu_count() or 1) // workers)
+    print(f"🛫 FFM planning server on http://{args.host}:{args.port}/v1/plan ({workers} worker(s))")
+    if workers == 1:
+        run_worker(args.host, args.port, False, args.risk_store, args.terrain_index, args.tiles, args.plan_cache,
+                   batch_processes, args.airports, args.airport_search)
+        return
+
+    processes = [multiprocessing.Process(target=run_worker,
+                                         args=(args.host, args.port, True, args.risk_store, args.terrain_index,
+                                               args.tiles, args.plan_cache, batch_processes, args.airports,
+                                               args.airport_search))
+                 for _ in range(workers)]
+    # Workers are not daemonic because each may start a batch pool; stop them on the way out instead
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping FFM planning server")
+    finally:
+        for process in processes:
+            process.terminate()
+
+if __name__ == "__main__":
+    main()
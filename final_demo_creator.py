@@ -4,6 +4,7 @@ Final AeroMaps Demo Video Creator
 Creates a professional .mov video showcasing all app features
 """
 
+import argparse
 import subprocess
 import time
 import signal
@@ -11,9 +12,24 @@ import sys
 import os
 from datetime import datetime
 
+from demo_checkpoint import CheckpointStore, assumed_state, mark_restore_failed, restore_state, section_failures
+from demo_preflight import run_preflight
+from demo_timeline import ActionTimeline, slugify, timeline_path_for
+
+# App state each section leaves behind, used to resume from any section
+SECTION_EFFECTS = {
+    "Waypoint Creation": {"waypoints": 3},
+    "Bottom Sheet": {"sheet": "expanded", "panel": "flight_planner"},
+    "Flight Planner": {"panel": None},
+    "Layer Controls": {"layers": "toggled"},
+    "Route Management": {"waypoints": 0},
+}
+
 class FinalVideoRecorder:
-    def __init__(self):
+    def __init__(self, output_file="AeroMaps_Demo.mov"):
         self.recording = False
+        self.output_file = output_file
+        self.timeline = ActionTimeline()
         
     def start_quicktime_recording(self):
         """Start QuickTime Player screen recording"""
@@ -34,12 +50,16 @@ class FinalVideoRecorder:
                 'tell application "QuickTime Player" to new screen recording'
             ]
             subprocess.run(cmd, capture_output=True)
+            # Best estimate of video time zero; the setup wait below is inside the recording
+            self.timeline.start()
             
             self.recording = True
             print("✅ QuickTime Player recording started!")
             print("📝 Please manually select the simulator area and start recording")
             print("⏳ Waiting 10 seconds for you to set up recording...")
-            time.sleep(10)
+            self.timeline.begin_section("Recording Setup")
+            self.pause(10, "Manual recording setup")
+            self.timeline.end_section()
             
         except Exception as e:
             print(f"❌ Failed to start QuickTime recording: {e}")
@@ -47,190 +67,197 @@ class FinalVideoRecorder:
             
         return True
     
-    def run_comprehensive_demo(self):
-        """Run a comprehensive demo of all features"""
-        print("🚀 Running comprehensive AeroMaps demo...")
-        
-        # Comprehensive demo sequence
-        demo_steps = [
+    def demo_steps(self):
+        """Comprehensive demo sequence: (name, description, hold seconds, action)"""
+        return [
             # Opening and navigation
-            ("App Launch", "Showing app launch and main interface", 5),
-            ("Tab Navigation", "Demonstrating tab navigation", 15),
-            ("Search Features", "Showing airport search functionality", 20),
-            ("Waypoint Creation", "Adding waypoints to the map", 15),
-            ("Bottom Sheet", "Interacting with bottom sheet features", 20),
-            ("Flight Planner", "Opening and using Flight Planner", 15),
-            ("Weather Panel", "Demonstrating weather features", 15),
-            ("Layer Controls", "Toggling map layers", 15),
-            ("Route Management", "Clearing and managing routes", 10),
-            ("Multiple Searches", "Searching different airports", 15),
-            ("Floating Buttons", "Using floating action buttons", 15),
-            ("Final View", "Showing final app state", 10),
+            ("App Launch", "Showing app launch and main interface", 5, None),
+            ("Tab Navigation", "Demonstrating tab navigation", 15, self.navigate_tabs),
+            ("Search Features", "Showing airport search functionality", 20, self.demonstrate_search),
+            ("Waypoint Creation", "Adding waypoints to the map", 15, self.create_waypoints),
+            ("Bottom Sheet", "Interacting with bottom sheet features", 20, self.interact_bottom_sheet),
+            ("Flight Planner", "Opening and using Flight Planner", 15, self.open_flight_planner),
+            ("Weather Panel", "Demonstrating weather features", 15, self.open_weather_panel),
+            ("Layer Controls", "Toggling map layers", 15, self.toggle_layers),
+            ("Route Management", "Clearing and managing routes", 10, self.clear_route),
+            ("Multiple Searches", "Searching different airports", 15, self.multiple_searches),
+            ("Floating Buttons", "Using floating action buttons", 15, self.use_floating_buttons),
+            ("Final View", "Showing final app state", 10, self.show_final_view),
         ]
+    
+    def section_names(self):
+        """Names of the demo sections, in order"""
+        return [name for name, _, _, _ in self.demo_steps()]
+    
+    def run_comprehensive_demo(self, sections=None, checkpoints=None):
+        """Run a comprehensive demo of all features
+        
+        ``sections`` limits the run to those section names, rebuilding the
+        app state the first one assumes; outcomes go to ``checkpoints``.
+        """
+        print("🚀 Running comprehensive AeroMaps demo...")
+        
+        demo_steps = self.demo_steps()
+        order = [name for name, _, _, _ in demo_steps]
+        if sections is not None:
+            demo_steps = [step for step in demo_steps if step[0] in sections]
+        if demo_steps and demo_steps[0][0] != order[0]:
+            first = demo_steps[0][0]
+            assumes = assumed_state(order, SECTION_EFFECTS, first)
+            if not restore_state(self, assumes, self.timeline):
+                mark_restore_failed(checkpoints, first, assumes, video=self.output_file)
+                return False
         
         total_duration = 0
-        for step_name, description, duration in demo_steps:
+        for step_name, description, duration, action in demo_steps:
             print(f"\n📱 {step_name}: {description}")
             print(f"⏱️ Duration: {duration} seconds")
+            self.timeline.begin_section(step_name)
             
-            # Execute the step
-            if step_name == "App Launch":
-                self.wait(duration)
-                
-            elif step_name == "Tab Navigation":
-                self.navigate_tabs()
-                self.wait(duration)
-                
-            elif step_name == "Search Features":
-                self.demonstrate_search()
-                self.wait(duration)
-                
-            elif step_name == "Waypoint Creation":
-                self.create_waypoints()
-                self.wait(duration)
-                
-            elif step_name == "Bottom Sheet":
-                self.interact_bottom_sheet()
-                self.wait(duration)
-                
-            elif step_name == "Flight Planner":
-                self.open_flight_planner()
-                self.wait(duration)
-                
-            elif step_name == "Weather Panel":
-                self.open_weather_panel()
-                self.wait(duration)
-                
-            elif step_name == "Layer Controls":
-                self.toggle_layers()
-                self.wait(duration)
-                
-            elif step_name == "Route Management":
-                self.clear_route()
-                self.wait(duration)
-                
-            elif step_name == "Multiple Searches":
-                self.multiple_searches()
-                self.wait(duration)
-                
-            elif step_name == "Floating Buttons":
-                self.use_floating_buttons()
-                self.wait(duration)
-                
-            elif step_name == "Final View":
-                self.show_final_view()
-                self.wait(duration)
+            # Execute the step, then hold on it
+            if action is not None:
+                action()
+            self.wait(duration)
             
             total_duration += duration
+            self.timeline.end_section()
+            
+            failures = section_failures(self.timeline, step_name)
+            if checkpoints is not None:
+                status = "failed" if failures else "done"
+                checkpoints.mark(step_name, status, assumed_state(order, SECTION_EFFECTS, step_name),
+                                 video=self.output_file, failures=failures)
+            if failures:
+                print(f"\n❌ Section '{step_name}' failed; rerun with --resume to continue from it")
+                self.timeline.print_report()
+                return False
         
         print(f"\n⏱️ Total demo duration: {total_duration} seconds ({total_duration/60:.1f} minutes)")
+        self.timeline.print_report()
         print("\n🎬 Demo completed! Please stop the QuickTime recording.")
         return True
     
+    def save_timeline(self):
+        """Write the measured action timeline next to the expected video file"""
+        path = self.timeline.save(timeline_path_for(self.output_file), video=self.output_file)
+        print(f"🧭 Action timeline saved to {path}")
+        return path
+    
+    def act(self, description, action_func):
+        """Run a single input action through the timeline"""
+        success = self.timeline.run(description, action_func)
+        if success is False:
+            print(f"    ⚠️  Action failed: {description}")
+        return success
+    
+    def pause(self, seconds, description="Wait"):
+        """Sleep between actions, recorded on the timeline"""
+        self.timeline.run(description, lambda: time.sleep(seconds), seconds)
+    
     def wait(self, seconds):
         """Wait for specified seconds"""
         print(f"  ⏳ Waiting {seconds} seconds...")
-        time.sleep(seconds)
+        self.pause(seconds, f"Hold {seconds}s")
     
     def navigate_tabs(self):
         """Navigate through all tabs"""
         print("  → Navigating through tabs...")
-        self.simulate_tap(100, 800)  # Map tab
-        time.sleep(2)
-        self.simulate_tap(200, 800)  # Flights tab
-        time.sleep(2)
-        self.simulate_tap(300, 800)  # Library tab
-        time.sleep(2)
-        self.simulate_tap(100, 800)  # Back to Map tab
-        time.sleep(1)
+        self.act("Map tab", lambda: self.simulate_tap(100, 800))
+        self.pause(2)
+        self.act("Flights tab", lambda: self.simulate_tap(200, 800))
+        self.pause(2)
+        self.act("Library tab", lambda: self.simulate_tap(300, 800))
+        self.pause(2)
+        self.act("Back to Map tab", lambda: self.simulate_tap(100, 800))
+        self.pause(1)
     
     def demonstrate_search(self):
         """Demonstrate search functionality"""
         print("  → Demonstrating search...")
-        self.simulate_tap(200, 150)  # Tap search bar
-        time.sleep(1)
-        self.simulate_text("KSFO")
-        time.sleep(1)
-        self.simulate_text("\n")  # Press Enter
-        time.sleep(4)  # Wait for map animation
+        self.act("Tap search bar", lambda: self.simulate_tap(200, 150))
+        self.pause(1)
+        self.act("Type KSFO", lambda: self.simulate_text("KSFO"))
+        self.pause(1)
+        self.act("Press Enter", lambda: self.simulate_text("\n"))
+        self.pause(4, "Wait for map animation")
     
     def create_waypoints(self):
         """Create waypoints on the map"""
         print("  → Creating waypoints...")
-        self.simulate_tap(150, 300)  # Waypoint 1
-        time.sleep(1)
-        self.simulate_tap(250, 400)  # Waypoint 2
-        time.sleep(1)
-        self.simulate_tap(200, 500)  # Waypoint 3
-        time.sleep(2)
+        self.act("Waypoint 1", lambda: self.simulate_tap(150, 300))
+        self.pause(1)
+        self.act("Waypoint 2", lambda: self.simulate_tap(250, 400))
+        self.pause(1)
+        self.act("Waypoint 3", lambda: self.simulate_tap(200, 500))
+        self.pause(2)
     
     def interact_bottom_sheet(self):
         """Interact with bottom sheet"""
         print("  → Interacting with bottom sheet...")
-        self.simulate_swipe(200, 700, 200, 500)  # Drag up
-        time.sleep(2)
-        self.simulate_tap(100, 650)  # Route Advisor
-        time.sleep(1)
-        self.simulate_tap(200, 650)  # W&B button
-        time.sleep(3)
+        self.act("Drag up", lambda: self.simulate_swipe(200, 700, 200, 500))
+        self.pause(2)
+        self.act("Route Advisor", lambda: self.simulate_tap(100, 650))
+        self.pause(1)
+        self.act("W&B button", lambda: self.simulate_tap(200, 650))
+        self.pause(3)
     
     def open_flight_planner(self):
         """Open Flight Planner"""
         print("  → Opening Flight Planner...")
-        self.simulate_tap(200, 650)  # W&B button
-        time.sleep(3)
-        self.simulate_tap(350, 100)  # Close button
-        time.sleep(1)
+        self.act("W&B button", lambda: self.simulate_tap(200, 650))
+        self.pause(3)
+        self.act("Close button", lambda: self.simulate_tap(350, 100))
+        self.pause(1)
     
     def open_weather_panel(self):
         """Open Weather Panel"""
         print("  → Opening Weather Panel...")
-        self.simulate_tap(300, 650)  # Brief & File
-        time.sleep(2)
-        self.simulate_tap(350, 100)  # Close button
-        time.sleep(1)
+        self.act("Brief & File", lambda: self.simulate_tap(300, 650))
+        self.pause(2)
+        self.act("Close button", lambda: self.simulate_tap(350, 100))
+        self.pause(1)
     
     def toggle_layers(self):
         """Toggle map layers"""
         print("  → Toggling layers...")
-        self.simulate_tap(100, 600)  # Airspace
-        time.sleep(1)
-        self.simulate_tap(200, 600)  # Weather
-        time.sleep(1)
-        self.simulate_tap(300, 600)  # Terrain
-        time.sleep(2)
+        self.act("Airspace", lambda: self.simulate_tap(100, 600))
+        self.pause(1)
+        self.act("Weather", lambda: self.simulate_tap(200, 600))
+        self.pause(1)
+        self.act("Terrain", lambda: self.simulate_tap(300, 600))
+        self.pause(2)
     
     def clear_route(self):
         """Clear the current route"""
         print("  → Clearing route...")
-        self.simulate_tap(300, 650)  # Clear Route
-        time.sleep(2)
+        self.act("Clear Route", lambda: self.simulate_tap(300, 650))
+        self.pause(2)
     
     def multiple_searches(self):
         """Perform multiple airport searches"""
         print("  → Multiple searches...")
-        self.simulate_tap(200, 150)  # Search bar
-        time.sleep(1)
-        self.simulate_text("San Jose")
-        time.sleep(1)
-        self.simulate_text("\n")
-        time.sleep(3)
-        self.simulate_tap(350, 150)  # Clear search
-        time.sleep(1)
+        self.act("Search bar", lambda: self.simulate_tap(200, 150))
+        self.pause(1)
+        self.act("Type San Jose", lambda: self.simulate_text("San Jose"))
+        self.pause(1)
+        self.act("Press Enter", lambda: self.simulate_text("\n"))
+        self.pause(3)
+        self.act("Clear search", lambda: self.simulate_tap(350, 150))
+        self.pause(1)
     
     def use_floating_buttons(self):
         """Use floating action buttons"""
         print("  → Using floating buttons...")
-        self.simulate_tap(350, 400)  # Location button
-        time.sleep(2)
-        self.simulate_tap(350, 500)  # Mode button
-        time.sleep(2)
+        self.act("Location button", lambda: self.simulate_tap(350, 400))
+        self.pause(2)
+        self.act("Mode button", lambda: self.simulate_tap(350, 500))
+        self.pause(2)
     
     def show_final_view(self):
         """Show final app view"""
         print("  → Showing final view...")
-        self.simulate_tap(100, 800)  # Map tab
-        time.sleep(3)
+        self.act("Map tab", lambda: self.simulate_tap(100, 800))
+        self.pause(3)
     
     def simulate_tap(self, x, y):
         """Simulate a tap at coordinates x, y"""
@@ -247,61 +274,26 @@ class FinalVideoRecorder:
         cmd = f"xcrun simctl send_input BA1B26D3-9DAF-4B80-BF5C-8D27294723C4 text '{text}'"
         return subprocess.run(cmd, shell=True, capture_output=True).returncode == 0
 
-def setup_simulator():
-    """Set up the iPhone simulator"""
-    print("📱 Setting up iPhone simulator...")
-    
-    try:
-        # Check if simulator is running
-        result = subprocess.run(
-            ["xcrun", "simctl", "list", "devices", "booted"],
-            capture_output=True,
-            text=True
-        )
-        
-        if "iPhone 16 Pro" not in result.stdout:
-            print("Starting iPhone 16 Pro simulator...")
-            subprocess.run(["xcrun", "simctl", "boot", "BA1B26D3-9DAF-4B80-BF5C-8D27294723C4"])
-            time.sleep(5)
-        else:
-            print("✅ iPhone 16 Pro simulator already running")
-        
-        return True
-    except Exception as e:
-        print(f"❌ Error setting up simulator: {e}")
-        return False
-
-def launch_app():
-    """Launch the AeroMaps app"""
-    print("🚀 Launching AeroMaps...")
-    
-    try:
-        # Launch the app
-        result = subprocess.run([
-            "xcrun", "simctl", "launch", 
-            "BA1B26D3-9DAF-4B80-BF5C-8D27294723C4", 
-            "com.example.AeroMaps"
-        ], capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            print("✅ AeroMaps launched successfully")
-            time.sleep(3)  # Wait for app to load
-            return True
-        else:
-            print(f"❌ Failed to launch app: {result.stderr}")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Error launching app: {e}")
-        return False
-
 def signal_handler(signum, frame):
     """Handle Ctrl+C gracefully"""
     print("\n🛑 Interrupted by user")
     sys.exit(0)
 
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Final AeroMaps demo video creator")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from the first section that has not completed")
+    parser.add_argument("--from", dest="start_from", metavar="SECTION",
+                        help="start from a named section")
+    parser.add_argument("--segment", action="store_true",
+                        help="run only the first pending section, as its own recording")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
     recorder = FinalVideoRecorder()
+    checkpoints = CheckpointStore("AeroMaps_Demo")
     
     # Set up signal handler for Ctrl+C
     signal.signal(signal.SIGINT, signal_handler)
@@ -311,14 +303,24 @@ def main():
     print("This will create a professional .mov video showcasing all features")
     print("=" * 60)
     
-    # Set up simulator
-    if not setup_simulator():
-        print("❌ Failed to set up simulator")
+    try:
+        sections = checkpoints.plan(recorder.section_names(), resume=args.resume, start_from=args.start_from)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    if not sections:
+        print("✅ All sections already completed. Run without --resume for a fresh take.")
         return
+    if args.segment:
+        sections = sections[:1]
+        recorder.output_file = f"AeroMaps_Demo_{slugify(sections[0])}.mov"
+    elif len(sections) < len(recorder.section_names()):
+        recorder.output_file = f"AeroMaps_Demo_from_{slugify(sections[0])}.mov"
+    if len(sections) < len(recorder.section_names()):
+        print(f"⏩ Running from '{sections[0]}' ({len(sections)} sections)")
     
-    # Launch app
-    if not launch_app():
-        print("❌ Failed to launch app")
+    # Check tools, boot the simulator and launch the app
+    if not run_preflight(("xcrun", "osascript")):
         return
     
     # Start QuickTime recording
@@ -328,21 +330,23 @@ def main():
     
     # Run the comprehensive demo
     print("🎬 Starting comprehensive demo sequence...")
-    demo_success = recorder.run_comprehensive_demo()
+    demo_success = recorder.run_comprehensive_demo(sections=sections, checkpoints=checkpoints)
+    recorder.save_timeline()
     
     if demo_success:
         print("\n🎉 Comprehensive demo completed successfully!")
-        print("📁 Please save the QuickTime recording as 'AeroMaps_Demo.mov'")
+        print(f"📁 Please save the QuickTime recording as '{recorder.output_file}'")
         print("🎬 The video showcases all major AeroMaps features")
         print("💡 You can now edit it in iMovie or Final Cut Pro!")
         print("\n📋 Next steps:")
         print("1. Stop the QuickTime recording")
-        print("2. Save as 'AeroMaps_Demo.mov'")
+        print(f"2. Save as '{recorder.output_file}'")
         print("3. Edit in iMovie or Final Cut Pro")
         print("4. Add narration and background music")
         print("5. Export final video")
     else:
         print("\n⚠️ Demo completed with some issues")
+        print("🔁 Fix the problem, then rerun with --resume to continue from the failed section")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+AeroMaps FFM Plan Cache
+Canonicalizes FFMRequests and keeps encoded FFMResponses in an LRU tied to the risk epoch
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from collections import OrderedDict
+
+import ffm_planner
+from ffm_planner import FUEL_BURN_RANGE, KTAS_RANGE, airport_index, build_plan, clamp, parse_request
+from plan_encoding import JSON_TYPE, encode_plan
+from polyline_lod import tier_for
+
+COORD_QUANTUM_DEG = 0.005  # about 0.3 nm; map taps closer than this plan the same route
+AIRPORT_SNAP_NM = 1.0  # taps this close to a known airport use the airport's position
+KTAS_BUCKET = 5.0
+FUEL_BURN_BUCKET = 0.5
+DEFAULT_TTL = 300.0  # seconds
+DEFAULT_ENTRIES = 4096
+
+def quantize(lat, lon):
+    """Snap a waypoint to a nearby airport, or else to the coordinate grid"""
+    airport = airport_index().snap(lat, lon, AIRPORT_SNAP_NM)
+    if airport is not None:
+        return airport[1], airport[2]
+    return (round(round(lat / COORD_QUANTUM_DEG) * COORD_QUANTUM_DEG, 6),
+            round(round(lon / COORD_QUANTUM_DEG) * COORD_QUANTUM_DEG, 6))
+
+def canonical_request(body):
+    """(key, canonical FFMRequest) for a request body; raises PlanError like the planner
+
+    Buckets round the conservative way: airspeed down and fuel burn up, so a
+    cached plan never carries less fuel than the exact request would. The
+    reserve is kept exact after the 45-minute floor, and aircraft type is
+    dropped because the planner does not use it.
+    """
+    route, ktas, fuel_burn, reserve, enforce_mef, optimize, altitude_sweep = parse_request(body)
+    route = tuple(quantize(lat, lon) for lat, lon in route)
+    ktas = clamp(math.floor(ktas / KTAS_BUCKET) * KTAS_BUCKET, KTAS_RANGE)
+    fuel_burn = clamp(math.ceil(fuel_burn / FUEL_BURN_BUCKET) * FUEL_BURN_BUCKET, FUEL_BURN_RANGE)
+    key = (route, ktas, fuel_burn, reserve, enforce_mef, optimize, altitude_sweep)
+    canonical = {
+        "aircraft": {"type": body["aircraft"].get("type", ""), "trueAirspeedKTAS": ktas, "fuelBurnGPH": fuel_burn},
+        "route": [{"lat": lat, "lon": lon} for lat, lon in route],
+        "policy": {"reserveMinutes": reserve, "enforceMEF": enforce_mef},
+    }
+    if optimize:
+        canonical["policy"]["optimize"] = optimize
+    if altitude_sweep:
+        canonical["policy"]["altitudeSweep"] = True
+    return key, canonical
+
+def risk_epoch():
+    """Identity of the risk data plans are built from, and when it stops applying"""
+    store = ffm_planner.RISK_STORE
+    if store is None:
+        return "synthetic", float("inf")
+    return (store.epoch, store.time_index()), store.valid_until()
+
+class PlanCache:
+    """LRU of encoded FFMResponse bodies keyed on canonical requests
+
+    Entries expire after ``ttl`` seconds or when the risk store moves on to
+    its next time slice, whichever comes first, and are dropped on sight if
+    the epoch they were planned against is no longer current.
+    """
+
+    def __init__(self, max_entries=DEFAULT_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def plan(self, body, tile_templates=None, media_type=JSON_TYPE, compress=False, max_error_nm=None):
+        """Encoded FFMResponse body for a request body, from the cache when possible
+
+        Each media type, compression and LOD tier is cached as its own entry,
+        so a hit never re-encodes. Error bounds snap to their tier first.
+        """
+        key, canonical = canonical_request(body)
+        if max_error_nm is not None:
+            max_error_nm = tier_for(max_error_nm) or 0.0
+        key = (key, tuple(tile_templates or ()), media_type, compress, max_error_nm)
+        epoch, slice_ends = risk_epoch()
+        now = time.time()
+        entry = self.entries.get(key)
+        if entry is not None:
+            encoded, entry_epoch, expires = entry
+            if entry_epoch == epoch and now < expires:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return encoded
+            del self.entries[key]
+            self.expired += 1
+        self.misses += 1
+
+        encoded = encode_plan(build_plan(canonical, tile_templates, max_error_nm), media_type, compress)
+        self.entries[key] = (encoded, epoch, min(now + self.ttl, slice_ends))
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return encoded
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses,
+                "expired": self.expired, "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else None}
+
+def jittered(body, rng, degrees=0.002):
+    """A copy of a request with every waypoint moved like a slightly different map tap"""
+    copy = json.loads(json.dumps(body))
+    for waypoint in copy["route"]:
+        waypoint["lat"] += rng.uniform(-degrees, degrees)
+        waypoint["lon"] += rng.uniform(-degrees, degrees)
+    copy["aircraft"]["trueAirspeedKTAS"] += rng.uniform(-2, 2)
+    return copy
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the plan cache on jittered copies of a request")
+    parser.add_argument("request", help="FFMRequest JSON file")
+    parser.add_argument("-n", type=int, default=5000, help="requests to plan")
+    parser.add_argument("--risk-store", help="gridded risk store directory")
+    args = parser.parse_args()
+
+    if args.risk_store:
+        ffm_planner.use_risk_store(args.risk_store)
+    with open(args.request) as f:
+        body = json.load(f)
+    rng = random.Random(0)
+    requests = [jittered(body, rng) for _ in range(args.n)]
+
+    started = time.perf_counter()
+    for request in requests[:200]:
+        build_plan(request)
+    uncached = (time.perf_counter() - started) / 200
+
+    cache = PlanCache()
+    started = time.perf_counter()
+    for request in requests:
+        cache.plan(request)
+    cached = (time.perf_counter() - started) / args.n
+
+    print(f"⏱️ Uncached {uncached * 1e6:.0f}µs/plan, cached {cached * 1e6:.1f}µs/plan "
+          f"({uncached / cached:.0f}x)")
+    print(f"📊 {json.dumps(cache.stats())}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+AeroMaps FFM Plan Encodings
+Encoded-polyline and packed-float forms of FFMResponse, chosen by content negotiation
+"""
+
+import argparse
+import gzip
+import json
+import struct
+import sys
+import time
+
+import numpy as np
+
+from ffm_planner import build_plan
+
+JSON_TYPE = "application/json"
+POLYLINE_TYPE = "application/vnd.aeromaps.ffm.polyline+json"
+BINARY_TYPE = "application/vnd.aeromaps.ffm+binary"
+MEDIA_TYPES = (JSON_TYPE, POLYLINE_TYPE, BINARY_TYPE)
+PRECISION = 5  # encoded polyline decimal places, about 1 m
+BINARY_MAGIC = b"FFMB"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sBxxxII")  # magic, version, JSON length, point count
+GZIP_LEVEL = 6
+
+# Negotiation
+
+def negotiate(accept):
+    """Media type to answer with for an Accept header; JSON unless something else is preferred"""
+    best, best_q = JSON_TYPE, 0.0
+    for item in accept.split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_type.lower() in MEDIA_TYPES and q > best_q:
+            best, best_q = media_type.lower(), q
+    return best
+
+def accepts_gzip(accept_encoding):
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "x-gzip") and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            return True
+    return False
+
+# Encoded polyline (Google's algorithm)
+
+def encode_polyline(points, precision=PRECISION):
+    """Encoded polyline string for [{"lat", "lon"}] points"""
+    if not points:
+        return ""
+    scale = 10 ** precision
+    coords = np.round(np.array([(p["lat"], p["lon"]) for p in points]) * scale).astype(np.int64)
+    deltas = np.diff(coords, axis=0, prepend=0).ravel()
+    values = (deltas << 1) ^ (deltas >> 63)  # zigzag: small magnitudes of either sign stay small
+    # Each value is 5-bit groups, low first; every group but the last carries 0x20
+    groups = (values[:, None] >> (5 * np.arange(7))) & 0x1F
+    more = (values[:, None] >> (5 * np.arange(1, 8))) > 0
+    used = np.concatenate([np.ones((len(values), 1), bool), more[:, :-1]], axis=1)
+    chars = (groups | (more * 0x20)) + 63
+    return chars[used].astype(np.uint8).tobytes().decode("ascii")
+
+def decode_polyline(text, precision=PRECISION):
+    """[(lat, lon)] array for an encoded polyline string"""
+    if not text:
+        return np.zeros((0, 2))
+    chars = np.frombuffer(text.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    ends = np.flatnonzero((chars & 0x20) == 0)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    position = np.arange(len(chars)) - np.repeat(starts, ends - starts + 1)
+    values = np.add.reduceat((chars & 0x1F) << (5 * position), starts)
+    deltas = (values >> 1) ^ -(values & 1)
+    return np.cumsum(deltas.reshape(-1, 2), axis=0) / 10 ** precision
+
+# Response bodies
+
+def encode_plan(plan, media_type=JSON_TYPE, compress=False):
+    """FFMResponse dict as a response body in one of MEDIA_TYPES, gzipped when asked"""
+    if media_type == POLYLINE_TYPE:
+        rest = {key: value for key, value in plan.items() if key != "polyline"}
+        body = json.dumps({"polylineEncoded": encode_polyline(plan["polyline"]), "polylinePrecision": PRECISION,
+                           **rest}, separators=(",", ":")).encode()
+    elif media_type == BINARY_TYPE:
+        # Header, the rest of the response as JSON padded to 4 bytes, then little-endian float32 lat/lon pairs
+        header = json.dumps({key: value for key, value in plan.items() if key != "polyline"},
+                            separators=(",", ":")).encode()
+        header += b" " * (-len(header) % 4)
+        points = np.array([(p["lat"], p["lon"]) for p in plan["polyline"]], dtype="<f4")
+        body = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(header), len(points)) + header + points.tobytes()
+    else:
+        body = json.dumps(plan, separators=(",", ":")).encode()
+    return gzip.compress(body, GZIP_LEVEL, mtime=0) if compress else body
+
+def decode_plan(body, media_type=JSON_TYPE, compressed=False):
+    """FFMResponse dict from a body, with polyline as an (n, 2) array for the compact forms"""
+    if compressed:
+        body = gzip.decompress(body)
+    if media_type == POLYLINE_TYPE:
+        plan = json.loads(body)
+        plan["polyline"] = decode_polyline(plan.pop("polylineEncoded"), plan.pop("polylinePrecision"))
+        return plan
+    if media_type == BINARY_TYPE:
+        magic, version, length, count = BINARY_HEADER.unpack_from(body)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError("not an FFM binary plan")
+        plan = json.loads(body[BINARY_HEADER.size:BINARY_HEADER.size + length])
+        plan["polyline"] = np.frombuffer(body, dtype="<f4", count=2 * count,
+                                         offset=BINARY_HEADER.size + length).reshape(-1, 2)
+        return plan
+    return json.loads(body)
+
+def cross_country_request(points=((37.6213, -122.379), (39.8561, -104.6737), (41.9742, -87.9073),
+                                  (40.6413, -73.7781))):
+    """SFO - DEN - ORD - JFK, about 2,300 nm of densified polyline"""
+    return {"aircraft": {"type": "C172", "trueAirspeedKTAS": 120, "fuelBurnGPH": 8.5},
+            "route": [{"lat": lat, "lon": lon} for lat, lon in points],
+            "policy": {"reserveMinutes": 45, "enforceMEF": False}}
+
+def timed(function, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        result = function()
+    return result, (time.perf_counter() - started) / rounds
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare payload size and decode time of plan encodings")
+    parser.add_argument("request", nargs="?", help="FFMRequest JSON file (default: a SFO-JFK route)")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.request:
+        with open(args.request) as f:
+            request = json.load(f)
+    else:
+        request = cross_country_request()
+    plan = build_plan(request)
+    reference = np.array([(p["lat"], p["lon"]) for p in plan["polyline"]])
+    print(f"🧭 {len(plan['polyline'])} polyline points, {len(plan['legRisks'])} legs")
+    print(f"   {'format':<52}{'bytes':>9}{'encode':>10}{'decode':>10}{'max error':>11}")
+    for media_type in MEDIA_TYPES:
+        for compress in (False, True):
+            body, encode_s = timed(lambda: encode_plan(plan, media_type, compress), args.rounds)
+            decoded, decode_s = timed(lambda: decode_plan(body, media_type, compress), args.rounds)
+            points = np.array([(p["lat"], p["lon"]) for p in decoded["polyline"]]) \
+                if media_type == JSON_TYPE else decoded["polyline"]
+            error_m = np.abs(points - reference).max() * 111_320
+            label = media_type + (" + gzip" if compress else "")
+            print(f"   {label:<52}{len(body):>9,}{encode_s * 1e6:>8.0f}µs{decode_s * 1e6:>8.0f}µs{error_m:>9.2f} m")
+
+if __name__ == "__main__":
+    sys.exit(main())
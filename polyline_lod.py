@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Polyline LOD
+Douglas-Peucker significance for plan polylines and the level-of-detail tiers cut from it
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from ffm_planner import densify, parse_request
+
+TIERS_NM = (0.05, 0.25, 1.0, 5.0)  # error bounds clients can ask for, finest first
+
+def mercator(points):
+    """Web Mercator (x, y) in degrees, with longitude unwrapped across the antimeridian"""
+    lat, lon = np.radians(np.asarray(points, dtype=float)).T
+    return np.degrees(np.stack([np.unwrap(lon), np.log(np.tan(np.pi / 4 + lat / 2))], axis=-1)), lat
+
+def segment_distance_nm(p, a, b, lat):
+    """Distance from Mercator points p to the straight Mercator segments a-b, as MKPolyline draws them
+
+    Mercator degrees are scaled to nm at each point's own latitude.
+    """
+    ab = b - a
+    length2 = np.sum(ab * ab, axis=-1)
+    t = np.clip(np.sum((p - a) * ab, axis=-1) / np.where(length2 > 0, length2, 1), 0, 1)
+    offset = p - (a + t[:, None] * ab)
+    return np.hypot(offset[:, 0], offset[:, 1]) * np.cos(lat) * 60
+
+def significance(points, keep=()):
+    """Douglas-Peucker significance of every point, in nm
+
+    Simplifying at tolerance t keeps exactly the points whose significance is
+    above t, and every dropped point lies within t of the result. Endpoints
+    and ``keep`` (the route's waypoints) are never dropped. Error is measured
+    against straight Mercator segments, so great circles keep the points
+    they need to look curved on the map. All open segments are split
+    together each round, so the work is a few array passes per tree level
+    rather than one recursion per point.
+    """
+    n = len(points)
+    result = np.zeros(n)
+    if n == 0:
+        return result
+    xy, lat = mercator(points)
+    bound = np.zeros(n, bool)
+    bound[[0, n - 1]] = True
+    bound[np.asarray(keep, dtype=int)] = True
+    result[bound] = np.inf
+    open_points = np.flatnonzero(~bound)
+    while len(open_points):
+        bounds = np.flatnonzero(bound)
+        segment = np.cumsum(bound)[open_points] - 1
+        starts, ends = bounds[segment], bounds[segment + 1]
+        distance = segment_distance_nm(xy[open_points], xy[starts], xy[ends], lat[open_points])
+        # Farthest point of each segment; open points are sorted, so segments are contiguous runs
+        first = np.flatnonzero(np.diff(segment, prepend=-1))
+        farthest = np.maximum.reduceat(distance, first)
+        is_max = distance == np.repeat(farthest, np.diff(first, append=len(distance)))
+        split = np.minimum.reduceat(np.where(is_max, np.arange(len(distance)), len(distance)), first)
+        # A point is never more significant than the split that exposed it, which keeps tiers nested
+        cap = np.minimum(result[starts[split]], result[ends[split]])
+        result[open_points[split]] = np.minimum(farthest, cap)
+        bound[open_points[split]] = True
+        open_points = np.delete(open_points, split)
+    return result
+
+def tier_for(max_error_nm):
+    """Coarsest tier whose error bound is within max_error_nm, or None for the full polyline"""
+    fitting = [tier for tier in TIERS_NM if tier <= max_error_nm]
+    return fitting[-1] if fitting else None
+
+def lod_tiers(weights):
+    """[{"maxErrorNM", "points"}] for every tier of a polyline with these significances"""
+    return [{"maxErrorNM": tier, "points": int(np.count_nonzero(weights > tier))} for tier in TIERS_NM]
+
+def simplify(points, weights, tolerance_nm):
+    return [point for point, weight in zip(points, weights) if weight > tolerance_nm]
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the LOD tiers of a plan's polyline")
+    parser.add_argument("request", nargs="?", help="FFMRequest JSON file (default: a SFO-JFK route)")
+    parser.add_argument("--spacing", type=float, default=1.0, help="densify spacing in nm for the test polyline")
+    parser.add_argument("--check", action="store_true", help="verify each tier's error bound by brute force")
+    args = parser.parse_args()
+
+    if args.request:
+        with open(args.request) as f:
+            request = json.load(f)
+    else:
+        from plan_encoding import cross_country_request
+        request = cross_country_request()
+    route = parse_request(request)[0]
+    polyline, waypoint_index = densify(route, args.spacing)
+    started = time.perf_counter()
+    weights = significance(polyline, waypoint_index)
+    elapsed = time.perf_counter() - started
+    print(f"🧭 {len(polyline):,} points at {args.spacing:g} nm spacing, significance in {elapsed * 1e3:.1f}ms")
+    for tier in lod_tiers(weights):
+        line = f"   ≤ {tier['maxErrorNM']:<5g} nm: {tier['points']:>6,} points"
+        if args.check:
+            kept = np.flatnonzero(weights > tier["maxErrorNM"])
+            xy, lat = mercator(polyline)
+            segment = np.clip(np.searchsorted(kept, np.arange(len(polyline)), side="right") - 1, 0, len(kept) - 2)
+            error = segment_distance_nm(xy, xy[kept[segment]], xy[kept[segment + 1]], lat).max()
+            line += f" (worst {error:.3f} nm)"
+        print(line)
+
+if __name__ == "__main__":
+    sys.exit(main())
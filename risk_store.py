@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Risk Store
+Memory-mapped lat/lon/altitude/time grids of icing, turbulence and terrain risk
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from ffm_planner import DEFAULT_BOUNDS, hazard_risks
+from route_engine import leg_samples
+
+CHANNELS = ("icing", "turbulence", "terrain")
+DATA_FILE = "risk.npy"
+META_FILE = "risk.json"
+
+DEFAULT_ALTITUDES = tuple(range(0, 18001, 2000))
+FREEZING_LEVEL_FT = 9000
+TERRAIN_CLEARANCE_FT = 5000  # terrain risk reaches zero this far above the ground
+
+class RiskStore:
+    """Read-only view of a risk grid on disk
+
+    ``data`` is a memory map of shape (channel, time, altitude, lat, lon),
+    so every process that opens the same store shares the page cache and
+    opening is instant regardless of grid size.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.data = np.load(os.path.join(path, DATA_FILE), mmap_mode="r")
+        self.lat0, self.dlat = self.meta["lat0"], self.meta["dlat"]
+        self.lon0, self.dlon = self.meta["lon0"], self.meta["dlon"]
+        self.altitudes = np.asarray(self.meta["altitudes_ft"], dtype=np.float64)
+        self.times = np.asarray(self.meta["times"], dtype=np.float64)
+        self.epoch = self.meta["epoch"]
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def time_index(self, when=None):
+        """Index of the valid time nearest ``when`` (epoch seconds, default now)"""
+        when = time.time() if when is None else when
+        return int(np.abs(self.times - when).argmin())
+
+    def valid_until(self, when=None):
+        """Epoch seconds at which the slice picked for ``when`` stops being the nearest"""
+        index = self.time_index(when)
+        if index + 1 >= len(self.times):
+            return float("inf")
+        return float(self.times[index] + self.times[index + 1]) / 2
+
+    def sample(self, lat, lon, altitude_ft, when=None):
+        """Interpolated risks at points: an (N, 3) array of icing, turbulence, terrain
+
+        Linear in latitude, longitude and altitude, nearest in time. Points
+        outside the grid take the value at its edge.
+        """
+        lat, lon = np.atleast_1d(lat), np.atleast_1d(lon)
+        cube = self.data[:, self.time_index(when)]  # (channel, alt, lat, lon), still a memory map
+        _, n_alt, n_lat, n_lon = cube.shape
+
+        def axis(fraction, size):
+            fraction = np.clip(fraction, 0, size - 1)
+            lo = np.minimum(fraction.astype(np.int64), max(size - 2, 0))
+            return lo, np.minimum(lo + 1, size - 1), fraction - lo
+
+        y0, y1, wy = axis((lat - self.lat0) / self.dlat, n_lat)
+        x0, x1, wx = axis((lon - self.lon0) / self.dlon, n_lon)
+        a0, a1, wa = axis(np.interp(np.broadcast_to(altitude_ft, lat.shape), self.altitudes,
+                                    np.arange(n_alt, dtype=np.float64)), n_alt)
+
+        result = np.zeros((len(CHANNELS), len(lat)))
+        for a, weight_a in ((a0, 1 - wa), (a1, wa)):
+            for y, weight_y in ((y0, 1 - wy), (y1, wy)):
+                for x, weight_x in ((x0, 1 - wx), (x1, wx)):
+                    result += cube[:, a, y, x] * (weight_a * weight_y * weight_x)
+        return result.T
+
+    def leg_scores(self, batch, altitude_ft, when=None, spacing_nm=5.0):
+        """Worst risk along every leg of a RouteBatch: an (n_legs, 3) array"""
+        lat, lon, starts = leg_samples(batch, spacing_nm)
+        samples = self.sample(lat, lon, altitude_ft, when)
+        return np.maximum.reduceat(samples, starts[:-1], axis=0)
+
+def synthetic_slice(lat, lon, altitude_ft, hour):
+    """Risk channels at one altitude and UTC hour from the planner's synthetic fields
+
+    Icing peaks around the freezing level, turbulence follows an afternoon
+    diurnal cycle, and terrain risk falls off with clearance above the ground.
+    """
+    icing, turbulence, _, elevation = hazard_risks(lat, lon)
+    icing = icing * np.exp(-((altitude_ft - FREEZING_LEVEL_FT) / 5000) ** 2)
+    turbulence = turbulence * (0.75 + 0.25 * np.cos(2 * np.pi * (hour - 22) / 24))
+    terrain = np.clip(1 - (altitude_ft - elevation) / TERRAIN_CLEARANCE_FT, 0, 1)
+    return np.stack([icing, turbulence, terrain])
+
+def build_synthetic(path, bounds=DEFAULT_BOUNDS, resolution=0.05, altitudes=DEFAULT_ALTITUDES,
+                    hours=24, start=None, dtype="float16"):
+    """Write a synthetic store of hourly slices starting at ``start`` (default: this hour)"""
+    south, north, west, east = bounds
+    lats = np.arange(south, north + resolution / 2, resolution)
+    lons = np.arange(west, east + resolution / 2, resolution)
+    start = int(time.time() // 3600 * 3600) if start is None else int(start)
+    times = [start + 3600 * h for h in range(hours)]
+
+    os.makedirs(path, exist_ok=True)
+    shape = (len(CHANNELS), hours, len(altitudes), len(lats), len(lons))
+    data = open_memmap(os.path.join(path, DATA_FILE), mode="w+", dtype=dtype, shape=shape)
+    lat_grid, lon_grid = np.meshgrid(lats, lons, indexing="ij")
+    for t, valid in enumerate(times):
+        hour = datetime.fromtimestamp(valid, timezone.utc).hour
+        for a, altitude in enumerate(altitudes):
+            data[:, t, a] = synthetic_slice(lat_grid, lon_grid, altitude, hour)
+    data.flush()
+    del data
+
+    meta = {
+        "channels": list(CHANNELS),
+        "lat0": float(lats[0]), "dlat": resolution,
+        "lon0": float(lons[0]), "dlon": resolution,
+        "altitudes_ft": list(altitudes),
+        "times": times,
+        "dtype": dtype,
+        "epoch": f"synthetic-{start}",
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    with open(os.path.join(path, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+    return RiskStore(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the gridded FFM risk store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="write a synthetic store")
+    build.add_argument("path", help="store directory")
+    build.add_argument("--resolution", type=float, default=0.05, help="grid spacing in degrees")
+    build.add_argument("--hours", type=int, default=24, help="hourly time slices")
+    info = sub.add_parser("info", help="describe a store and time random sampling")
+    info.add_argument("path", help="store directory")
+    sample = sub.add_parser("sample", help="risks at one point")
+    sample.add_argument("path", help="store directory")
+    sample.add_argument("lat", type=float)
+    sample.add_argument("lon", type=float)
+    sample.add_argument("altitude", type=float, help="feet MSL")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.perf_counter()
+        store = build_synthetic(args.path, resolution=args.resolution, hours=args.hours)
+        size = os.path.getsize(os.path.join(args.path, DATA_FILE)) / (1024 * 1024)
+        print(f"✅ Built {store.epoch} {store.shape} ({size:.1f} MB) in {time.perf_counter() - started:.1f}s")
+        return
+
+    started = time.perf_counter()
+    store = RiskStore(args.path)
+    opened = time.perf_counter() - started
+    if args.command == "sample":
+        values = store.sample(args.lat, args.lon, args.altitude)[0]
+        print(json.dumps(dict(zip(CHANNELS, (round(float(v), 3) for v in values)))))
+        return
+
+    print(f"🗺️  {args.path}: epoch {store.epoch}, shape {store.shape}, opened in {opened * 1000:.2f}ms")
+    rng = np.random.default_rng(0)
+    n = 1_000_000
+    lat = rng.uniform(store.lat0, store.lat0 + store.dlat * (store.shape[3] - 1), n)
+    lon = rng.uniform(store.lon0, store.lon0 + store.dlon * (store.shape[4] - 1), n)
+    started = time.perf_counter()
+    store.sample(lat, lon, 8000)
+    elapsed = time.perf_counter() - started
+    print(f"⏱️ Sampled {n:,} points in {elapsed * 1000:.0f}ms ({elapsed / n * 1e9:.0f}ns/point)")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Risk Tiles
+Renders {z}/{x}/{y}.png risk heatmap tiles from the gridded risk store
+"""
+
+import argparse
+import hashlib
+import io
+import math
+import os
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from ffm_planner import CRUISE_ALTITUDE_FT
+from risk_store import CHANNELS, RiskStore
+
+TILE_SIZE = 256
+SAMPLES = 64  # risk grid points per tile side; upscaled to TILE_SIZE
+LAYERS = ("risk",) + CHANNELS  # "risk" is the worst of the three channels
+PRERENDER_MAX_ZOOM = 8
+MAX_ZOOM = 14
+
+# Risk -> RGBA colour stops: transparent when benign, green to red as risk grows
+STOPS = np.array([0.0, 0.2, 0.4, 0.6, 1.0])
+COLORS = np.array([
+    [0, 0, 0, 0],
+    [46, 204, 113, 60],
+    [241, 196, 15, 120],
+    [230, 126, 34, 160],
+    [231, 76, 60, 200],
+], dtype=np.float64)
+
+def tile_bounds(z, x, y):
+    """(north, south, west, east) of a Web Mercator tile in degrees"""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+    return lat(y), lat(y + 1), x / n * 360 - 180, (x + 1) / n * 360 - 180
+
+def tiles_covering(bounds, z):
+    """(x, y) of every tile at zoom z that overlaps (south, north, west, east)"""
+    south, north, west, east = bounds
+    n = 2 ** z
+
+    def row(lat):
+        lat = math.radians(lat)
+        return int((1 - math.log(math.tan(lat) + 1 / math.cos(lat)) / math.pi) / 2 * n)
+    x0, x1 = int((west + 180) / 360 * n), int((east + 180) / 360 * n)
+    y0, y1 = row(north), row(south)
+    return [(x, y) for x in range(x0, min(x1, n - 1) + 1) for y in range(y0, min(y1, n - 1) + 1)]
+
+def colorize(values):
+    """Map risk values in 0..1 to an RGBA uint8 image array"""
+    rgba = np.stack([np.interp(values, STOPS, COLORS[:, c]) for c in range(4)], axis=-1)
+    return rgba.round().astype(np.uint8)
+
+def encode_png(rgba):
+    buffer = io.BytesIO()
+    Image.fromarray(rgba, "RGBA").save(buffer, "PNG", optimize=False, compress_level=6)
+    return buffer.getvalue()
+
+def etag_for(body):
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+EMPTY_TILE = encode_png(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
+EMPTY_ETAG = etag_for(EMPTY_TILE)
+
+def slice_dir(tile_dir, store, index):
+    """Pre-rendered tiles of one time slice: <tile_dir>/<epoch>/<slice>"""
+    return os.path.join(tile_dir, store.epoch, str(index))
+
+class TileRenderer:
+    """Risk tiles for one store, sampled at cruise altitude and one hourly time slice"""
+
+    def __init__(self, store, altitude_ft=CRUISE_ALTITUDE_FT):
+        self.store = store
+        self.altitude_ft = altitude_ft
+        rows, cols = store.shape[3], store.shape[4]
+        self.bounds = (store.lat0, store.lat0 + store.dlat * (rows - 1),
+                       store.lon0, store.lon0 + store.dlon * (cols - 1))
+
+    def covers(self, z, x, y):
+        north, south, west, east = tile_bounds(z, x, y)
+        s, n, w, e = self.bounds
+        return south < n and north > s and west < e and east > w
+
+    def render(self, layer, z, x, y, index=None):
+        """PNG bytes for one tile at time slice ``index`` (default: the current one)
+
+        Tiles outside the store are transparent.
+        """
+        if not self.covers(z, x, y):
+            return EMPTY_TILE
+        north, south, west, east = tile_bounds(z, x, y)
+        # Pixel centres, evenly spaced in Mercator y so rows line up with the map
+        n = 2 ** z
+        rows = y + (np.arange(SAMPLES) + 0.5) / SAMPLES
+        lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * rows / n))))
+        lons = west + (np.arange(SAMPLES) + 0.5) / SAMPLES * (east - west)
+        lat_grid, lon_grid = np.meshgrid(lats, lons, indexing="ij")
+        when = None if index is None else float(self.store.times[index])
+        samples = self.store.sample(lat_grid.ravel(), lon_grid.ravel(), self.altitude_ft, when)
+        values = samples.max(axis=1) if layer == "risk" else samples[:, CHANNELS.index(layer)]
+
+        # Outside the grid the store clamps to its edge; blank those pixels instead
+        s, nn, w, e = self.bounds
+        inside = ((lat_grid.ravel() >= s) & (lat_grid.ravel() <= nn)
+                  & (lon_grid.ravel() >= w) & (lon_grid.ravel() <= e))
+        values = np.where(inside, values, 0.0).reshape(SAMPLES, SAMPLES)
+        image = Image.fromarray(colorize(values), "RGBA").resize((TILE_SIZE, TILE_SIZE), Image.BILINEAR)
+        return encode_png(np.asarray(image))
+
+class TileCache:
+    """Bounded LRU of encoded tiles keyed by (epoch, slice, layer, z, x, y), with byte accounting"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, body):
+        entry = (body, etag_for(body))
+        if key in self.entries:
+            self.bytes -= len(self.entries.pop(key)[0])
+        self.entries[key] = entry
+        self.bytes += len(body)
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            _, (old, _) = self.entries.popitem(last=False)
+            self.bytes -= len(old)
+        return entry
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"tiles": len(self.entries), "bytes": self.bytes, "hits": self.hits,
+                "misses": self.misses, "hit_rate": round(self.hits / total, 4) if total else None}
+
+class TileService:
+    """Pre-rendered low zooms plus on-demand rendering behind the LRU
+
+    Pre-rendered tiles are kept outside the LRU so a pan storm at high zoom
+    cannot evict them. Concurrent requests for a tile that is still being
+    rendered wait on the same render instead of starting another. Tiles
+    follow the store's current hourly slice, as plans do: when the hour
+    moves on, the pyramid is reloaded from disk or rebuilt off the event
+    loop, and until then the new slice's tiles render on demand.
+    """
+
+    def __init__(self, store, tile_dir=None, prerender_zoom=PRERENDER_MAX_ZOOM, cache_bytes=64 * 1024 * 1024):
+        self.store = store
+        self.renderer = TileRenderer(store)
+        self.epoch = store.epoch
+        self.tile_dir = tile_dir
+        self.cache = TileCache(cache_bytes)
+        self.inflight = {}
+        self.renders = 0
+        self.prerender_zoom = prerender_zoom
+        self.slice = store.time_index()
+        self.pyramid = self.load_pyramid(self.slice) if self.has_pyramid(self.slice) else {}
+        missing = [key for key in self.pyramid_keys() if key not in self.pyramid]
+        if self.pyramid and missing:
+            print(f"⚠️  {len(missing)} pre-rendered tiles missing from {tile_dir}, rendering them")
+        self.pyramid.update(self.render_pyramid(self.slice, missing))
+        self.rebuilding = None  # slice whose pyramid is being rendered in the background
+
+    def version(self):
+        """Cache-busting tag for tile URLs: the store epoch and the current slice"""
+        return f"{self.epoch}.{self.store.time_index()}"
+
+    def pyramid_keys(self):
+        for layer in LAYERS:
+            for z in range(self.prerender_zoom + 1):
+                for x, y in tiles_covering(self.renderer.bounds, z):
+                    yield layer, z, x, y
+
+    def has_pyramid(self, index):
+        return bool(self.tile_dir) and os.path.isdir(slice_dir(self.tile_dir, self.store, index))
+
+    def render_pyramid(self, index, keys=None):
+        pyramid = {}
+        for key in self.pyramid_keys() if keys is None else keys:
+            body = self.renderer.render(*key, index)
+            pyramid[key] = (body, etag_for(body))
+        return pyramid
+
+    def load_pyramid(self, index):
+        pyramid = {}
+        for layer, z, x, y in self.pyramid_keys():
+            path = os.path.join(slice_dir(self.tile_dir, self.store, index), layer, str(z), str(x), f"{y}.png")
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    body = f.read()
+                pyramid[(layer, z, x, y)] = (body, etag_for(body))
+        return pyramid
+
+    def current_slice(self, loop):
+        """The store's current slice; swaps the pyramid over when the hour has moved on"""
+        index = self.store.time_index()
+        if index != self.slice:
+            self.slice, self.pyramid = index, {}
+            self.rebuilding = index
+            build = self.load_pyramid if self.has_pyramid(index) else self.render_pyramid
+            future = loop.run_in_executor(None, build, index)
+
+            def install(done):
+                if self.rebuilding == index:
+                    self.rebuilding = None
+                    if self.slice == index and not done.cancelled() and done.exception() is None:
+                        self.pyramid = done.result()
+            future.add_done_callback(install)
+        return index
+
+    async def tile(self, layer, z, x, y, loop):
+        """(body, etag) for a tile of the current slice, rendering off the event loop on a miss"""
+        index = self.current_slice(loop)
+        key = (layer, z, x, y)
+        if key in self.pyramid:
+            return self.pyramid[key]
+        if not self.renderer.covers(z, x, y):
+            return EMPTY_TILE, EMPTY_ETAG
+        cache_key = (self.epoch, index) + key
+        entry = self.cache.get(cache_key)
+        if entry is not None:
+            return entry
+        pending = self.inflight.get(cache_key)
+        if pending is None:
+            pending = loop.run_in_executor(None, self.renderer.render, layer, z, x, y, index)
+            self.inflight[cache_key] = pending
+            self.renders += 1
+            try:
+                body = await pending
+            finally:
+                del self.inflight[cache_key]
+            return self.cache.put(cache_key, body)
+        await pending
+        return self.cache.get(cache_key) or self.cache.put(cache_key, pending.result())
+
+    def stats(self):
+        return {"epoch": self.epoch, "slice": self.slice, "pyramid_tiles": len(self.pyramid),
+                "rebuilding": self.rebuilding is not None, "renders": self.renders, **self.cache.stats()}
+
+def prerender(store, out_dir, max_zoom=PRERENDER_MAX_ZOOM, slices=None):
+    """Write the low-zoom pyramid of every slice to out_dir/<epoch>/<slice>/<layer>/<z>/<x>/<y>.png"""
+    renderer = TileRenderer(store)
+    count = 0
+    for index in range(len(store.times)) if slices is None else slices:
+        for layer in LAYERS:
+            for z in range(max_zoom + 1):
+                for x, y in tiles_covering(renderer.bounds, z):
+                    path = os.path.join(slice_dir(out_dir, store, index), layer, str(z), str(x), f"{y}.png")
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, "wb") as f:
+                        f.write(renderer.render(layer, z, x, y, index))
+                    count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render risk tiles from a risk store")
+    parser.add_argument("store", help="risk store directory")
+    parser.add_argument("out", help="tile directory")
+    parser.add_argument("--max-zoom", type=int, default=PRERENDER_MAX_ZOOM, help="deepest pre-rendered zoom")
+    parser.add_argument("--slices", help="comma-separated time slice indices (default: all of the store's hours)")
+    args = parser.parse_args()
+
+    store = RiskStore(args.store)
+    slices = [int(index) for index in args.slices.split(",")] if args.slices else None
+    started = time.perf_counter()
+    count = prerender(store, args.out, args.max_zoom, slices)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Rendered {count} tiles for {store.epoch} in {elapsed:.1f}s "
+          f"({elapsed / max(count, 1) * 1000:.1f}ms/tile) → {args.out}/{store.epoch}/")
+
+if __name__ == "__main__":
+    sys.exit(main())
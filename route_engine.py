@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Route Engine
+Batched great-circle distance, bearing, ETE, fuel and densification with NumPy
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+EARTH_RADIUS_NM = 3440.065  # same radius as RoutePlan.haversineNM
+
+class RouteBatch:
+    """Many routes of different lengths stored as flat coordinate arrays
+
+    ``lat``/``lon`` hold every waypoint of every route back to back in
+    degrees, and ``offsets[r]:offsets[r + 1]`` is the slice of route r.
+    Legs are formed between neighbouring points, with the legs that would
+    join one route to the next masked out.
+    """
+
+    def __init__(self, lat, lon, offsets):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.lengths = np.diff(self.offsets)
+        # route index of every point and of every candidate leg (point i -> i + 1)
+        self.route_of_point = np.repeat(np.arange(len(self.lengths)), self.lengths)
+        self.leg_mask = self.route_of_point[:-1] == self.route_of_point[1:]
+
+    @classmethod
+    def from_routes(cls, routes):
+        """Build from a list of [(lat, lon), ...] or (N, 2) arrays"""
+        arrays = [np.asarray(r, dtype=np.float64).reshape(-1, 2) for r in routes]
+        offsets = np.concatenate([[0], np.cumsum([len(a) for a in arrays])])
+        points = np.concatenate(arrays) if arrays else np.zeros((0, 2))
+        return cls(points[:, 0], points[:, 1], offsets)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def route(self, r):
+        """(N, 2) lat/lon array of route r"""
+        s = slice(self.offsets[r], self.offsets[r + 1])
+        return np.column_stack([self.lat[s], self.lon[s]])
+
+    def legs(self):
+        """Start and end point indices of every real leg"""
+        start = np.nonzero(self.leg_mask)[0]
+        return start, start + 1
+
+    def leg_route(self):
+        """Route index of every real leg"""
+        return self.route_of_point[:-1][self.leg_mask]
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Vectorized RoutePlan.haversineNM: same formula and radius, any broadcastable shapes"""
+    la1, la2 = np.radians(lat1), np.radians(lat2)
+    dlat = la2 - la1
+    dlon = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    h = np.sin(dlat / 2) ** 2 + np.cos(la1) * np.cos(la2) * np.sin(dlon / 2) ** 2
+    return EARTH_RADIUS_NM * 2 * np.arctan2(np.sqrt(h), np.sqrt(1 - h))
+
+def initial_bearing(lat1, lon1, lat2, lon2):
+    """True course in degrees 0..360 at the start of each great-circle leg"""
+    la1, la2 = np.radians(lat1), np.radians(lat2)
+    dlon = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    y = np.sin(dlon) * np.cos(la2)
+    x = np.cos(la1) * np.sin(la2) - np.sin(la1) * np.cos(la2) * np.cos(dlon)
+    return np.degrees(np.arctan2(y, x)) % 360
+
+def per_route(values, batch):
+    """Broadcast a scalar or per-route array of parameters to one value per route"""
+    return np.broadcast_to(np.asarray(values, dtype=np.float64), (len(batch),))
+
+def leg_table(batch):
+    """Distance and initial bearing of every leg of every route"""
+    a, b = batch.legs()
+    return {
+        "route": batch.leg_route(),
+        "distance_nm": haversine(batch.lat[a], batch.lon[a], batch.lat[b], batch.lon[b]),
+        "bearing_deg": initial_bearing(batch.lat[a], batch.lon[a], batch.lat[b], batch.lon[b]),
+    }
+
+def route_summary(batch, ktas=120.0, fuel_burn=8.5):
+    """RoutePlan totals per route, plus cumulative time and fuel at every waypoint
+
+    ``ktas`` and ``fuel_burn`` are scalars or one value per route; the
+    defaults match RoutePlan. As in Swift, a route with fewer than two
+    waypoints has zero distance, and a non-positive airspeed gives zero time.
+    """
+    legs = leg_table(batch)
+    ktas, fuel_burn = per_route(ktas, batch), per_route(fuel_burn, batch)
+
+    total = np.bincount(legs["route"], weights=legs["distance_nm"], minlength=len(batch))
+    safe_ktas = np.where(ktas > 0, ktas, np.inf)
+    seconds = total / safe_ktas * 3600
+    fuel = seconds / 3600 * fuel_burn
+
+    # Cumulative distance at each waypoint: a running sum that restarts at every route
+    step = np.zeros(len(batch.lat))
+    step[1:][batch.leg_mask] = legs["distance_nm"]
+    running = np.cumsum(step)
+    starts = batch.offsets[:-1][batch.lengths > 0]
+    cumulative = running - np.repeat(running[starts], batch.lengths[batch.lengths > 0])
+    point_ktas = safe_ktas[batch.route_of_point]
+    cumulative_s = cumulative / point_ktas * 3600
+    return {
+        "total_distance_nm": total,
+        "estimated_time_s": seconds,
+        "fuel_required_gal": fuel,
+        "cumulative_distance_nm": cumulative,
+        "cumulative_time_s": cumulative_s,
+        "cumulative_fuel_gal": cumulative_s / 3600 * fuel_burn[batch.route_of_point],
+        "legs": legs,
+    }
+
+def interpolate_legs(batch, spacing_nm, include_end=False):
+    """Great-circle points along every leg, no more than spacing_nm apart
+
+    Returns (lat, lon, leg, steps): one row per point with the index of the
+    leg it lies on, and the number of intervals each leg was split into.
+    Each leg starts at its first waypoint; its second waypoint is included
+    only with ``include_end``.
+    """
+    a, b = batch.legs()
+    distance = haversine(batch.lat[a], batch.lon[a], batch.lat[b], batch.lon[b])
+    steps = np.maximum(1, np.ceil(distance / spacing_nm)).astype(np.int64)
+    per_leg = steps + 1 if include_end else steps
+
+    # One row per emitted point: leg index and fraction t in [0, 1]
+    leg = np.repeat(np.arange(len(a)), per_leg)
+    first = np.repeat(np.cumsum(per_leg) - per_leg, per_leg)
+    t = (np.arange(len(leg)) - first) / steps[leg]
+
+    la1, lo1 = np.radians(batch.lat[a]), np.radians(batch.lon[a])
+    la2, lo2 = np.radians(batch.lat[b]), np.radians(batch.lon[b])
+    va = np.stack([np.cos(la1) * np.cos(lo1), np.cos(la1) * np.sin(lo1), np.sin(la1)], axis=1)
+    vb = np.stack([np.cos(la2) * np.cos(lo2), np.cos(la2) * np.sin(lo2), np.sin(la2)], axis=1)
+    omega = distance / EARTH_RADIUS_NM
+    sin_omega = np.sin(omega)
+    degenerate = sin_omega[leg] < 1e-12
+    with np.errstate(invalid="ignore", divide="ignore"):
+        wa = np.where(degenerate, 1 - t, np.sin((1 - t) * omega[leg]) / sin_omega[leg])
+        wb = np.where(degenerate, t, np.sin(t * omega[leg]) / sin_omega[leg])
+    v = wa[:, None] * va[leg] + wb[:, None] * vb[leg]
+    lat = np.degrees(np.arctan2(v[:, 2], np.hypot(v[:, 0], v[:, 1])))
+    lon = np.degrees(np.arctan2(v[:, 1], v[:, 0]))
+    return lat, lon, leg, steps
+
+def leg_samples(batch, spacing_nm):
+    """Points along every leg including both ends, for per-leg reductions
+
+    Returns (lat, lon, starts): samples of leg i are ``starts[i]:starts[i + 1]``,
+    ready for ``np.maximum.reduceat(values, starts[:-1])``.
+    """
+    lat, lon, _, steps = interpolate_legs(batch, spacing_nm, include_end=True)
+    return lat, lon, np.concatenate([[0], np.cumsum(steps + 1)])
+
+def densify(batch, spacing_nm=10.0):
+    """Intermediate great-circle points no more than spacing_nm apart
+
+    Returns a new RouteBatch with every original waypoint kept and extra
+    points inserted on each leg by spherical linear interpolation.
+    """
+    lat, lon, _, steps = interpolate_legs(batch, spacing_nm)
+
+    # Each route's final waypoint closes its point list
+    route_of_leg = batch.leg_route()
+    emitted = np.bincount(route_of_leg, weights=steps, minlength=len(batch)).astype(np.int64)
+    lengths = emitted + (batch.lengths > 0)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    out_lat, out_lon = np.empty(offsets[-1]), np.empty(offsets[-1])
+    last = offsets[1:][batch.lengths > 0] - 1
+    interior = np.ones(offsets[-1], dtype=bool)
+    interior[last] = False
+    out_lat[interior], out_lon[interior] = lat, lon
+    out_lat[last] = batch.lat[batch.offsets[1:][batch.lengths > 0] - 1]
+    out_lon[last] = batch.lon[batch.offsets[1:][batch.lengths > 0] - 1]
+    return RouteBatch(out_lat, out_lon, offsets)
+
+def random_routes(count, min_points=2, max_points=8, seed=0):
+    """Synthetic Western US routes for benchmarks and checks"""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(min_points, max_points + 1, count)
+    total = int(lengths.sum())
+    lat = rng.uniform(32.0, 42.0, total)
+    lon = rng.uniform(-124.0, -114.0, total)
+    return RouteBatch(lat, lon, np.concatenate([[0], np.cumsum(lengths)]))
+
+def check_against_scalar(batch, ktas=120.0, fuel_burn=8.5, sample=500):
+    """Largest absolute differences from the scalar Swift-formula port"""
+    from ffm_planner import haversine_nm
+    summary = route_summary(batch, ktas, fuel_burn)
+    worst = {"distance_nm": 0.0, "time_s": 0.0, "fuel_gal": 0.0}
+    for r in range(min(sample, len(batch))):
+        points = batch.route(r)
+        distance = sum(haversine_nm(*p, *q) for p, q in zip(points, points[1:]))
+        seconds = distance / ktas * 3600 if ktas > 0 else 0
+        worst["distance_nm"] = max(worst["distance_nm"], abs(distance - summary["total_distance_nm"][r]))
+        worst["time_s"] = max(worst["time_s"], abs(seconds - summary["estimated_time_s"][r]))
+        worst["fuel_gal"] = max(worst["fuel_gal"], abs(seconds / 3600 * fuel_burn - summary["fuel_required_gal"][r]))
+    return worst
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch route distance, ETE and fuel")
+    parser.add_argument("routes", nargs="?", help="JSON list of routes, each a list of {lat, lon} (default: benchmark)")
+    parser.add_argument("--ktas", type=float, default=120.0, help="true airspeed (RoutePlan default 120)")
+    parser.add_argument("--fuel-burn", type=float, default=8.5, help="gallons per hour (RoutePlan default 8.5)")
+    parser.add_argument("--spacing", type=float, default=10.0, help="densification spacing in nm")
+    parser.add_argument("--count", type=int, default=200_000, help="benchmark route count")
+    args = parser.parse_args()
+
+    if args.routes:
+        with open(args.routes) as f:
+            routes = [[(w["lat"], w["lon"]) for w in route] for route in json.load(f)]
+        batch = RouteBatch.from_routes(routes)
+        summary = route_summary(batch, args.ktas, args.fuel_burn)
+        json.dump([{
+            "totalDistance": float(summary["total_distance_nm"][r]),
+            "estimatedTime": float(summary["estimated_time_s"][r]),
+            "fuelRequired": float(summary["fuel_required_gal"][r]),
+        } for r in range(len(batch))], sys.stdout, indent=2)
+        print()
+        return
+
+    batch = random_routes(args.count)
+    print(f"🧮 {len(batch):,} routes, {len(batch.lat):,} waypoints")
+    started = time.perf_counter()
+    route_summary(batch, args.ktas, args.fuel_burn)
+    summarized = time.perf_counter()
+    dense = densify(batch, args.spacing)
+    densified = time.perf_counter()
+    print(f"⏱️ Distance/ETE/fuel in {(summarized - started) * 1000:.0f}ms, "
+          f"densified to {len(dense.lat):,} points in {(densified - summarized) * 1000:.0f}ms")
+    worst = check_against_scalar(batch, args.ktas, args.fuel_burn)
+    print(f"✅ Max difference from the scalar formula: {worst['distance_nm']:.2e} nm, "
+          f"{worst['time_s']:.2e} s, {worst['fuel_gal']:.2e} gal")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Route Optimizer
+Wind- and risk-aware A* between waypoints over a precomputed lat/lon cost grid
+"""
+
+import argparse
+import heapq
+import json
+import math
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import ffm_planner
+from ffm_planner import (CRUISE_ALTITUDE_FT, DEFAULT_BOUNDS, MODERATE, EARTH_RADIUS_NM, PlanError, densify,
+                         hazard_risks, parse_request)
+
+GRID_RESOLUTION_DEG = 0.1
+RISK_WEIGHT = 4.0  # a leg through risk 1.0 costs this much more than its flying time
+MIN_GROUND_SPEED_KT = 30.0  # edges slower than this into the wind are not flown
+PATH_SAMPLE_NM = 5.0  # spacing at which finished paths are costed
+# 16 neighbours: the 8 around a node plus knight moves, so courses come in steps of about 22.5°
+MOVES = ((0, 1), (1, 2), (1, 1), (2, 1), (1, 0), (2, -1), (1, -1), (1, -2),
+         (0, -1), (-1, -2), (-1, -1), (-2, -1), (-1, 0), (-2, 1), (-1, 1), (-1, 2))
+OBJECTIVES = ("time", "fuel")
+COST_CACHE_SIZE = 8  # airspeeds whose edge costs are kept per grid
+
+GRID = None  # CostGrid for the current risk data, see cost_grid
+
+def wind_speed_kt(altitude_ft):
+    """Reference wind speed at an altitude; the whole synthetic wind field scales with it"""
+    return 10 + 3 * altitude_ft / 1000
+
+def winds_aloft(lat, lon, altitude_ft):
+    """Synthetic winds (east, north) in knots: westerlies strengthening with height, a jet core near 40°N
+    and a trough over the Sierra"""
+    speed = wind_speed_kt(altitude_ft)
+    east = speed * (0.6 + 0.4 * np.exp(-((lat - 40.0) / 2.5) ** 2))
+    north = 0.35 * speed * np.sin((lon + 121.0) / 3.0 * np.pi)
+    return east, north
+
+def distance_nm(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.clip(h, 0, 1)))
+
+def ground_speed(ktas, tail, cross):
+    """Wind triangle: the heading corrects for crosswind, the tail component adds on"""
+    return np.sqrt(np.maximum(ktas ** 2 - cross ** 2, 0)) + tail
+
+def wind_components(lat1, lon1, lat2, lon2, east, north):
+    """(tail, cross) wind along the course from point 1 to point 2"""
+    dx = (lon2 - lon1) * np.cos(np.radians((lat1 + lat2) / 2))
+    dy = lat2 - lat1
+    norm = np.maximum(np.hypot(dx, dy), 1e-12)
+    dx, dy = dx / norm, dy / norm
+    return east * dx + north * dy, np.abs(north * dx - east * dy)
+
+class CostGrid:
+    """Winds and risk penalties on a regular lat/lon grid, with every edge's airspeed-independent terms
+
+    Node ``row * cols + col`` sits at (lat0 + row * step, lon0 + col * step).
+    For each of the 16 MOVES, ``distance``, ``tail`` and ``cross`` hold the
+    edge length and wind components from every node, and ``penalty`` the
+    risk multiplier (mean of both ends). Edges leaving the grid are inf.
+    Only the wind triangle, which needs the airspeed, is left for query time.
+    """
+
+    def __init__(self, bounds=DEFAULT_BOUNDS, resolution=GRID_RESOLUTION_DEG, altitude_ft=CRUISE_ALTITUDE_FT,
+                 store=None):
+        south, north, west, east = bounds
+        self.bounds, self.step, self.altitude_ft = bounds, resolution, altitude_ft
+        self.lats = np.arange(south, north + resolution / 2, resolution)
+        self.lons = np.arange(west, east + resolution / 2, resolution)
+        self.rows, self.cols = len(self.lats), len(self.lons)
+        lat, lon = (g.ravel() for g in np.meshgrid(self.lats, self.lons, indexing="ij"))
+        self.lat, self.lon = lat, lon
+        self.wind_east, self.wind_north = winds_aloft(lat, lon, altitude_ft)
+        if store is not None:
+            risk = store.sample(lat, lon, altitude_ft).max(axis=1)
+        else:
+            risk = np.max(hazard_risks(lat, lon)[:3], axis=0)
+        self.risk = risk
+        self.node_penalty = node_penalty = 1 + RISK_WEIGHT * np.clip((risk - MODERATE) / (1 - MODERATE), 0, None)
+
+        n = self.rows * self.cols
+        row, col = np.divmod(np.arange(n), self.cols)
+        self.deltas = [dy * self.cols + dx for dy, dx in MOVES]
+        self.distance = np.full((len(MOVES), n), np.inf)
+        self.tail = np.zeros((len(MOVES), n))
+        self.cross = np.zeros((len(MOVES), n))
+        self.penalty = np.ones((len(MOVES), n))
+        for k, (dy, dx) in enumerate(MOVES):
+            ok = (row + dy >= 0) & (row + dy < self.rows) & (col + dx >= 0) & (col + dx < self.cols)
+            a = np.flatnonzero(ok)
+            b = a + self.deltas[k]
+            self.distance[k, a] = distance_nm(lat[a], lon[a], lat[b], lon[b])
+            self.tail[k, a], self.cross[k, a] = wind_components(
+                lat[a], lon[a], lat[b], lon[b],
+                (self.wind_east[a] + self.wind_east[b]) / 2, (self.wind_north[a] + self.wind_north[b]) / 2)
+            self.penalty[k, a] = (node_penalty[a] + node_penalty[b]) / 2
+        self.max_tail = float(self.tail[np.isfinite(self.distance)].max())
+        self.costs = OrderedDict()
+
+    def contains(self, lat, lon):
+        south, north, west, east = self.bounds
+        return south <= lat <= north and west <= lon <= east
+
+    def node(self, lat, lon):
+        row = int(round((lat - self.lats[0]) / self.step))
+        col = int(round((lon - self.lons[0]) / self.step))
+        return min(max(row, 0), self.rows - 1) * self.cols + min(max(col, 0), self.cols - 1)
+
+    def edge_costs(self, ktas):
+        """Per-move lists of penalized flying hours for an airspeed, cached for recent airspeeds"""
+        costs = self.costs.get(ktas)
+        if costs is None:
+            speed = ground_speed(ktas, self.tail, self.cross)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                hours = np.where(speed >= MIN_GROUND_SPEED_KT, self.distance / speed, np.inf) * self.penalty
+            costs = list(zip(self.deltas, hours.tolist()))
+            self.costs[ktas] = costs
+            if len(self.costs) > COST_CACHE_SIZE:
+                self.costs.popitem(last=False)
+        else:
+            self.costs.move_to_end(ktas)
+        return costs
+
+    def search(self, start, goal, ktas):
+        """Cheapest node path from start to goal by A*: (nodes, expanded)
+
+        The heuristic is the great-circle distance flown at airspeed plus the
+        strongest tailwind with no risk penalty, which never overestimates.
+        """
+        costs = self.edge_costs(ktas)
+        goal_lat, goal_lon = self.lat[goal], self.lon[goal]
+        fastest = ktas + max(self.max_tail, 0.0)
+        heuristic = (distance_nm(self.lat, self.lon, goal_lat, goal_lon) / fastest).tolist()
+        best = {start: 0.0}
+        parent = {start: -1}
+        closed = set()
+        heap = [(heuristic[start], start)]
+        while heap:
+            _, node = heapq.heappop(heap)
+            if node == goal:
+                break
+            if node in closed:
+                continue
+            closed.add(node)
+            cost = best[node]
+            for delta, hours in costs:
+                edge = hours[node]
+                if edge == math.inf:
+                    continue
+                neighbour = node + delta
+                total = cost + edge
+                if total < best.get(neighbour, math.inf):
+                    best[neighbour] = total
+                    parent[neighbour] = node
+                    heapq.heappush(heap, (total + heuristic[neighbour], neighbour))
+        if goal not in parent:
+            return None, len(closed)
+        path = [goal]
+        while parent[path[-1]] != -1:
+            path.append(parent[path[-1]])
+        return path[::-1], len(closed)
+
+    def sample(self, field, lat, lon):
+        """Bilinear value of a per-node field at points"""
+        y = np.clip((np.asarray(lat) - self.lats[0]) / self.step, 0, self.rows - 1)
+        x = np.clip((np.asarray(lon) - self.lons[0]) / self.step, 0, self.cols - 1)
+        y0, x0 = np.minimum(y.astype(int), self.rows - 2), np.minimum(x.astype(int), self.cols - 2)
+        wy, wx = y - y0, x - x0
+        grid = field.reshape(self.rows, self.cols)
+        return (grid[y0, x0] * (1 - wy) * (1 - wx) + grid[y0, x0 + 1] * (1 - wy) * wx
+                + grid[y0 + 1, x0] * wy * (1 - wx) + grid[y0 + 1, x0 + 1] * wy * wx)
+
+    def inside(self, lat, lon):
+        south, north, west, east = self.bounds
+        return (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+
+    def winds(self, lat, lon, altitude_ft=None):
+        """Grid winds (east, north) at points, scaled to ``altitude_ft`` when given; still air outside the grid"""
+        scale = self.inside(lat, lon)
+        if altitude_ft is not None:
+            scale = scale * (wind_speed_kt(altitude_ft) / wind_speed_kt(self.altitude_ft))
+        return self.sample(self.wind_east, lat, lon) * scale, self.sample(self.wind_north, lat, lon) * scale
+
+    def path_hours(self, points, ktas, penalized=False):
+        """Hours to fly a polyline through the grid's winds, times the risk penalty when asked
+
+        Segments are split every PATH_SAMPLE_NM; outside the grid the air is
+        still and there is no penalty.
+        """
+        lat, lon = np.asarray(densify(points, PATH_SAMPLE_NM)[0]).T
+        lat1, lon1, lat2, lon2 = lat[:-1], lon[:-1], lat[1:], lon[1:]
+        mid_lat, mid_lon = (lat1 + lat2) / 2, (lon1 + lon2) / 2
+        tail, cross = wind_components(lat1, lon1, lat2, lon2, *self.winds(mid_lat, mid_lon))
+        speed = np.maximum(ground_speed(ktas, tail, cross), MIN_GROUND_SPEED_KT)
+        hours = distance_nm(lat1, lon1, lat2, lon2) / speed
+        if penalized:
+            hours = hours * np.where(self.inside(mid_lat, mid_lon), self.sample(self.node_penalty, mid_lat, mid_lon), 1)
+        return float(hours.sum())
+
+    def smooth(self, points, ktas):
+        """Drop grid corners wherever flying straight past them costs no more (any-angle shortcuts)"""
+        kept, i = [points[0]], 0
+        while i < len(points) - 1:
+            j = len(points) - 1
+            while j > i + 1 and (self.path_hours([points[i], points[j]], ktas, True)
+                                 > self.path_hours(points[i:j + 1], ktas, True)):
+                j -= 1
+            kept.append(points[j])
+            i = j
+        return kept
+
+def cost_grid():
+    """CostGrid for the loaded risk store (or the synthetic fields), rebuilt when the store's hour changes"""
+    global GRID
+    store = ffm_planner.RISK_STORE
+    key = None if store is None else (store.epoch, store.time_index())
+    if GRID is None or GRID.key != key:
+        if store is None:
+            bounds = DEFAULT_BOUNDS
+        else:
+            south, west = store.lat0, store.lon0
+            bounds = (south, south + store.dlat * (store.shape[3] - 1), west, west + store.dlon * (store.shape[4] - 1))
+        GRID = CostGrid(bounds, store=store)
+        GRID.key = key
+    return GRID
+
+def optimize_route(route, ktas, fuel_burn, objective="time"):
+    """Wind-optimal path for every leg of a route
+
+    Returns a dict with ``paths`` (one densified [(lat, lon)] per leg,
+    waypoints kept so leg indices still match the request), ``hours``,
+    ``fuel`` and risk-weighted ``risk_hours``, and the same figures for the
+    great-circle route. Fuel burn is a constant rate in
+    FFMRequest, so the fuel-optimal path is the time-optimal one; both
+    objectives are accepted so clients can say what they care about. Legs
+    with an end outside the grid stay on the great circle.
+    """
+    if objective not in OBJECTIVES:
+        raise PlanError(f"optimize must be one of {', '.join(OBJECTIVES)}")
+    grid = cost_grid()
+    paths, expanded, optimized = [], 0, 0
+    for a, b in zip(route, route[1:]):
+        nodes = None
+        if grid.contains(*a) and grid.contains(*b):
+            nodes, count = grid.search(grid.node(*a), grid.node(*b), ktas)
+            expanded += count
+        if nodes is None or len(nodes) < 2:
+            paths.append(densify([a, b])[0])
+            continue
+        optimized += 1
+        # Keep only the nodes where the course changes, and the exact waypoints at the ends
+        turns = [n for i, n in enumerate(nodes[1:-1], 1) if n - nodes[i - 1] != nodes[i + 1] - n]
+        path = grid.smooth([a] + [(float(grid.lat[n]), float(grid.lon[n])) for n in turns] + [b], ktas)
+        # Never hand back something worse than the great circle the grid was meant to improve on
+        direct = [a, b]
+        if grid.path_hours(direct, ktas, True) <= grid.path_hours(path, ktas, True):
+            path = direct
+        paths.append(densify(path)[0])
+    hours = sum(grid.path_hours(path, ktas) for path in paths)
+    direct = densify(route)[0]
+    direct_hours = grid.path_hours(direct, ktas)
+    return {"paths": paths, "hours": hours, "fuel": hours * fuel_burn,
+            "risk_hours": sum(grid.path_hours(path, ktas, True) for path in paths),
+            "direct_hours": direct_hours, "direct_fuel": direct_hours * fuel_burn,
+            "direct_risk_hours": grid.path_hours(direct, ktas, True),
+            "optimized_legs": optimized, "expanded": expanded}
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimize a request's route through winds and risk")
+    parser.add_argument("request", help="FFMRequest JSON file")
+    parser.add_argument("--objective", choices=OBJECTIVES, default="time")
+    parser.add_argument("--risk-store", help="gridded risk store directory")
+    parser.add_argument("--rounds", type=int, default=20, help="timed repetitions")
+    args = parser.parse_args()
+
+    if args.risk_store:
+        ffm_planner.use_risk_store(args.risk_store)
+    with open(args.request) as f:
+        route, ktas, fuel_burn = parse_request(json.load(f))[:3]
+
+    started = time.perf_counter()
+    grid = cost_grid()
+    elapsed = time.perf_counter() - started
+    print(f"🗺️  {grid.rows}x{grid.cols} cost grid at {grid.step}° built in {elapsed * 1e3:.0f}ms")
+    started = time.perf_counter()
+    result = optimize_route(route, ktas, fuel_burn, args.objective)
+    first = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        optimize_route(route, ktas, fuel_burn, args.objective)
+    repeat = (time.perf_counter() - started) / args.rounds
+    points = sum(len(path) for path in result["paths"])
+    print(f"⏱️ Optimized {result['optimized_legs']} leg(s), {result['expanded']:,} nodes expanded: "
+          f"{first * 1e3:.1f}ms first call, {repeat * 1e3:.1f}ms with cached edge costs")
+    for label, prefix in (("Great circle", "direct_"), ("Optimized", "")):
+        print(f"✈️  {label:<13}{result[prefix + 'hours'] * 60:6.1f} min {result[prefix + 'fuel']:6.2f} gal, "
+              f"risk-weighted {result[prefix + 'risk_hours'] * 60:6.1f} min")
+    print(f"   {points} polyline points")
+
+if __name__ == "__main__":
+    sys.exit(main())
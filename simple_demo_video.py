@@ -11,10 +11,14 @@ import sys
 import os
 from datetime import datetime
 
+from demo_preflight import run_preflight
+from demo_timeline import ActionTimeline, timeline_path_for
+
 class SimpleVideoRecorder:
     def __init__(self):
         self.recording = False
         self.output_file = None
+        self.timeline = ActionTimeline()
         
     def start_recording(self, output_file="AeroMaps_Simple_Demo.mov"):
         """Start recording using QuickTime Player"""
@@ -31,6 +35,8 @@ class SimpleVideoRecorder:
             
             print("Starting QuickTime Player screen recording...")
             subprocess.run(cmd, capture_output=True)
+            # Best estimate of video time zero; QuickTime starts on the user's click
+            self.timeline.start()
             
             # Give QuickTime time to start
             time.sleep(3)
@@ -110,16 +116,27 @@ class SimpleVideoRecorder:
         total_duration = 0
         for section_name, actions in demo_sequence:
             print(f"\n📱 {section_name}")
+            self.timeline.begin_section(section_name)
             for action_desc, action_func, duration in actions:
                 print(f"  → {action_desc} ({duration}s)")
                 if callable(action_func):
-                    action_func()
+                    success = self.timeline.run(action_desc, action_func, duration)
+                    if success is False:
+                        print(f"    ⚠️  Action failed: {action_desc}")
                 total_duration += duration
+        self.timeline.end_section()
         
-        print(f"\n⏱️ Total demo duration: {total_duration} seconds")
+        print(f"\n⏱️ Planned demo duration: {total_duration} seconds")
+        self.timeline.print_report()
         print("\n🎬 Demo completed! Please manually stop the QuickTime recording.")
         return True
     
+    def save_timeline(self):
+        """Write the measured action timeline next to the expected video file"""
+        path = self.timeline.save(timeline_path_for(self.output_file), video=self.output_file)
+        print(f"🧭 Action timeline saved to {path}")
+        return path
+    
     def simulate_tap(self, x, y):
         """Simulate a tap at coordinates x, y"""
         cmd = f"xcrun simctl send_input BA1B26D3-9DAF-4B80-BF5C-8D27294723C4 tap {x} {y}"
@@ -135,54 +152,6 @@ class SimpleVideoRecorder:
         cmd = f"xcrun simctl send_input BA1B26D3-9DAF-4B80-BF5C-8D27294723C4 text '{text}'"
         return subprocess.run(cmd, shell=True, capture_output=True).returncode == 0
 
-def setup_simulator():
-    """Set up the iPhone simulator"""
-    print("📱 Setting up iPhone simulator...")
-    
-    try:
-        # Check if simulator is running
-        result = subprocess.run(
-            ["xcrun", "simctl", "list", "devices", "booted"],
-            capture_output=True,
-            text=True
-        )
-        
-        if "iPhone 16 Pro" not in result.stdout:
-            print("Starting iPhone 16 Pro simulator...")
-            subprocess.run(["xcrun", "simctl", "boot", "BA1B26D3-9DAF-4B80-BF5C-8D27294723C4"])
-            time.sleep(5)
-        else:
-            print("✅ iPhone 16 Pro simulator already running")
-        
-        return True
-    except Exception as e:
-        print(f"❌ Error setting up simulator: {e}")
-        return False
-
-def launch_app():
-    """Launch the AeroMaps app"""
-    print("🚀 Launching AeroMaps...")
-    
-    try:
-        # Launch the app
-        result = subprocess.run([
-            "xcrun", "simctl", "launch", 
-            "BA1B26D3-9DAF-4B80-BF5C-8D27294723C4", 
-            "com.example.AeroMaps"
-        ], capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            print("✅ AeroMaps launched successfully")
-            time.sleep(3)  # Wait for app to load
-            return True
-        else:
-            print(f"❌ Failed to launch app: {result.stderr}")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Error launching app: {e}")
-        return False
-
 def signal_handler(signum, frame):
     """Handle Ctrl+C gracefully"""
     print("\n🛑 Interrupted by user")
@@ -199,14 +168,8 @@ def main():
     print("This will create a .mov video using QuickTime Player")
     print("=" * 50)
     
-    # Set up simulator
-    if not setup_simulator():
-        print("❌ Failed to set up simulator")
-        return
-    
-    # Launch app
-    if not launch_app():
-        print("❌ Failed to launch app")
+    # Check tools, boot the simulator and launch the app
+    if not run_preflight(("xcrun", "osascript")):
         return
     
     # Start recording
@@ -221,10 +184,11 @@ def main():
     # Run the demo
     print("🎬 Starting demo sequence...")
     demo_success = recorder.run_simple_demo()
+    recorder.save_timeline()
     
     if demo_success:
         print("\n🎉 Demo completed successfully!")
-        print("📁 Please save the QuickTime recording as a .mov file")
+        print(f"📁 Please save the QuickTime recording as '{recorder.output_file}'")
         print("🎬 The video showcases all major AeroMaps features")
         print("💡 You can now edit it in iMovie or Final Cut Pro!")
     else:
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+AeroMaps App Store Screenshot Pipeline
+Drives the app to named demo states on several simulators and frames the captures
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont, ImageOps
+
+from demo_checkpoint import assumed_state, restore_state
+from demo_preflight import DEVICE_SCREEN, setup_simulator
+from demo_timeline import ActionTimeline
+from enhanced_demo_video import SECTION_EFFECTS, EnhancedVideoRecorder
+
+# (slug, caption, enhanced demo section, last action to play or None for the whole section)
+SHOTS = [
+    ("map", "Plan on a map-first interface", "Tab Navigation", None),
+    ("airport", "Airport details at a glance", "Search Features", "Show airport details"),
+    ("route", "Build a route with a tap", "Waypoint Creation", None),
+    ("flight_planner", "Weight & balance and fuel planning", "Bottom Sheet Features", "Wait for Flight Planner"),
+    ("weather", "Brief the weather before you fly", "Weather Features", "Show weather tabs"),
+    ("layers", "Airspace, weather and terrain layers", "Layer Controls", None),
+]
+
+# Screen size in points for devices we know how to scale the demo taps to
+SCREEN_POINTS = {
+    "iPhone 16 Pro": DEVICE_SCREEN,
+    "iPhone 16 Pro Max": (440, 956),
+    "iPhone 16": (393, 852),
+    "iPhone 16 Plus": (430, 932),
+    "iPad Pro 13-inch (M4)": (1032, 1376),
+    "iPad Pro 11-inch (M4)": (834, 1210),
+}
+
+# App Store canvas sizes by device family
+CANVAS_SIZES = {"iphone": (1320, 2868), "ipad": (2064, 2752)}
+GRADIENT = ((14, 32, 74), (66, 153, 225))  # deep navy to sky blue
+FONT_CANDIDATES = [
+    "/System/Library/Fonts/SFNS.ttf",
+    "/System/Library/Fonts/Helvetica.ttc",
+    "/Library/Fonts/Arial Bold.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+]
+
+class SimctlDriver:
+    """simctl input for one device, scaling demo coordinates to its screen"""
+
+    def __init__(self, udid, screen):
+        self.udid = udid
+        self.sx = screen[0] / DEVICE_SCREEN[0]
+        self.sy = screen[1] / DEVICE_SCREEN[1]
+
+    def send(self, *args):
+        cmd = ["xcrun", "simctl", "send_input", self.udid, *[str(a) for a in args]]
+        return subprocess.run(cmd, capture_output=True).returncode == 0
+
+    def tap(self, x, y):
+        return self.send("tap", round(x * self.sx), round(y * self.sy))
+
+    def swipe(self, start_x, start_y, end_x, end_y, duration=0.5):
+        return self.send("swipe", round(start_x * self.sx), round(start_y * self.sy),
+                         round(end_x * self.sx), round(end_y * self.sy), duration)
+
+    def text(self, text):
+        return self.send("text", text)
+
+    def attach(self, target):
+        target.simulate_tap = self.tap
+        target.simulate_swipe = self.swipe
+        target.simulate_text = self.text
+
+def find_devices(names):
+    """Resolve simulator names to (name, udid), preferring booted devices"""
+    result = subprocess.run(["xcrun", "simctl", "list", "devices", "available", "-j"],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"simctl list failed: {result.stderr.strip()}")
+    available = [d for devices in json.loads(result.stdout)["devices"].values() for d in devices]
+    resolved = []
+    for name in names:
+        matches = sorted((d for d in available if d["name"] == name),
+                         key=lambda d: d.get("state") != "Booted")
+        if not matches:
+            raise RuntimeError(f"No available simulator named '{name}'")
+        resolved.append((name, matches[0]["udid"]))
+    return resolved
+
+def clean_status_bar(udid):
+    """Apple-style status bar: 9:41, full battery and signal"""
+    subprocess.run(["xcrun", "simctl", "status_bar", udid, "override", "--time", "9:41",
+                    "--batteryState", "charged", "--batteryLevel", "100",
+                    "--cellularBars", "4", "--wifiBars", "3"], capture_output=True)
+
+def reach_shot(recorder, timeline, udid, section, until):
+    """Reset to the state a section assumes, then play it up to an action"""
+    order = recorder.section_names()
+    if not restore_state(recorder, assumed_state(order, SECTION_EFFECTS, section), timeline, udid=udid):
+        return False
+    actions = dict(recorder.demo_sequence())[section]
+    timeline.begin_section(section)
+    for description, action, duration in actions:
+        if timeline.run(description, action, duration) is False:
+            return False
+        if description == until:
+            break
+    timeline.end_section()
+    return True
+
+def capture_device(name, udid, shots, raw_dir):
+    """Boot a device and capture every shot on it; returns (shot, path, ok) tuples"""
+    screen = SCREEN_POINTS.get(name, DEVICE_SCREEN)
+    if name not in SCREEN_POINTS:
+        print(f"⚠️  No screen size for {name}, using iPhone 16 Pro coordinates")
+    if not setup_simulator(udid, name=name):
+        return [(slug, None, False) for slug, _, _, _ in shots]
+    clean_status_bar(udid)
+
+    recorder = EnhancedVideoRecorder()
+    SimctlDriver(udid, screen).attach(recorder)
+    timeline = ActionTimeline()
+    timeline.start()
+
+    device_dir = os.path.join(raw_dir, name.replace(" ", "_"))
+    os.makedirs(device_dir, exist_ok=True)
+    results = []
+    for slug, _, section, until in shots:
+        path = os.path.join(device_dir, f"{slug}.png")
+        ok = reach_shot(recorder, timeline, udid, section, until)
+        if ok:
+            result = subprocess.run(["xcrun", "simctl", "io", udid, "screenshot", "--type=png", path],
+                                    capture_output=True)
+            ok = result.returncode == 0
+        print(f"  {'✅' if ok else '❌'} {name}: {slug}")
+        results.append((slug, path, ok))
+    return results
+
+def load_font(size):
+    """Best available bold font at a pixel size"""
+    for candidate in FONT_CANDIDATES:
+        if os.path.exists(candidate):
+            return ImageFont.truetype(candidate, size)
+    return ImageFont.load_default(size)
+
+def gradient_background(size, top, bottom):
+    """Vertical gradient built from Pillow's linear gradient, not per-row drawing"""
+    ramp = Image.linear_gradient("L").resize(size)
+    return ImageOps.colorize(ramp, top, bottom).convert("RGBA")
+
+def compose_frame(raw_path, caption, output_path):
+    """Compose one marketing frame: gradient, caption, bezel and screenshot"""
+    shot = Image.open(raw_path).convert("RGBA")
+    family = "ipad" if shot.width / shot.height > 0.6 else "iphone"
+    canvas_w, canvas_h = CANVAS_SIZES[family]
+    canvas = gradient_background((canvas_w, canvas_h), *GRADIENT)
+
+    # Caption
+    draw = ImageDraw.Draw(canvas)
+    size = int(canvas_w * 0.065)
+    font = load_font(size)
+    box = draw.textbbox((0, 0), caption, font=font)
+    while box[2] - box[0] > canvas_w * 0.9 and size > 12:
+        size = int(size * 0.92)
+        font = load_font(size)
+        box = draw.textbbox((0, 0), caption, font=font)
+    text_y = int(canvas_h * 0.06)
+    draw.text(((canvas_w - (box[2] - box[0])) // 2, text_y), caption, font=font, fill=(255, 255, 255, 255))
+
+    # Device: screenshot scaled into the lower part of the canvas inside a bezel
+    top = text_y + (box[3] - box[1]) + int(canvas_h * 0.05)
+    max_h = canvas_h - top - int(canvas_h * 0.04)
+    scale = min(max_h / shot.height, canvas_w * 0.82 / shot.width)
+    screen = shot.resize((int(shot.width * scale), int(shot.height * scale)), Image.LANCZOS)
+    bezel = int(screen.width * 0.035)
+    radius = int(screen.width * 0.12)
+    body_size = (screen.width + 2 * bezel, screen.height + 2 * bezel)
+    left = (canvas_w - body_size[0]) // 2
+
+    shadow = Image.new("RGBA", canvas.size, (0, 0, 0, 0))
+    ImageDraw.Draw(shadow).rounded_rectangle(
+        [left, top + bezel, left + body_size[0], top + bezel + body_size[1]],
+        radius=radius + bezel, fill=(0, 0, 0, 120))
+    canvas = Image.alpha_composite(canvas, shadow.filter(ImageFilter.GaussianBlur(bezel)))
+
+    draw = ImageDraw.Draw(canvas)
+    draw.rounded_rectangle([left, top, left + body_size[0], top + body_size[1]],
+                           radius=radius + bezel, fill=(18, 18, 20, 255))
+    mask = Image.new("L", screen.size, 0)
+    ImageDraw.Draw(mask).rounded_rectangle([0, 0, screen.width - 1, screen.height - 1], radius=radius, fill=255)
+    canvas.paste(screen, (left + bezel, top + bezel), mask)
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    canvas.convert("RGB").save(output_path, "PNG", optimize=True)
+    return output_path
+
+def frame_all(raw_dir, framed_dir, shots, workers):
+    """Compose every captured screenshot in a process pool"""
+    captions = {slug: caption for slug, caption, _, _ in shots}
+    jobs = []
+    for device in sorted(os.listdir(raw_dir)):
+        for slug in captions:
+            raw_path = os.path.join(raw_dir, device, f"{slug}.png")
+            if os.path.exists(raw_path):
+                jobs.append((raw_path, captions[slug], os.path.join(framed_dir, device, f"{slug}.png")))
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(compose_frame, *job): job for job in jobs}
+        for future in as_completed(futures):
+            raw_path, _, output_path = futures[future]
+            try:
+                future.result()
+                print(f"  🖼️  {output_path}")
+            except Exception as e:
+                failed += 1
+                print(f"  ❌ {raw_path}: {e}")
+    return len(jobs), failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture and frame AeroMaps App Store screenshots")
+    parser.add_argument("--devices", default="iPhone 16 Pro Max,iPad Pro 13-inch (M4)",
+                        help="comma-separated simulator names")
+    parser.add_argument("--shots", help=f"comma-separated shots (default: all of {', '.join(s[0] for s in SHOTS)})")
+    parser.add_argument("-o", "--output-dir", default="store_screenshots", help="output directory")
+    parser.add_argument("--frame-only", action="store_true", help="skip capture, re-frame existing raw shots")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="framing processes")
+    args = parser.parse_args()
+
+    shots = SHOTS
+    if args.shots:
+        wanted = {s.strip() for s in args.shots.split(",")}
+        shots = [s for s in SHOTS if s[0] in wanted]
+    raw_dir = os.path.join(args.output_dir, "raw")
+    framed_dir = os.path.join(args.output_dir, "framed")
+    os.makedirs(raw_dir, exist_ok=True)
+
+    started = time.monotonic()
+    missing = []
+    if not args.frame_only:
+        try:
+            devices = find_devices([d.strip() for d in args.devices.split(",")])
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"📸 Capturing {len(shots)} shots on {len(devices)} devices in parallel...")
+        with ThreadPoolExecutor(max_workers=len(devices)) as pool:
+            futures = [pool.submit(capture_device, name, udid, shots, raw_dir) for name, udid in devices]
+            captured = [r for future in futures for r in future.result()]
+        missing = [slug for slug, _, ok in captured if not ok]
+        print(f"⏱️ Capture finished in {time.monotonic() - started:.1f}s ({len(missing)} failed)")
+
+    print("\n🎨 Framing screenshots...")
+    framed_started = time.monotonic()
+    total, failed = frame_all(raw_dir, framed_dir, shots, args.workers)
+    print(f"⏱️ Framed {total - failed}/{total} in {time.monotonic() - framed_started:.1f}s → {framed_dir}/")
+    if failed or missing:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
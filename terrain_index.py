@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Terrain Index
+Memory-mapped elevation grid with a max-elevation pyramid for corridor MEF queries
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from ffm_planner import DEFAULT_BOUNDS, terrain_elevation_ft
+from route_engine import RouteBatch, leg_samples
+
+META_FILE = "terrain.json"
+NO_DATA = np.iinfo(np.int16).min
+
+def level_file(level):
+    return f"max_{level}.npy"
+
+def max_pool(grid):
+    """2x2 max pooling; odd edges are padded with NO_DATA"""
+    rows, cols = grid.shape
+    padded = np.pad(grid, ((0, rows % 2), (0, cols % 2)), constant_values=NO_DATA)
+    return padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2).max(axis=(1, 3))
+
+class TerrainIndex:
+    """Elevation pyramid on disk
+
+    Level 0 is the elevation grid in feet (int16); each level above holds
+    the maximum of 2x2 cells of the one below, so the highest terrain in any
+    box can be bounded by reading a handful of coarse cells. Every level is
+    memory-mapped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.lat0, self.lon0 = self.meta["lat0"], self.meta["lon0"]
+        self.cell = self.meta["cell_deg"]
+        self.levels = [np.load(os.path.join(path, level_file(i)), mmap_mode="r")
+                       for i in range(self.meta["levels"])]
+
+    def cell_deg(self, level):
+        return self.cell * 2 ** level
+
+    def level_for(self, radius_nm):
+        """Coarsest level whose cells are no larger than the corridor half-width"""
+        level = int(math.floor(math.log2(max(radius_nm / 60 / self.cell, 1))))
+        return min(level, len(self.levels) - 1)
+
+    def covers(self, lat, lon):
+        """Whether each point lies on the elevation grid"""
+        rows, cols = self.meta["shape"]
+        return ((lat >= self.lat0) & (lat <= self.lat0 + rows * self.cell)
+                & (lon >= self.lon0) & (lon <= self.lon0 + cols * self.cell))
+
+    def box_max(self, lat, lon, radius_nm, level):
+        """Highest cell at ``level`` touching a ±radius box around each point, NO_DATA for points off the grid"""
+        grid = self.levels[level]
+        cell = self.cell_deg(level)
+        rows, cols = grid.shape
+        dlat = radius_nm / 60
+        dlon = radius_nm / (60 * np.maximum(np.cos(np.radians(lat)), 0.01))
+
+        def span(lo, hi, origin, size):
+            first = np.clip(np.floor((lo - origin) / cell), 0, size - 1).astype(np.int64)
+            last = np.clip(np.floor((hi - origin) / cell), 0, size - 1).astype(np.int64)
+            width = int((last - first).max(initial=0)) + 1
+            # Fixed-width window per point; repeats of the last cell don't change a max
+            return np.minimum(first[:, None] + np.arange(width), last[:, None])
+
+        ys = span(lat - dlat, lat + dlat, self.lat0, rows)
+        xs = span(lon - dlon, lon + dlon, self.lon0, cols)
+        # Clamped windows of off-grid points would read the edge cells, which say nothing about them
+        return np.where(self.covers(lat, lon), grid[ys[:, :, None], xs[:, None, :]].max(axis=(1, 2)), NO_DATA)
+
+    def corridor_max(self, batch, radius_nm=4.0, level=None):
+        """Highest terrain (ft) within radius_nm of every leg of a RouteBatch
+
+        The answer is an upper bound: it may include terrain up to one
+        pyramid cell outside the corridor, which errs on the safe side.
+        ``level=0`` reads the full-resolution grid instead of the pyramid.
+        Legs with any sample off the grid are NO_DATA.
+        """
+        level = self.level_for(radius_nm) if level is None else level
+        spacing_nm = min(self.cell_deg(level) * 60, radius_nm) or radius_nm
+        lat, lon, starts = leg_samples(batch, spacing_nm)
+        peaks = self.box_max(lat, lon, radius_nm, level)
+        uncovered = np.minimum.reduceat(peaks, starts[:-1]) == NO_DATA
+        return np.where(uncovered, NO_DATA, np.maximum.reduceat(peaks, starts[:-1])).astype(np.int64)
+
+def build_synthetic(path, bounds=DEFAULT_BOUNDS, arcsec=15):
+    """Write a synthetic index from the planner's terrain field plus ridge-scale detail"""
+    cell = arcsec / 3600
+    south, north, west, east = bounds
+    lats = south + cell * (np.arange(int(round((north - south) / cell))) + 0.5)
+    lons = west + cell * (np.arange(int(round((east - west) / cell))) + 0.5)
+    lat_grid, lon_grid = np.meshgrid(lats, lons, indexing="ij")
+    base = terrain_elevation_ft(lat_grid, lon_grid)
+    # Peaks and valleys at a few kilometres so cells differ from their neighbours
+    detail = (np.sin(lat_grid * 97.0) * np.cos(lon_grid * 83.0) + 0.5 * np.sin((lat_grid + lon_grid) * 211.0))
+    elevation = np.clip(base * (1 + 0.12 * detail), 0, None)
+
+    os.makedirs(path, exist_ok=True)
+    level = elevation.round().astype(np.int16)
+    levels = 0
+    while True:
+        np.save(os.path.join(path, level_file(levels)), level)
+        levels += 1
+        if level.shape == (1, 1):
+            break
+        level = max_pool(level)
+
+    meta = {"lat0": south, "lon0": west, "cell_deg": cell, "levels": levels,
+            "shape": list(elevation.shape), "units": "ft"}
+    with open(os.path.join(path, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+    return TerrainIndex(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the terrain max-elevation index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="write a synthetic index")
+    build.add_argument("path", help="index directory")
+    build.add_argument("--arcsec", type=float, default=15, help="base cell size in arc-seconds")
+    query = sub.add_parser("query", help="highest terrain near a leg, and a pyramid vs scan benchmark")
+    query.add_argument("path", help="index directory")
+    query.add_argument("leg", nargs=4, type=float, metavar=("LAT1", "LON1", "LAT2", "LON2"))
+    query.add_argument("--radius", type=float, default=4.0, help="corridor half-width in nm")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.perf_counter()
+        index = build_synthetic(args.path, arcsec=args.arcsec)
+        print(f"✅ Built {index.meta['shape']} grid with {len(index.levels)} pyramid levels "
+              f"in {time.perf_counter() - started:.1f}s")
+        return
+
+    index = TerrainIndex(args.path)
+    batch = RouteBatch.from_routes([[args.leg[:2], args.leg[2:]]])
+    results = {}
+    for name, level in (("pyramid", None), ("scan", 0)):
+        index.corridor_max(batch, args.radius, level)  # warm the page cache
+        runs = 200 if level is None else 5
+        started = time.perf_counter()
+        for _ in range(runs):
+            peak = int(index.corridor_max(batch, args.radius, level)[0])
+        results[name] = (peak, (time.perf_counter() - started) / runs)
+    for name, (peak, seconds) in results.items():
+        shown = "no data" if peak == NO_DATA else f"{peak:,} ft"
+        print(f"  {name:<8} {shown:>9} in {seconds * 1e6:8.0f}µs")
+    if results["pyramid"][0] < results["scan"][0]:
+        print("❌ Pyramid bound is below the full-resolution scan")
+        sys.exit(1)
+    # A leg south of the grid must come back without data, never with the edge cells' terrain
+    south = index.lat0 - 1.0
+    outside = RouteBatch.from_routes([[(south - 1.0, index.lon0), (south, index.lon0 + 1.0)]])
+    if any(int(index.corridor_max(outside, args.radius, level)[0]) != NO_DATA for level in (None, 0)):
+        print("❌ A leg off the grid returned terrain")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Traffic Simulator
+Synthetic aircraft dead-reckoned along flight plans, served in the OpenSky /states/all format
+"""
+
+import argparse
+import asyncio
+import gzip
+import signal
+import sys
+import time
+from urllib.parse import parse_qs
+
+import numpy as np
+
+from airport_index import load_airports, synthetic_airports
+from ffm_server import (IDLE_TIMEOUT, MAX_HEADER_BYTES, HTTPError, json_response, listening_socket, read_request,
+                        response_bytes)
+from plan_encoding import accepts_gzip
+from route_engine import EARTH_RADIUS_NM, haversine, initial_bearing
+
+STATES_PATH = "/api/states/all"  # LiveFlightService.baseURL + "/states/all"
+DEFAULT_PORT = 8090
+TICK_SECONDS = 5.0
+MAX_WAYPOINTS = 4  # origin, up to two enroute fixes, destination
+DESTINATION_CANDIDATES = 8
+TURNAROUND_MINUTES = (20, 60)
+CELL_DEG = 1.0  # bounding-box index cells; a tick moves an aircraft under 1 nm
+GZIP_LEVEL = 1  # a full 100k-aircraft body is ~15 MB; favour speed over ratio
+FT_TO_M = 0.3048
+KT_TO_MS = 1852 / 3600
+
+# name, share of the fleet, cruise altitude ft, speed kt, climb and descent gradients ft/nm
+CATEGORIES = (
+    ("airliner", 0.6, (28000, 39000), (420, 490), 330, 320),
+    ("general", 0.4, (4500, 12500), (100, 170), 500, 330),
+)
+AIRLINES = ("UAL", "AAL", "DAL", "SWA", "ASA", "JBU", "FFT", "SKW", "NKS", "FDX", "UPS")
+LETTERS = np.array(list("ABCDEFGHJKLMNPQRSTUVWXYZ"))
+ORIGIN_COUNTRY = "United States"
+# One state vector after the pre-encoded icao24, callsign and origin_country; sensors is always null
+ROW_FORMAT = "%s%d,%d,%.4f,%.4f,%.1f,%s,%.2f,%.1f,%.2f,null,%.1f%s"
+
+class TrafficGrid:
+    """Aircraft bucketed into CELL_DEG lat/lon cells, stored CSR-style like AirportIndex
+
+    ``order`` lists aircraft sorted by cell and ``starts[cell]`` is where
+    each cell begins in it. A tick moves an aircraft well under a cell, so
+    ``update`` only re-sorts an order that is already nearly sorted, and
+    fixes the cell counts from the aircraft that crossed a boundary.
+    """
+
+    def __init__(self, lat, lon):
+        self.rows, self.cols = int(180 / CELL_DEG), int(360 / CELL_DEG)
+        self.cells = self.cell_of(lat, lon)
+        self.order = np.argsort(self.cells, kind="stable")
+        self.counts = np.bincount(self.cells, minlength=self.rows * self.cols)
+        self.starts = np.concatenate([[0], np.cumsum(self.counts)])
+        self.moved = len(self.cells)
+
+    def cell_of(self, lat, lon):
+        row = np.clip(((lat + 90) / CELL_DEG).astype(np.int64), 0, self.rows - 1)
+        col = np.clip(((lon + 180) / CELL_DEG).astype(np.int64), 0, self.cols - 1)
+        return row * self.cols + col
+
+    def update(self, lat, lon):
+        cells = self.cell_of(lat, lon)
+        moved = np.flatnonzero(cells != self.cells)
+        self.moved = len(moved)
+        if not self.moved:
+            return
+        size = self.rows * self.cols
+        self.counts += np.bincount(cells[moved], minlength=size) - np.bincount(self.cells[moved], minlength=size)
+        self.starts = np.concatenate([[0], np.cumsum(self.counts)])
+        self.cells = cells
+        # Timsort finds the sorted runs between the few movers
+        self.order = self.order[np.argsort(cells[self.order], kind="stable")]
+
+    def query(self, lat, lon, lamin, lomin, lamax, lomax):
+        """Indices of aircraft inside a lat/lon box
+
+        Each row of cells the box covers is one contiguous range of
+        ``order``. Only the candidates from those ranges are compared with
+        the box edges.
+        """
+        row0, col0 = max(int((lamin + 90) // CELL_DEG), 0), max(int((lomin + 180) // CELL_DEG), 0)
+        row1 = min(int((lamax + 90) // CELL_DEG), self.rows - 1)
+        col1 = min(int((lomax + 180) // CELL_DEG), self.cols - 1)
+        if row0 > row1 or col0 > col1:
+            return np.empty(0, dtype=np.int64)
+        rows = np.arange(row0, row1 + 1) * self.cols
+        lo, hi = self.starts[rows + col0], self.starts[rows + col1 + 1]
+        lengths = hi - lo
+        # Concatenated aranges: each range's offset repeated over its length, plus a running count
+        offsets = np.repeat(lo - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        candidates = self.order[offsets + np.arange(lengths.sum())]
+        c_lat, c_lon = lat[candidates], lon[candidates]
+        return candidates[(c_lat >= lamin) & (c_lat <= lamax) & (c_lon >= lomin) & (c_lon <= lomax)]
+
+def advance(lat, lon, track, distance_nm):
+    """Point distance_nm along a great circle from (lat, lon) on the initial track"""
+    la, lo, tr = np.radians(lat), np.radians(lon), np.radians(track)
+    d = distance_nm / EARTH_RADIUS_NM
+    new_lat = np.arcsin(np.clip(np.sin(la) * np.cos(d) + np.cos(la) * np.sin(d) * np.cos(tr), -1, 1))
+    new_lon = lo + np.arctan2(np.sin(tr) * np.sin(d) * np.cos(la), np.cos(d) - np.sin(la) * np.sin(new_lat))
+    return np.degrees(new_lat), (np.degrees(new_lon) + 180) % 360 - 180
+
+class TrafficSim:
+    """A fleet of synthetic aircraft stored as one NumPy array per state field
+
+    Each aircraft flies a flight plan of up to MAX_WAYPOINTS points between
+    two airports. Every tick it steers for its next waypoint on the great
+    circle and moves ground speed × dt along it. Altitude follows the
+    plan: a climb gradient from the origin, a descent gradient to the
+    destination and the cruise altitude in between. On arrival it stays
+    on the ground for a turnaround, then departs on a new plan, so the
+    fleet size never changes.
+    """
+
+    def __init__(self, count, airports, seed=0, now=None):
+        self.rng = np.random.default_rng(seed)
+        self.count = count
+        self.airport_lat = np.array([a["lat"] for a in airports], dtype=np.float64)
+        self.airport_lon = np.array([a["lon"] for a in airports], dtype=np.float64)
+        self.time = time.time() if now is None else now
+        self.ticks = 0
+        self.cache = {}  # encoded bodies for the current tick
+
+        rng = self.rng
+        shares = np.array([category[1] for category in CATEGORIES])
+        self.category = rng.choice(len(CATEGORIES), count, p=shares / shares.sum())
+        pick = lambda column: np.array([category[column] for category in CATEGORIES])[self.category]
+        cruise, speed = pick(2), pick(3)
+        self.cruise_ft = np.round(rng.uniform(cruise[:, 0], cruise[:, 1]) / 1000) * 1000
+        self.speed_kt = rng.uniform(speed[:, 0], speed[:, 1])
+        self.climb, self.descent = pick(4).astype(np.float64), pick(5).astype(np.float64)
+
+        # Identity: unique US-block ICAO addresses, airline or N-number callsigns, VFR squawk for GA
+        address = rng.choice(np.arange(0xA00001, 0xADF7C8), count, replace=False)
+        self.icao24 = [f"{a:06x}" for a in address.tolist()]
+        airline = self.category == 0
+        numbers = rng.integers(1, 9999, count)
+        suffix = LETTERS[rng.integers(0, len(LETTERS), (count, 2))]
+        self.callsign = [f"{AIRLINES[a]}{n}" if is_airline else f"N{n}{s[0]}{s[1]}"
+                         for a, n, s, is_airline in zip(rng.integers(0, len(AIRLINES), count).tolist(),
+                                                        numbers.tolist(), suffix.tolist(), airline.tolist())]
+        squawks = rng.integers(0, 8, (count, 4)) @ np.array([1000, 100, 10, 1])
+        self.squawk = [f"{s:04d}" if is_airline else "1200" for s, is_airline in zip(squawks.tolist(),
+                                                                                      airline.tolist())]
+        self.row_prefix = [f'["{a}","{c:<8}","{ORIGIN_COUNTRY}",' for a, c in zip(self.icao24, self.callsign)]
+        self.row_suffix = [f',"{squawk}",false,0]' for squawk in self.squawk]
+
+        self.plan_lat = np.zeros((count, MAX_WAYPOINTS))
+        self.plan_lon = np.zeros((count, MAX_WAYPOINTS))
+        self.remaining_after = np.zeros((count, MAX_WAYPOINTS))  # plan distance left from each waypoint
+        self.target = np.ones(count, dtype=np.int64)  # index of the waypoint being flown to
+        self.destination = np.zeros(count, dtype=np.int64)  # airport index
+        self.vertical_rate = np.zeros(count)
+        self.new_plans(np.arange(count), self.rng.integers(0, len(self.airport_lat), count))
+
+        # Spread the fleet: most aircraft start part-way along a leg of their first plan, the rest at the gate
+        everyone = np.arange(count)
+        airborne = rng.random(count) < 0.9
+        legs = np.maximum(np.count_nonzero(np.diff(self.remaining_after, axis=1) < 0, axis=1), 1)
+        leg = 1 + (rng.random(count) * legs).astype(np.int64)
+        start_lat, start_lon = self.plan_lat[everyone, leg - 1], self.plan_lon[everyone, leg - 1]
+        end_lat, end_lon = self.plan_lat[everyone, leg], self.plan_lon[everyone, leg]
+        course = initial_bearing(start_lat, start_lon, end_lat, end_lon)
+        lat, lon = advance(start_lat, start_lon, course,
+                           haversine(start_lat, start_lon, end_lat, end_lon) * rng.random(count))
+        self.lat = np.where(airborne, lat, self.plan_lat[:, 0])
+        self.lon = np.where(airborne, lon, self.plan_lon[:, 0])
+        self.target = np.where(airborne, leg, 1)
+        self.ground_until = np.where(airborne, 0.0, self.time + rng.uniform(0, TURNAROUND_MINUTES[1] * 60, count))
+        self.track = initial_bearing(self.lat, self.lon, self.plan_lat[everyone, self.target],
+                                     self.plan_lon[everyone, self.target])
+        self.altitude_ft = self.profile_altitude()
+        self.grid = TrafficGrid(self.lat, self.lon)
+
+    def new_plans(self, which, origin):
+        """Flight plans from airport ``origin`` for the aircraft ``which``
+
+        GA flies to the nearest of a few random airports and airliners to
+        the farthest. Enroute fixes are offset from the great circle so
+        the track has corners to turn at.
+        """
+        rng, n = self.rng, len(which)
+        candidates = rng.integers(0, len(self.airport_lat), (n, DESTINATION_CANDIDATES))
+        o_lat, o_lon = self.airport_lat[origin], self.airport_lon[origin]
+        distance = haversine(o_lat[:, None], o_lon[:, None], self.airport_lat[candidates], self.airport_lon[candidates])
+        too_close = distance < 20  # no pattern work
+        choice = np.where(self.category[which] == 1, np.argmin(np.where(too_close, np.inf, distance), axis=1),
+                          np.argmax(np.where(too_close, -np.inf, distance), axis=1))
+        destination = candidates[np.arange(n), choice]
+        d_lat, d_lon = self.airport_lat[destination], self.airport_lon[destination]
+
+        # Fixes at sorted fractions of the way, pushed sideways by up to 5% of the trip
+        fixes = rng.integers(0, MAX_WAYPOINTS - 1, n)
+        fraction = np.sort(rng.uniform(0.2, 0.8, (n, MAX_WAYPOINTS - 2)), axis=1)
+        trip = haversine(o_lat, o_lon, d_lat, d_lon)
+        course = initial_bearing(o_lat, o_lon, d_lat, d_lon)
+        fix_lat, fix_lon = advance(o_lat[:, None], o_lon[:, None], course[:, None], trip[:, None] * fraction)
+        fix_lat, fix_lon = advance(fix_lat, fix_lon, course[:, None] + 90,
+                                   trip[:, None] * rng.uniform(-0.05, 0.05, fraction.shape))
+        plan_lat = np.column_stack([o_lat, fix_lat, d_lat])
+        plan_lon = np.column_stack([o_lon, fix_lon, d_lon])
+        # Unused fix slots repeat the destination, so legs past the end have zero length
+        unused = np.arange(1, MAX_WAYPOINTS - 1)[None, :] > fixes[:, None]
+        plan_lat[:, 1:-1] = np.where(unused, d_lat[:, None], fix_lat)
+        plan_lon[:, 1:-1] = np.where(unused, d_lon[:, None], fix_lon)
+
+        legs = haversine(plan_lat[:, :-1], plan_lon[:, :-1], plan_lat[:, 1:], plan_lon[:, 1:])
+        self.plan_lat[which], self.plan_lon[which] = plan_lat, plan_lon
+        self.remaining_after[which] = np.concatenate([np.cumsum(legs[:, ::-1], axis=1)[:, ::-1],
+                                                      np.zeros((n, 1))], axis=1)
+        self.target[which] = 1
+        self.destination[which] = destination
+
+    def profile_altitude(self):
+        """Altitude in ft on the climb / cruise / descent profile at each aircraft's position"""
+        everyone = np.arange(self.count)
+        to_target = haversine(self.lat, self.lon, self.plan_lat[everyone, self.target],
+                              self.plan_lon[everyone, self.target])
+        remaining = to_target + self.remaining_after[everyone, self.target]
+        flown = np.maximum(self.remaining_after[:, 0] - remaining, 0)
+        altitude = np.minimum(self.cruise_ft, np.minimum(flown * self.climb, remaining * self.descent))
+        return np.where(self.ground_until > self.time, 0.0, altitude)
+
+    def tick(self, now=None):
+        """Advance every aircraft to ``now`` (default: one TICK_SECONDS step)"""
+        now = self.time + TICK_SECONDS if now is None else now
+        dt = max(now - self.time, 0.0)
+        self.time = now
+        everyone = np.arange(self.count)
+        flying = self.ground_until <= now
+
+        target_lat = self.plan_lat[everyone, self.target]
+        target_lon = self.plan_lon[everyone, self.target]
+        to_target = haversine(self.lat, self.lon, target_lat, target_lon)
+        step = np.where(flying, self.speed_kt * dt / 3600, 0.0)
+        self.track = np.where(flying, initial_bearing(self.lat, self.lon, target_lat, target_lon), self.track)
+        lat, lon = advance(self.lat, self.lon, self.track, step)
+        # A waypoint within this tick's step is reached; reaching the last one with distance left is arrival
+        reached = flying & (step >= to_target)
+        self.lat = np.where(reached, target_lat, lat)
+        self.lon = np.where(reached, target_lon, lon)
+        arrived = reached & (self.remaining_after[everyone, self.target] == 0)
+        self.target = np.where(reached & ~arrived, self.target + 1, self.target)
+
+        arrived = np.flatnonzero(arrived)
+        if len(arrived):
+            self.new_plans(arrived, self.destination[arrived])
+            self.ground_until[arrived] = now + self.rng.uniform(*TURNAROUND_MINUTES, len(arrived)) * 60
+
+        altitude = self.profile_altitude()
+        self.vertical_rate = (altitude - self.altitude_ft) / dt if dt > 0 else np.zeros(self.count)  # ft/s
+        self.altitude_ft = altitude
+        self.grid.update(self.lat, self.lon)
+        self.ticks += 1
+        self.cache = {}
+
+    def in_box(self, lamin=-90.0, lomin=-180.0, lamax=90.0, lomax=180.0):
+        """Indices of aircraft inside a lat/lon box"""
+        return self.grid.query(self.lat, self.lon, lamin, lomin, lamax, lomax)
+
+    def states_json(self, which=None):
+        """OpenSky /states/all body for the aircraft ``which`` (default: all), as JSON bytes
+
+        Fields per state: icao24, callsign, origin_country, time_position,
+        last_contact, longitude, latitude, baro_altitude, on_ground,
+        velocity, true_track, vertical_rate, sensors, geo_altitude, squawk,
+        spi, position_source. Units are OpenSky's: m, m/s and degrees. The
+        fields that never change are pre-encoded per aircraft, so each row
+        is one string format.
+        """
+        which = np.arange(self.count) if which is None else which
+        now = int(self.time)
+        on_ground = self.ground_until[which] > self.time
+        velocity = np.where(on_ground, 0.0, self.speed_kt[which] * KT_TO_MS)
+        rows = [ROW_FORMAT % (self.row_prefix[i], now, now, lon, lat, altitude, ground, speed, track, climb, altitude,
+                              self.row_suffix[i])
+                for i, lon, lat, altitude, ground, speed, track, climb in zip(
+                    which.tolist(), self.lon[which].tolist(), self.lat[which].tolist(),
+                    (self.altitude_ft[which] * FT_TO_M).tolist(), np.where(on_ground, "true", "false").tolist(),
+                    velocity.tolist(), self.track[which].tolist(), (self.vertical_rate[which] * FT_TO_M).tolist())]
+        return f'{{"time":{now},"states":[{",".join(rows)}]}}'.encode()
+
+    def body(self, box=None, compress=False):
+        """Encoded /states/all response, cached per tick for the unfiltered fleet"""
+        key = (box, compress)
+        if key in self.cache:
+            return self.cache[key]
+        if compress:
+            body = gzip.compress(self.body(box), GZIP_LEVEL, mtime=0)
+        else:
+            body = self.states_json(None if box is None else self.in_box(*box))
+        if box is None:
+            self.cache[key] = body
+        return body
+
+def parse_box(query):
+    """(lamin, lomin, lamax, lomax) from OpenSky query parameters, None for the whole fleet"""
+    params = parse_qs(query)
+    names = ("lamin", "lomin", "lamax", "lomax")
+    if not any(name in params for name in names):
+        return None
+    try:
+        box = tuple(float(params[name][0]) for name in names)
+    except (KeyError, ValueError):
+        raise HTTPError(400, "lamin, lomin, lamax and lomax must all be numbers")
+    if box[0] > box[2] or box[1] > box[3]:
+        raise HTTPError(400, "empty bounding box")
+    return box
+
+class TrafficServer:
+    """Serves GET /api/states/all and /healthz from one simulation ticked in the background"""
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.started = time.time()
+        self.requests = 0
+        self.tick_ms = 0.0
+
+    async def run_ticks(self):
+        while True:
+            await asyncio.sleep(max(0.0, self.sim.time + TICK_SECONDS - time.time()))
+            started = time.perf_counter()
+            self.sim.tick(time.time())
+            self.tick_ms = (time.perf_counter() - started) * 1e3
+
+    def handle(self, method, path, query, headers, keep_alive):
+        if path == "/healthz" and method == "GET":
+            return json_response(200, {"status": "ok", "aircraft": self.sim.count, "ticks": self.sim.ticks,
+                                       "tick_ms": round(self.tick_ms, 2), "cell_changes": self.sim.grid.moved,
+                                       "requests": self.requests,
+                                       "uptime_s": round(time.time() - self.started, 1)}, keep_alive)
+        if path != STATES_PATH:
+            return json_response(404, {"error": f"no route for {method} {path}"}, keep_alive)
+        if method != "GET":
+            return json_response(405, {"error": "use GET"}, keep_alive)
+        try:
+            box = parse_box(query)
+        except HTTPError as e:
+            return json_response(e.status, {"error": str(e)}, keep_alive)
+        compress = accepts_gzip(headers.get("accept-encoding", ""))
+        state_headers = {"Content-Type": "application/json", "Vary": "Accept-Encoding"}
+        if compress:
+            state_headers["Content-Encoding"] = "gzip"
+        return response_bytes(200, self.sim.body(box, compress), state_headers, keep_alive)
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                except HTTPError as e:
+                    writer.write(json_response(e.status, {"error": str(e)}, keep_alive=False))
+                    break
+                if request is None:
+                    break
+                method, path, headers, _ = request
+                path, _, query = path.partition("?")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self.requests += 1
+                writer.write(self.handle(method, path, query, headers, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(host, port, sim):
+    server = TrafficServer(sim)
+    listener = await asyncio.start_server(server.serve_connection, sock=listening_socket(host, port, False),
+                                          limit=MAX_HEADER_BYTES)
+    ticker = asyncio.create_task(server.run_ticks())
+    async with listener:
+        try:
+            await listener.serve_forever()
+        finally:
+            ticker.cancel()
+
+def benchmark(sim, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        sim.tick()
+    tick_s = (time.perf_counter() - started) / rounds
+    started = time.perf_counter()
+    body = sim.body()
+    encode_s = time.perf_counter() - started
+    started = time.perf_counter()
+    compressed = sim.body(compress=True)
+    gzip_s = time.perf_counter() - started
+    airborne = int(np.count_nonzero(sim.ground_until <= sim.time))
+    print(f"✈️  {sim.count:,} aircraft ({airborne:,} airborne), tick {tick_s * 1e3:.1f}ms, "
+          f"{sim.grid.moved:,} changed cells on the last")
+
+    # Map-view boxes of 1-8 degrees around random aircraft, against a scan of the whole fleet
+    rng = np.random.default_rng(1)
+    centres = rng.integers(0, sim.count, 200)
+    sizes = rng.uniform(1, 8, 200)
+    boxes = [(sim.lat[i] - size / 2, sim.lon[i] - size, sim.lat[i] + size / 2, sim.lon[i] + size)
+             for i, size in zip(centres.tolist(), sizes.tolist())]
+    started = time.perf_counter()
+    found = [sim.in_box(*box) for box in boxes]
+    grid_s = (time.perf_counter() - started) / len(boxes)
+    started = time.perf_counter()
+    scanned = [np.flatnonzero((sim.lat >= lamin) & (sim.lat <= lamax) & (sim.lon >= lomin) & (sim.lon <= lomax))
+               for lamin, lomin, lamax, lomax in boxes]
+    scan_s = (time.perf_counter() - started) / len(boxes)
+    assert all(np.array_equal(np.sort(a), b) for a, b in zip(found, scanned)), "grid and scan disagree"
+    print(f"   bounding boxes: {np.mean([len(a) for a in found]):,.0f} aircraft each, "
+          f"grid {grid_s * 1e6:.0f}µs vs scan {scan_s * 1e6:.0f}µs")
+    print(f"   /states/all: {len(body) / 1e6:.1f} MB JSON in {encode_s * 1e3:.0f}ms, "
+          f"{len(compressed) / 1e6:.1f} MB gzip in {gzip_s * 1e3:.0f}ms (once per tick)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic traffic in the OpenSky /states/all format")
+    parser.add_argument("--aircraft", type=int, default=10_000, help="fleet size")
+    parser.add_argument("--airports", help="airport dataset for origins and destinations (default: synthetic)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1", help="interface to bind")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--bench", type=int, metavar="TICKS", help="time ticks and encoding instead of serving")
+    args = parser.parse_args()
+
+    airports = load_airports(args.airports) if args.airports else synthetic_airports(2000, args.seed)
+    started = time.perf_counter()
+    sim = TrafficSim(args.aircraft, airports, args.seed)
+    print(f"🛩️  {args.aircraft:,} aircraft between {len(airports):,} airports "
+          f"in {(time.perf_counter() - started) * 1e3:.0f}ms")
+    if args.bench:
+        return benchmark(sim, args.bench)
+
+    print(f"📡 OpenSky-format traffic on http://{args.host}:{args.port}{STATES_PATH}, every {TICK_SECONDS:g}s")
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        asyncio.run(serve(args.host, args.port, sim))
+    except (KeyboardInterrupt, SystemExit):
+        print("\n🛑 Stopping traffic simulator")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Demo Idle Trimmer
+Cuts dead stretches out of a recorded demo using its action timeline and frame analysis
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+from demo_timeline import load_timeline, timeline_path_for
+
+def probe_duration(video_file):
+    """Return the container duration of a video in seconds"""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+         "-of", "default=noprint_wrappers=1:nokey=1", video_file],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {result.stderr.strip()}")
+    return float(result.stdout.strip())
+
+def has_audio(video_file):
+    """Return True if the file has at least one audio stream"""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "a",
+         "-show_entries", "stream=index", "-of", "csv=p=0", video_file],
+        capture_output=True, text=True
+    )
+    return bool(result.stdout.strip())
+
+def keyframe_times(video_file):
+    """Return presentation times of all video keyframes (reads packets only)"""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_file],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {result.stderr.strip()}")
+    times = []
+    for line in result.stdout.splitlines():
+        parts = line.strip().split(",")
+        if len(parts) >= 2 and "K" in parts[1] and parts[0] not in ("", "N/A"):
+            times.append(float(parts[0]))
+    return sorted(times)
+
+def timeline_idle_spans(timeline, duration, hold=1.0, lead=0.25, min_idle=1.5):
+    """Idle spans implied by the timeline: waits, the lead-in and the tail
+
+    ``hold`` seconds are kept after each input so UI animations stay in the
+    cut, and ``lead`` seconds are kept before the next input.
+    """
+    spans = []
+    actions = timeline["actions"]
+    if not actions:
+        return spans
+
+    # Lead-in: recording stabilization and manual setup before the first input
+    inputs = [a for a in actions if a["kind"] == "input"]
+    first_input = inputs[0]["start_s"] if inputs else actions[0]["start_s"]
+    spans.append((0.0, first_input - lead))
+
+    last_input_end = None
+    for action in actions:
+        if action["kind"] == "input":
+            last_input_end = action["end_s"]
+            continue
+        if action["start_s"] < first_input:
+            continue
+        start = action["start_s"]
+        if last_input_end is not None:
+            start = max(start, last_input_end + hold)
+        spans.append((start, action["end_s"] - lead))
+
+    # Tail: everything after the last input has settled
+    if last_input_end is not None:
+        spans.append((last_input_end + hold, duration))
+
+    return merge_spans([(max(0.0, a), min(duration, b)) for a, b in spans], min_idle)
+
+def frozen_spans(video_file, noise=0.003, min_idle=1.5, scale_width=320):
+    """Idle spans where the picture does not change, via ffmpeg freezedetect"""
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-nostats", "-i", video_file, "-map", "0:v:0",
+         "-vf", f"scale={scale_width}:-2,freezedetect=n={noise}:d={min_idle}",
+         "-f", "null", "-"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg freezedetect failed: {result.stderr.strip()[-500:]}")
+    starts = [float(v) for v in re.findall(r"freeze_start: ([\d.]+)", result.stderr)]
+    ends = [float(v) for v in re.findall(r"freeze_end: ([\d.]+)", result.stderr)]
+    if len(ends) < len(starts):
+        # Frozen until the end of the file
+        ends.append(probe_duration(video_file))
+    return list(zip(starts, ends))
+
+def merge_spans(spans, min_length=0.0):
+    """Sort, merge overlapping spans and drop spans shorter than min_length"""
+    merged = []
+    for start, end in sorted(spans):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return [(a, b) for a, b in merged if b - a >= min_length]
+
+def intersect_spans(first, second, min_length=0.0):
+    """Intersection of two sorted span lists"""
+    result = []
+    i = j = 0
+    while i < len(first) and j < len(second):
+        start = max(first[i][0], second[j][0])
+        end = min(first[i][1], second[j][1])
+        if end - start >= min_length:
+            result.append((start, end))
+        if first[i][1] < second[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+def keep_segments(idle_spans, duration):
+    """Complement of the idle spans over [0, duration]"""
+    segments = []
+    cursor = 0.0
+    for start, end in idle_spans:
+        if start > cursor:
+            segments.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < duration:
+        segments.append((cursor, duration))
+    return segments
+
+def snap_to_keyframes(segments, keyframes):
+    """Move each segment start back to the keyframe at or before it
+
+    Stream copy can only begin a segment on a keyframe, so the kept range
+    only ever grows; overlapping segments are merged afterwards.
+    """
+    if not keyframes:
+        return segments
+    snapped = []
+    for start, end in segments:
+        candidates = [k for k in keyframes if k <= start + 1e-3]
+        snapped.append((candidates[-1] if candidates else 0.0, end))
+    return merge_spans(snapped)
+
+def remap_time(t, segments):
+    """Map a time in the source video onto the trimmed video"""
+    offset = 0.0
+    for start, end in segments:
+        if t < start:
+            return offset
+        if t <= end:
+            return offset + (t - start)
+        offset += end - start
+    return offset
+
+def remap_timeline(timeline, segments, video_file):
+    """Return a copy of the timeline with times shifted onto the trimmed video"""
+    trimmed = json.loads(json.dumps(timeline))
+    trimmed["video"] = video_file
+    trimmed["trimmed_from"] = timeline.get("video")
+    trimmed["segments"] = [[a, b] for a, b in segments]
+    for action in trimmed["actions"]:
+        action["start_s"] = remap_time(action["start_s"], segments)
+        action["end_s"] = remap_time(action["end_s"], segments)
+    for section in trimmed["report"]["sections"]:
+        section["start_s"] = remap_time(section["start_s"], segments)
+        section["end_s"] = remap_time(section["end_s"], segments)
+    return trimmed
+
+def cut_stream_copy(video_file, segments, output_file):
+    """Concatenate segments with the concat demuxer without re-encoding"""
+    source = os.path.abspath(video_file).replace("'", "'\\''")
+    lines = ["ffconcat version 1.0"]
+    for start, end in segments:
+        lines.append(f"file '{source}'")
+        lines.append(f"inpoint {start:.6f}")
+        lines.append(f"outpoint {end:.6f}")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".ffconcat", delete=False) as f:
+        f.write("\n".join(lines) + "\n")
+        list_file = f.name
+    try:
+        cmd = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", list_file,
+            "-map", "0", "-c", "copy", "-movflags", "+faststart",
+            "-y", output_file
+        ]
+        return subprocess.run(cmd).returncode == 0
+    finally:
+        os.unlink(list_file)
+
+def cut_reencode(video_file, segments, output_file):
+    """Frame-exact cut with a single re-encode pass"""
+    expr = "+".join(f"between(t,{a:.3f},{b:.3f})" for a, b in segments)
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-i", video_file,
+        "-vf", f"select='{expr}',setpts=N/FRAME_RATE/TB",
+        "-c:v", "libx264", "-preset", "medium", "-crf", "18",
+    ]
+    if has_audio(video_file):
+        cmd += ["-af", f"aselect='{expr}',asetpts=N/SR/TB", "-c:a", "aac"]
+    cmd += ["-movflags", "+faststart", "-y", output_file]
+    return subprocess.run(cmd).returncode == 0
+
+def find_idle_spans(video_file, timeline, duration, mode, args):
+    """Combine timeline and frame-difference idle detection"""
+    spans_from_timeline = None
+    spans_from_frames = None
+    if mode in ("timeline", "both") and timeline is not None:
+        spans_from_timeline = timeline_idle_spans(
+            timeline, duration, hold=args.hold, lead=args.lead, min_idle=args.min_idle
+        )
+        print(f"🧭 Timeline idle spans: {len(spans_from_timeline)}")
+    if mode in ("frames", "both") or timeline is None:
+        spans_from_frames = frozen_spans(video_file, noise=args.noise, min_idle=args.min_idle)
+        print(f"🎞️ Frozen-frame spans: {len(spans_from_frames)}")
+
+    if spans_from_timeline is not None and spans_from_frames is not None:
+        # Only cut where the timeline says nothing happens AND the picture is still
+        return intersect_spans(spans_from_timeline, spans_from_frames, args.min_idle)
+    return spans_from_timeline if spans_from_timeline is not None else spans_from_frames
+
+def main():
+    parser = argparse.ArgumentParser(description="Trim idle stretches from an AeroMaps demo video")
+    parser.add_argument("video", help="recorded demo video")
+    parser.add_argument("-o", "--output", help="output file (default: <video>_trimmed.<ext>)")
+    parser.add_argument("--timeline", help="timeline JSON (default: <video>.timeline.json)")
+    parser.add_argument("--mode", choices=["timeline", "frames", "both"], default="both",
+                        help="how to find idle spans (default: both)")
+    parser.add_argument("--min-idle", type=float, default=1.5, help="shortest span worth cutting (s)")
+    parser.add_argument("--hold", type=float, default=1.0, help="time kept after each input (s)")
+    parser.add_argument("--lead", type=float, default=0.25, help="time kept before each input (s)")
+    parser.add_argument("--noise", type=float, default=0.003, help="freezedetect noise tolerance")
+    parser.add_argument("--reencode", action="store_true",
+                        help="cut frame-exactly with one re-encode instead of stream copy")
+    parser.add_argument("--dry-run", action="store_true", help="print the cut list only")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.video):
+        print(f"❌ Video not found: {args.video}")
+        sys.exit(1)
+
+    timeline_file = args.timeline or timeline_path_for(args.video)
+    timeline = load_timeline(timeline_file) if os.path.exists(timeline_file) else None
+    if timeline is None and args.mode == "timeline":
+        print(f"❌ Timeline not found: {timeline_file}")
+        sys.exit(1)
+    if timeline is None:
+        print("⚠️  No timeline found, using frame analysis only")
+
+    duration = probe_duration(args.video)
+    idle = find_idle_spans(args.video, timeline, duration, args.mode, args)
+    segments = keep_segments(idle, duration)
+
+    if not args.reencode:
+        segments = snap_to_keyframes(segments, keyframe_times(args.video))
+
+    kept = sum(b - a for a, b in segments)
+    print(f"\n✂️  {len(segments)} segments kept, {duration - kept:.1f}s of {duration:.1f}s removed")
+    for start, end in segments:
+        print(f"  keep {start:8.2f}s → {end:8.2f}s  ({end - start:.2f}s)")
+
+    if args.dry_run:
+        return
+
+    base, ext = os.path.splitext(args.video)
+    output_file = args.output or f"{base}_trimmed{ext}"
+    cut = cut_reencode if args.reencode else cut_stream_copy
+    print(f"\n🎬 Writing {output_file} ({'re-encode' if args.reencode else 'stream copy'})...")
+    if not cut(args.video, segments, output_file):
+        print("❌ ffmpeg failed to write the trimmed video")
+        sys.exit(1)
+
+    if timeline is not None:
+        trimmed_timeline = timeline_path_for(output_file)
+        with open(trimmed_timeline, "w") as f:
+            json.dump(remap_timeline(timeline, segments, output_file), f, indent=2)
+        print(f"🧭 Remapped timeline saved to {trimmed_timeline}")
+
+    print(f"✅ Trimmed video: {output_file} ({kept:.1f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+AeroMaps Demo Video Verifier
+Checks that every demo action produced a visible change in the recording
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from demo_timeline import load_timeline, timeline_path_for
+
+def probe_size(video_file):
+    """Return (width, height) of the first video stream"""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "stream=width,height", "-of", "csv=p=0:s=x", video_file],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {result.stderr.strip()}")
+    width, height = result.stdout.strip().splitlines()[0].split("x")
+    return int(width), int(height)
+
+def stream_change_scores(video_file, fps=10, width=160, pixel_delta=10, chunk_frames=256):
+    """Stream downscaled grayscale frames from ffmpeg and score frame-to-frame change
+
+    Returns (times, scores) where scores[i] is the fraction of pixels that
+    changed by more than ``pixel_delta`` grey levels between frame i and
+    frame i+1, and times[i] is the time of frame i+1. Nothing touches disk.
+    """
+    src_width, src_height = probe_size(video_file)
+    height = max(2, int(round(width * src_height / src_width / 2)) * 2)
+    frame_bytes = width * height
+
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-i", video_file,
+        "-an", "-vf", f"fps={fps},scale={width}:{height}:flags=area,format=gray",
+        "-f", "rawvideo", "-pix_fmt", "gray", "-"
+    ]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, bufsize=frame_bytes * chunk_frames)
+
+    scores = []
+    previous = None
+    try:
+        while True:
+            data = process.stdout.read(frame_bytes * chunk_frames)
+            usable = len(data) - len(data) % frame_bytes
+            if usable == 0:
+                break
+            frames = np.frombuffer(data[:usable], dtype=np.uint8).reshape(-1, height, width)
+            if previous is not None:
+                frames = np.concatenate([previous[None], frames])
+            if len(frames) > 1:
+                diff = np.abs(frames[1:].astype(np.int16) - frames[:-1].astype(np.int16))
+                scores.append((diff > pixel_delta).mean(axis=(1, 2)))
+            previous = frames[-1]
+    finally:
+        process.stdout.close()
+        process.wait()
+
+    if process.returncode != 0:
+        raise RuntimeError("ffmpeg failed while streaming frames")
+
+    scores = np.concatenate(scores) if scores else np.zeros(0)
+    times = (np.arange(len(scores)) + 1) / fps
+    return times, scores
+
+def verify_actions(timeline, times, scores, window=2.0, min_change=0.01, noise_factor=4.0):
+    """Check each input action for a visible change inside its window
+
+    The threshold is the larger of ``min_change`` and ``noise_factor`` times
+    the median score, so a noisy capture does not pass everything.
+    """
+    noise = float(np.median(scores)) if len(scores) else 0.0
+    threshold = max(min_change, noise_factor * noise)
+    results = []
+    for action in timeline["actions"]:
+        if action["kind"] != "input":
+            continue
+        start, end = action["start_s"], action["end_s"] + window
+        lo, hi = np.searchsorted(times, [start, end])
+        peak = float(scores[lo:hi].max()) if hi > lo else 0.0
+        peak_at = float(times[lo + int(scores[lo:hi].argmax())]) if hi > lo else None
+        results.append({
+            "index": action["index"],
+            "section": action["section"],
+            "action": action["action"],
+            "window_s": [start, end],
+            "peak_change": peak,
+            "peak_at_s": peak_at,
+            "visible": peak >= threshold,
+        })
+    return threshold, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify a recorded AeroMaps demo against its timeline")
+    parser.add_argument("video", help="recorded demo video")
+    parser.add_argument("--timeline", help="timeline JSON (default: <video>.timeline.json)")
+    parser.add_argument("--fps", type=float, default=10, help="analysis frame rate")
+    parser.add_argument("--width", type=int, default=160, help="analysis frame width in pixels")
+    parser.add_argument("--window", type=float, default=2.0, help="seconds after an input to look for change")
+    parser.add_argument("--min-change", type=float, default=0.01,
+                        help="minimum fraction of changed pixels that counts as visible")
+    parser.add_argument("--report", help="write the verification report JSON to this path")
+    args = parser.parse_args()
+
+    timeline_file = args.timeline or timeline_path_for(args.video)
+    if not os.path.exists(timeline_file):
+        print(f"❌ Timeline not found: {timeline_file}")
+        sys.exit(1)
+    timeline = load_timeline(timeline_file)
+
+    print(f"🔎 Verifying {args.video}...")
+    started = time.monotonic()
+    times, scores = stream_change_scores(args.video, fps=args.fps, width=args.width)
+    threshold, results = verify_actions(
+        timeline, times, scores, window=args.window, min_change=args.min_change
+    )
+    elapsed = time.monotonic() - started
+
+    section = None
+    for r in results:
+        if r["section"] != section:
+            section = r["section"]
+            print(f"\n📱 {section}")
+        mark = "✅" if r["visible"] else "❌"
+        print(f"  {mark} {r['action']:<28} peak {r['peak_change'] * 100:5.1f}% of pixels")
+
+    missing = [r for r in results if not r["visible"]]
+    duration = times[-1] if len(times) else 0.0
+    print(f"\n⏱️ Analysed {duration:.1f}s of video in {elapsed:.1f}s "
+          f"({len(scores)} frame pairs, threshold {threshold * 100:.1f}%)")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"video": args.video, "threshold": threshold, "actions": results}, f, indent=2)
+        print(f"🧾 Report saved to {args.report}")
+
+    if missing:
+        print(f"❌ {len(missing)} of {len(results)} actions showed no visible change")
+        sys.exit(1)
+    print(f"✅ All {len(results)} actions produced a visible change")
+
+if __name__ == "__main__":
+    main()